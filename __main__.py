@@ -3,28 +3,27 @@
 
 import sys
 import os
-import gc
-import time
-import win32file
-import win32event
-import win32con
+import re
+import argparse
+import subprocess
+import multiprocessing
 
-import matplotlib.pyplot as plt
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
 
-from core.data_import.dv_station import *
-from core.analysis.plots import *
-from core.analysis.histograms import *
-from core.analysis.tables import *
-from core.limits_import.limits import *
-from core.data_import.helpers import delete_all_object_attributes
+# Only light modules are imported at startup so the window shows quickly. The
+# analysis stack (pandas, matplotlib, lxml, bs4) is imported by the first
+# analysis that needs it.
+from core.analysis.runner import run_analysis, check_analyses_limits, ANALYSES
+from core.exceptions.custom_exceptions import LimitNotFoundError
+from core.data_import.watcher import create_watcher, BACKENDS
+from core.re_and_global import REGEX_RAW_DATAFILE
 
 
 # constants for user input parameters
 CONSTANT_REAL_TIME_FOLDER = r"C:\Test Analysis Data"
-ANALYSIS_TOOLS = ['Plot', 'Histograms', 'Tables', 'Out of Spec']
+ANALYSIS_TOOLS = ANALYSES
 PLOT_INFO = 'Create a temporal plot of the selected test'
 HIST_INFO = 'Plot current histograms at each temp/mode/voltage'
 TABLE_INFO = 'Generate an excel file with basic stats for each DUT at each temp/mode/voltage'
@@ -33,6 +32,7 @@ ANALYSIS_TOOLTIP_INFO = [PLOT_INFO, HIST_INFO, TABLE_INFO, OUT_OF_SPEC_INFO]
 DEFAULT_TEMP_TOL = 5
 DEFAULT_VOLTAGE_TOL = 0.5
 DEFAULT_PCTG_TOL = 10
+DEFAULT_WORKERS = 1
 
 # GUI dimensions
 TEXTFIELD_WIDTH = 4
@@ -43,14 +43,15 @@ TOL_WIDTH = 5
 
 class TestMainWindow(QMainWindow):
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, workers=DEFAULT_WORKERS, cache=True,
+                 real_time_folder=CONSTANT_REAL_TIME_FOLDER, watcher=None):
         super().__init__()
-        self.test_ui = TestAnalysisUI(self)
+        self.test_ui = TestAnalysisUI(self, workers, cache, real_time_folder, watcher)
         self.setCentralWidget(self.test_ui)
-        self.stylesheet = 'styles\style_blue.qss'
+        self.stylesheet = os.path.join('styles', 'style_blue.qss')
 
         # menu bar
-        switchAct = QAction(QIcon(r'images\clock.png'), 'Real Time', self)
+        switchAct = QAction(QIcon(os.path.join('images', 'clock.png')), 'Real Time', self)
         switchAct.triggered.connect(self.test_ui.switch_to_real_time)
         menubar = self.menuBar()
         fileMenu = menubar.addMenu('File')
@@ -61,7 +62,7 @@ class TestMainWindow(QMainWindow):
         self.height = 390
         self.setStyleSheet(open(self.stylesheet, "r").read())
         self.setWindowTitle('Automotive Testing Data Analysis')
-        self.setWindowIcon(QIcon('images\car.png'))
+        self.setWindowIcon(QIcon(os.path.join('images', 'car.png')))
         self.move(300, 150) # center window
         self.resize(self.width, self.height)
         self.show()
@@ -69,9 +70,14 @@ class TestMainWindow(QMainWindow):
 
 class TestAnalysisUI(QWidget):
 
-    def __init__(self, parent):
+    def __init__(self, parent, workers=DEFAULT_WORKERS, cache=True,
+                 real_time_folder=CONSTANT_REAL_TIME_FOLDER, watcher=None):
         super().__init__()
         self.window = parent
+        self.workers = workers
+        self.cache = cache  # cache parsed datafiles in a sidecar folder of the data folder
+        self.real_time_folder = real_time_folder
+        self.watcher = watcher  # real time folder watcher backend (None for platform default)
         self.test_name = ''
         self.data_folder = ''
         self.limits_file = ''
@@ -128,6 +134,17 @@ class TestAnalysisUI(QWidget):
         self.hist_by_tp_box = QCheckBox('Hists by TP')
         grid.addWidget(self.hist_by_tp_box, 5, 3, 1, 1)   
 
+        self.workers_label = QLabel('Workers')
+        self.workers_label.setAlignment(Qt.AlignBottom)
+        self.workers_field = QLineEdit(str(self.workers), self)
+        self.workers_field.setFixedWidth(TOL_WIDTH)
+        self.workers_field.setValidator(QIntValidator(1, 64))
+        self.workers_field.setToolTip('Number of processes used to read the raw datafiles')
+        workers_layout = QVBoxLayout()
+        workers_layout.addWidget(self.workers_label)
+        workers_layout.addWidget(self.workers_field)
+        grid.addLayout(workers_layout, 5, 4, 1, 1)
+
         # tolerances
         self.tolerances_label = QLabel('Tolerances:')
         grid.addWidget(self.tolerances_label, 6, 0, 1, 1)
@@ -192,7 +209,7 @@ class TestAnalysisUI(QWidget):
     def switch_to_real_time(self):
         self._set_real_time_analysis_options()
         self._set_real_time_conditions()
-        self.window.setStyleSheet(open('styles\style_test_mode.qss', "r").read())
+        self.window.setStyleSheet(open(os.path.join('styles', 'style_test_mode.qss'), "r").read())
         self.window.setWindowTitle('Automotive Testing Data Analysis - REAL TIME MODE')
 
     def _set_real_time_analysis_options(self):
@@ -206,8 +223,8 @@ class TestAnalysisUI(QWidget):
 
     def _set_real_time_conditions(self):
         self.hist_by_tp_box.setDisabled(True)
-        self.data_folder_button.text_box.setText(CONSTANT_REAL_TIME_FOLDER)
-        self.data_folder = CONSTANT_REAL_TIME_FOLDER
+        self.data_folder_button.text_box.setText(self.real_time_folder)
+        self.data_folder = self.real_time_folder
         self.data_folder_button.setDisabled(True)
         self.data_folder_textfield.setDisabled(True)
         self.boards_textfield.setDisabled(True)
@@ -218,6 +235,7 @@ class TestAnalysisUI(QWidget):
 
     def _load_limits(self, boards, temps):
         if self.limits_file:
+            from core.limits_import.limits import Limits
             return Limits(self.limits_file)
         else:
             return None
@@ -233,6 +251,7 @@ class TestAnalysisUI(QWidget):
         temperature_tolerance = float(self.temp_tol_field.text())
         voltage_tolerance = float(self.voltage_tol_field.text())
         percent_from_mean = int(self.pctg_tol_field.text())
+        workers = int(self.workers_field.text() or DEFAULT_WORKERS)
 
         if datapath and boards and temps:
             temps = [int(temperature) for temperature in self.temperatures_textfield.text().split(',')]
@@ -240,18 +259,27 @@ class TestAnalysisUI(QWidget):
             limits = self._load_limits(boards, temps)
             run_limit_analysis = self.limit_analysis_box.isChecked()
             self._print_test_conditions(test_name, temps, boards, limits, temperature_tolerance, voltage_tolerance)
+            from core.data_import.dv_station import TestStation
             try:
                 test = TestStation(test_name, datapath, boards, limits, run_limit_analysis, 
-                                   multimode, temperature_tolerance, voltage_tolerance, *temps)
+                                   multimode, temperature_tolerance, voltage_tolerance, *temps,
+                                   workers=workers, cache=self.cache)
             except Exception as e:
                 print(e)
                 sys.exit()
             test.print_board_information()
-            if not test.df.empty:
-                for analysis_type in self.analysis_buttons:
-                    if analysis_type.pressed:
-                        self._run_analysis(analysis_type.name, test, limits, hists_by_tp, percent_from_mean, run_limit_analysis)
+            if test.num_rows:
+                analysis_names = [analysis_type.name for analysis_type in self.analysis_buttons
+                                  if analysis_type.pressed]
+                try:
+                    check_analyses_limits(analysis_names, test, limits, run_limit_analysis)
+                except LimitNotFoundError as e:  # reported before any analysis runs
+                    print('\n' + e.message)
+                    return
+                for analysis_name in analysis_names:
+                    run_analysis(analysis_name, test, limits, hists_by_tp, percent_from_mean, run_limit_analysis)
                 print('\n\n\n ==> Analysis complete.')
+                import matplotlib.pyplot as plt
                 try:
                     plt.show()
                 except:
@@ -272,25 +300,6 @@ class TestAnalysisUI(QWidget):
         if limits:
             limits.print_info()
 
-    def _run_analysis(self, analysis_name, test, limits, hists_by_tp, percent_from_mean, run_limit_analysis):
-        if analysis_name == 'Plot':
-            plot_modes(test)
-        elif analysis_name == 'Histograms':
-            make_mode_histograms(test, system_by_system=hists_by_tp, limits=limits, percent_from_mean=percent_from_mean)
-        elif analysis_name == 'Tables':
-            create_xml_tables(test, run_limit_analysis, limits)
-        elif analysis_name == 'Out of Spec':
-            print('\nCreating out of spec raw data text file(s)...')
-            if limits:
-                for mode in test.modes:
-                    mode.get_out_of_spec_data()
-                print('...complete.')
-            else:
-                print('...limits were not provided. Raw out of spec ' \
-                      'file(s) cannot be created without limits.')
-        else:
-            print('Analysis tool not found')
-
     def thread_analysis(self):
         test, limits = None, None # clear test objects (from prevoius usage)
         test_name = self.test_name.text()
@@ -303,13 +312,15 @@ class TestAnalysisUI(QWidget):
         voltage_tolerance = float(self.voltage_tol_field.text())
         percent_from_mean = int(self.pctg_tol_field.text())
         run_limit_analysis = self.limit_analysis_box.isChecked()
+        workers = int(self.workers_field.text() or DEFAULT_WORKERS)
         
         if datapath and boards and temps:
             temps = [int(temperature) for temperature in self.temperatures_textfield.text().split(',')]
             limits = self._load_limits(boards, temps)
             self.run_analysis_thread = realTimeThread(self, test_name, temps, boards, datapath, 
                                     multimode, hists_by_tp, temperature_tolerance, voltage_tolerance, 
-                                    percent_from_mean, run_limit_analysis, limits)
+                                    percent_from_mean, run_limit_analysis, limits, workers,
+                                    self.cache, self.watcher)
             self.run_analysis_thread.start()
         else:
             print('\nYou must select a data folder, temperatures, and test boards')
@@ -398,7 +409,7 @@ class realTimeThread(QThread):
     """ Run analysis """
     def __init__(self, ui, test_name, temps, boards, datapath, multimode, hists_by_tp, 
                  temperature_tolerance, voltage_tolerance, percent_from_mean, 
-                 run_limit_analysis, limits):
+                 run_limit_analysis, limits, workers=DEFAULT_WORKERS, cache=True, watcher=None):
         QThread.__init__(self)
         self.ui = ui
         self.test_name = test_name
@@ -412,6 +423,10 @@ class realTimeThread(QThread):
         self.percent_from_mean = percent_from_mean
         self.run_limit_analysis = run_limit_analysis
         self.limits = limits
+        self.workers = workers
+        self.cache = cache
+        self.watcher = watcher
+        self.test = None  # station is kept and updated with only new data on each notification
 
     def __del__(self):
         self.wait()
@@ -430,45 +445,34 @@ class realTimeThread(QThread):
     def _real_time_loop(self):
         self.ui.setDisabled(True)
         print('\n\nAnalysis awaiting notification. Tables will be generated when there is raw data to analyze...\n\n')
-        path_to_watch = os.path.abspath(CONSTANT_REAL_TIME_FOLDER)
-        change_handle = win32file.FindFirstChangeNotification (path_to_watch, 
-                                0, win32con.FILE_NOTIFY_CHANGE_FILE_NAME)
-        try:
-            old_path_contents = dict ([(f, None) for f in os.listdir (path_to_watch)])
+        with create_watcher(self.datapath, self.watcher, pattern=REGEX_RAW_DATAFILE,
+                            include_growth=True) as watcher:
             while 1:
-                result = win32event.WaitForSingleObject (change_handle, 500)
-                if result == win32con.WAIT_OBJECT_0:
-                  time.sleep(10)
-                  new_path_contents = dict ([(f, None) for f in os.listdir (path_to_watch)])
-                  added = [f for f in new_path_contents if not f in old_path_contents]
-                  if added: 
-                    print("Datafile added: ", ", ".join (added))
+                changed = watcher.wait()  # returns once the new/grown datafiles stop growing
+                if changed:
+                    print("Datafile added or appended to: ", ", ".join(changed))
                     self._analyze_real_time()
-                  old_path_contents = new_path_contents
-                  win32file.FindNextChangeNotification (change_handle)
-        finally:
-            win32file.FindCloseChangeNotification (change_handle)
 
     def _analyze_real_time(self):
         self._print_test_conditions()
-        test = TestStation(self.test_name, self.datapath, self.boards, self.limits, self.run_limit_analysis, 
-                           self.multimode, self.temperature_tolerance, self.voltage_tolerance, *self.temps)
+        from core.data_import.dv_station import TestStation
+        if self.test is None:
+            self.test = TestStation(self.test_name, self.datapath, self.boards, self.limits,
+                                    self.run_limit_analysis, self.multimode, self.temperature_tolerance,
+                                    self.voltage_tolerance, *self.temps,
+                                    workers=self.workers, cache=self.cache)
+        else:
+            self.test.update()  # parse only new datafiles and appended rows
         close_browser('iexplore')
-        create_xml_tables(test, self.run_limit_analysis, self.limits)
-        self._delete_created_variables(test)
+        try:
+            check_analyses_limits(['Tables'], self.test, self.limits, self.run_limit_analysis)
+        except LimitNotFoundError as e:  # reported, the loop keeps waiting for new datafiles
+            print('\n' + e.message)
+            return
+        run_analysis('Tables', self.test, self.limits, self.hists_by_tp, self.percent_from_mean,
+                     self.run_limit_analysis)
         print('\n\n\n ==> Analysis complete.')
 
-    def _delete_created_variables(self, test):
-        for board in test.boards:
-            delete_all_object_attributes(board)
-            del board
-        for mode in test.modes:
-            delete_all_object_attributes(mode)
-            del mode
-        delete_all_object_attributes(test)
-        del test
-        gc.collect()
-
     def run(self):
         self._real_time_loop()
 
@@ -485,8 +489,27 @@ def close_browser(browser):
         pass
 
 
+def parse_args(argv):
+    """ Parse command line options (unknown options are left for Qt) """
+    parser = argparse.ArgumentParser(description='Automotive Testing Data Analysis')
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help='number of processes used to read the raw datafiles ' \
+                             '(default: %(default)s)')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='do not cache parsed datafiles in a sidecar folder of the data folder')
+    parser.add_argument('--real-time-folder', default=CONSTANT_REAL_TIME_FOLDER,
+                        help='folder watched in real time mode (default: %(default)s)')
+    parser.add_argument('--watcher', choices=BACKENDS, default=None,
+                        help='real time folder watcher (default: inotify on Linux, win32 on Windows)')
+    args, qt_args = parser.parse_known_args(argv[1:])
+    return args, argv[:1] + qt_args
+
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    gui = TestMainWindow()
+    multiprocessing.freeze_support()  # worker processes in the pyinstaller executable
+    args, qt_argv = parse_args(sys.argv)
+    app = QApplication(qt_argv)
+    gui = TestMainWindow(workers=args.workers, cache=args.cache,
+                         real_time_folder=args.real_time_folder, watcher=args.watcher)
     gui.show()
     sys.exit(app.exec_())
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of multi-file dataframe assembly. Synthetic rotated datafile
+dataframes (_B_1 .. _B_N) are assembled the legacy way (the accumulated
+dataframe is grown once per file) and with a single concat.
+
+Run from the project root folder:
+    python -m benchmarks.bench_assembly
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.data_import.datafile import concat_raw_dataframes
+
+FILE_COUNTS = (10, 100, 500)
+ROWS_PER_FILE = 1000
+NUM_BOARDS = 6
+SYSTEMS_PER_BOARD = 12
+
+
+def make_rotated_dataframes(num_files, rows=ROWS_PER_FILE):
+    """ Returns: list of synthetic raw datafile dataframes. Every tenth file is
+        missing the last board (mismatched header) """
+    columns = ['Temp TC1: Amb', 'Vsetpoint']
+    for board in range(1, NUM_BOARDS+1):
+        columns += ['B{} ON/OFF'.format(board), 'B{} VSense1'.format(board)]
+        columns += ['B{} TP{}: System {}'.format(board, tp, tp) for tp in range(1, SYSTEMS_PER_BOARD+1)]
+    last_board_columns = [col for col in columns if col.startswith('B' + str(NUM_BOARDS))]
+    start = pd.Timestamp('2018-02-26 10:45:55.517')
+    dframes = []
+    for filenumber in range(num_files):
+        index = pd.date_range(start + pd.Timedelta(seconds=filenumber*rows), periods=rows,
+                              freq='S', name='Date Time')
+        dframe = pd.DataFrame(np.random.rand(rows, len(columns)), index=index, columns=columns)
+        if filenumber % 10 == 9:
+            dframe = dframe.drop(last_board_columns, axis=1)
+        dframes.append(dframe)
+    return dframes
+
+def append_per_file(dframes):
+    """ Legacy assembly: the accumulated dataframe is copied once per file """
+    dframe = pd.DataFrame()
+    for next_file_df in dframes:
+        dframe = pd.concat([dframe, next_file_df])
+    return dframe
+
+def time_assembly(function, dframes):
+    start = time.perf_counter()
+    dframe = function(dframes)
+    return dframe, time.perf_counter() - start
+
+def main():
+    print('Assembly of synthetic rotated files ({} rows each)'.format(ROWS_PER_FILE))
+    for num_files in FILE_COUNTS:
+        dframes = make_rotated_dataframes(num_files)
+        legacy_df, legacy_seconds = time_assembly(append_per_file, dframes)
+        concat_df, concat_seconds = time_assembly(concat_raw_dataframes, dframes)
+        assert legacy_df.shape == concat_df.shape
+        print('\t{:>4} files  append: {:>8.3f} s  concat: {:>7.3f} s  ({:.1f}x)'.format(
+              num_files, legacy_seconds, concat_seconds, legacy_seconds / concat_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the raw datafile ingest engines. The 'test files/Run11' datafiles
+are scaled up (rows repeated) into a temporary folder and each file is read with
+the legacy python engine and the vectorized C engine.
+
+Run from the project root folder:
+    python -m benchmarks.bench_ingest [scale]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+from core.data_import.datafile import read_raw_datafile, ENGINES
+
+RUN11_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'test files', 'Run11')
+DEFAULT_SCALE = 500
+
+
+def make_scaled_datafiles(source_folder, target_folder, scale):
+    """ Copies each raw datafile in source folder with its data rows repeated
+        'scale' times. Returns: list of scaled datafile paths """
+    filepaths = []
+    for filename in sorted(os.listdir(source_folder)):
+        if '_B' not in filename:
+            continue
+        with open(os.path.join(source_folder, filename)) as datafile:
+            header = datafile.readline()
+            rows = [row if row.endswith('\n') else row + '\n' for row in datafile]
+        filepath = os.path.join(target_folder, filename)
+        with open(filepath, 'w') as scaled_file:
+            scaled_file.write(header)
+            scaled_file.write(''.join(rows) * scale)
+        filepaths.append(filepath)
+    return filepaths
+
+def time_engine(filepaths, engine):
+    """ Returns: (total rows read, seconds) for reading every file with engine """
+    start = time.perf_counter()
+    rows = sum(len(read_raw_datafile(filepath, engine=engine)) for filepath in filepaths)
+    return rows, time.perf_counter() - start
+
+def main(scale=DEFAULT_SCALE):
+    folder = tempfile.mkdtemp(prefix='bench_ingest_')
+    try:
+        filepaths = make_scaled_datafiles(RUN11_FOLDER, folder, scale)
+        print('Run11 scaled x' + str(scale) + ' (' + str(len(filepaths)) + ' files)')
+        results = {}
+        for engine in reversed(ENGINES):  # legacy python engine first
+            rows, seconds = time_engine(filepaths, engine)
+            results[engine] = rows / seconds
+            print('\t{:<8} {:>9} rows  {:>8.3f} s  {:>12,.0f} rows/s'.format(
+                  engine, rows, seconds, results[engine]))
+        print('\tspeedup: {:.1f}x'.format(results['c'] / results['python']))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SCALE)
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of loading limits files. Every limits file in 'test files/limits
+files' (and its archive folder) is copied into a temporary folder and loaded
+with the legacy BeautifulSoup parser, with the lxml/XPath parser of Limits
+(cache=False), and with Limits from its compiled limits artifact (loaded once
+first to write the artifact). The limits of the three loads are compared.
+The current limits of every row and system of a synthetic binned run are then
+looked up one cell at a time in the nested lim dicts and at once from the
+dense LimitsTable.
+
+Run from the project root folder:
+    python -m benchmarks.bench_limits [repeats]
+"""
+
+import os
+import sys
+import time
+import glob
+import shutil
+import tempfile
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+from core.limits_import.limits import Limits
+
+LIMITS_FOLDER = os.path.join('test files', 'limits files')
+DEFAULT_REPEATS = 20
+LOOKUP_ROWS = 20000
+LOOKUP_LED_BINS = ['5K', '8J'] * 6  # LED bin of each of 12 systems
+LIMITS_ATTRIBUTES = ('lim', 'modules', 'board_module_pairs', 'outage_board',
+                     'outage_present', 'binning', 'led_binning_dict')
+
+
+class LegacyLimits(Limits):
+    """ Limits parsed with BeautifulSoup and find_all predicates (legacy parser) """
+    def __init__(self, filepath):
+        self.soup = ''
+        super(LegacyLimits, self).__init__(filepath, cache=False)
+
+    def set_tree(self):
+        with open(self.filepath) as filepath:
+            self.soup = BeautifulSoup(filepath, 'lxml')
+
+    def get_board_info(self):
+        for board_row in self.soup.find_all(class_='board'):
+            data = board_row.find_all('td')
+            board, module, led_bins, is_outage = (data[i].string for i in range(4))
+            self.board_module_pairs[board] = module
+            self.modules.append(module)
+            if led_bins:
+                self.binning = True
+                self.led_binning_dict[board] = led_bins.split(' ')
+            if is_outage and is_outage != '':
+                self.outage_board = board
+                self.outage_present = True
+
+    def get_limits(self):
+        for mode in self.soup.find_all(class_='mode'):
+            mode_id = mode.get('id')
+            self.lim[mode_id] = {}
+            for temp_table in mode.find_all(class_='temp-table'):
+                temp = int(temp_table.get('class')[-1].replace('temp', '').replace('C', ''))
+                self.lim[mode_id][temp] = self.__voltage_limits(temp_table)
+        if 'OUTAGE' in self.modules:
+            self.lim['OUTAGE'] = {}
+            for outage_table in self.soup.find_all(class_='outage-table'):
+                self.lim['OUTAGE'][outage_table.get('state')] = self.__voltage_limits(outage_table)
+
+    def __voltage_limits(self, table):
+        voltage_limits = {}
+        for voltage_row in table.find_all(lambda tag: tag.get('id') == 'voltage'):
+            voltage = round(float(voltage_row.get('class')[0]), 1)
+            minimum = round(float(voltage_row.find(class_='min').string), 3)
+            maximum = round(float(voltage_row.find(class_='max').string), 3)
+            voltage_limits[voltage] = (minimum, maximum)
+        return voltage_limits
+
+
+def load(limits_class, filepath, repeats, **kwargs):
+    """ Returns: (limits attributes or error message, seconds per load) """
+    start = time.perf_counter()
+    try:
+        for _ in range(repeats):
+            limits = limits_class(filepath, **kwargs)
+        result = [getattr(limits, attribute) for attribute in LIMITS_ATTRIBUTES]
+    except Exception as e:
+        result = 'error ({})'.format(e.__class__.__name__)
+    return result, (time.perf_counter() - start) / repeats
+
+def lookup_limits(repeats):
+    """ Prints time to look up the limits of every row and system of a run """
+    limits = Limits(os.path.join(LIMITS_FOLDER, 'tesla_dv.htm'), cache=False)
+    rng = np.random.RandomState(0)
+    temps = rng.choice([-40, 23, 85], LOOKUP_ROWS)
+    voltages = rng.choice([9.0, 13.5, 16.0], LOOKUP_ROWS)
+    start = time.perf_counter()
+    per_cell = np.array([[limits.lim[led_bin + ' Reverse'][temp][voltage][0] for led_bin in LOOKUP_LED_BINS]
+                         for temp, voltage in zip(temps.tolist(), voltages.tolist())])
+    per_cell_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        lower, _ = limits.table.limits_at('Reverse', temps[:, np.newaxis], voltages[:, np.newaxis],
+                                          LOOKUP_LED_BINS)
+    table_seconds = (time.perf_counter() - start) / repeats
+    print('\nlimits of {} rows x {} systems: per cell {:.2f} ms, table {:.2f} ms, identical {}'.format(
+          LOOKUP_ROWS, len(LOOKUP_LED_BINS), per_cell_seconds * 1000, table_seconds * 1000,
+          np.array_equal(per_cell, lower)))
+
+def main(repeats=DEFAULT_REPEATS):
+    folder = tempfile.mkdtemp(prefix='bench_limits_')
+    try:
+        filepaths = sorted(glob.glob(os.path.join(LIMITS_FOLDER, '*.htm')) +
+                           glob.glob(os.path.join(LIMITS_FOLDER, 'archive', '*.htm')))
+        print('{:<24} {:>10} {:>10} {:>10}  {}'.format('limits file', 'legacy ms', 'lxml ms',
+                                                       'cached ms', 'identical'))
+        for filepath in filepaths:
+            copy = shutil.copy(filepath, folder)
+            legacy, legacy_seconds = load(LegacyLimits, copy, repeats)
+            parsed, parsed_seconds = load(Limits, copy, repeats, cache=False)
+            load(Limits, copy, 1)  # writes the compiled limits artifact
+            cached, cached_seconds = load(Limits, copy, repeats)
+            print('{:<24} {:>10.2f} {:>10.2f} {:>10.2f}  {}'.format(
+                  os.path.basename(filepath)[:24], legacy_seconds * 1000, parsed_seconds * 1000,
+                  cached_seconds * 1000, legacy == parsed == cached))
+        lookup_limits(repeats)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
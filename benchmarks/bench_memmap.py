@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of time range reads from the memmap store. The 'test files/Run11'
+datafiles are scaled up (rows repeated) into a temporary folder and its memmap
+store is written once. A zoomed window (a few columns of 1% of the scans) is
+then read by building the whole test in memory and slicing its df, and by
+opening the memmap store and reading only that window. Peak memory is traced
+with tracemalloc.
+
+Run from the project root folder:
+    python -m benchmarks.bench_memmap [scale]
+"""
+
+import io
+import sys
+import time
+import shutil
+import tempfile
+import tracemalloc
+import contextlib
+
+from benchmarks.bench_ingest import make_scaled_datafiles, RUN11_FOLDER
+from core.data_import.dv_station import TestStation
+from core.data_import.memmap_store import MemmapStore, sidecar_memmap_directory
+
+DEFAULT_SCALE = 2000
+BOARDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+COLUMNS = ['Vsetpoint', 'Temp TC1: Amb', 'B1 TP1: P552 PT']
+WINDOW_FRACTION = 0.01
+
+
+def traced(function, *args):
+    """ Returns: (result, seconds, peak MB) of function(*args) """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def read_window_in_memory(folder, window):
+    with contextlib.redirect_stdout(io.StringIO()):
+        test = TestStation('bench', folder, BOARDS, None, False, False, 5, 0.5, 23, cache=False)
+    return test.scan_data(COLUMNS, *window)
+
+def read_window_memmap(folder, window):
+    return MemmapStore(sidecar_memmap_directory(folder)).read(COLUMNS, *window)
+
+def main(scale=DEFAULT_SCALE):
+    folder = tempfile.mkdtemp(prefix='bench_memmap_')
+    try:
+        make_scaled_datafiles(RUN11_FOLDER, folder, scale)
+        with contextlib.redirect_stdout(io.StringIO()):
+            test = TestStation('bench', folder, BOARDS, None, False, False, 5, 0.5, 23,
+                               cache=False, memmap=True)
+        times = test.df.index.sort_values()
+        middle, width = len(times) // 2, int(len(times) * WINDOW_FRACTION) // 2
+        window = (times[middle - width], times[middle + width])
+        print('Run11 scaled x{} ({} rows), window of {} columns from {} to {}'.format(
+              scale, len(test.df), len(COLUMNS), *window))
+        del test
+        results = []
+        for label, function in (('in memory', read_window_in_memory),
+                                ('memmap', read_window_memmap)):
+            dframe, seconds, peak = traced(function, folder, window)
+            results.append(dframe)
+            print('\t{:<10} {:>8.4f} s  peak {:>8.1f} MB  ({} rows)'.format(
+                  label, seconds, peak, len(dframe)))
+        print('\twindows identical:', results[0].sort_index().equals(results[1].sort_index()))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the station data column schema. The 'test files/Run11' datafiles
+are scaled up (rows repeated) into a temporary folder and read with the compact
+schema of core.data_import.datafile (int8 ON/OFF codes, float32 thermocouples and
+board readings, int8 coded categorical Vsetpoint). The same data as the legacy
+all float64 layout is compared for memory use and for the mask filters run on
+every analysis (board ON/OFF, temp/voltage condition, currents outside limits).
+
+Run from the project root folder:
+    python -m benchmarks.bench_memory [scale]
+"""
+
+import re
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks.bench_ingest import make_scaled_datafiles, RUN11_FOLDER
+from core.data_import.datafile import read_raw_datafiles, concat_raw_dataframes
+from core.re_and_global import REGEX_ON_OFF, REGEX_SYSTEMS, VSETPOINT
+
+DEFAULT_SCALE = 2000
+AMBIENT = 'Temp TC1: Amb'
+TEMPS = (23, 25)
+TEMPERATURE_TOLERANCE = 5
+LIMITS = (0.25, 0.35)
+REPEATS = 5
+
+
+def mask_filters(dframe):
+    """ Runs the mask filters of an analysis once. Returns: number of rows selected """
+    selected = 0
+    for col in dframe.columns:
+        if re.search(REGEX_ON_OFF, col):
+            selected += np.count_nonzero(dframe[col].values == 1)
+    ambients, vsetpoints = dframe[AMBIENT].values, dframe[VSETPOINT].values
+    for temp in TEMPS:
+        at_temp = (ambients > temp - TEMPERATURE_TOLERANCE) & \
+                  (ambients < temp + TEMPERATURE_TOLERANCE)
+        for voltage in np.unique(vsetpoints):
+            selected += np.count_nonzero(at_temp & (vsetpoints == voltage))
+    currents = dframe[[col for col in dframe.columns if re.search(REGEX_SYSTEMS, col)]].values
+    selected += np.count_nonzero((currents < LIMITS[0]) | (currents > LIMITS[1]))
+    return selected
+
+def time_mask_filters(dframe):
+    """ Returns: (rows selected, best seconds of REPEATS runs) """
+    seconds = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        selected = mask_filters(dframe)
+        seconds.append(time.perf_counter() - start)
+    return selected, min(seconds)
+
+def main(scale=DEFAULT_SCALE):
+    folder = tempfile.mkdtemp(prefix='bench_memory_')
+    try:
+        filepaths = make_scaled_datafiles(RUN11_FOLDER, folder, scale)
+        compact = concat_raw_dataframes(read_raw_datafiles(filepaths))
+        legacy = compact.astype(np.float64)  # layout before the column schema
+        print('Run11 scaled x{} ({} rows, {} columns)'.format(scale, len(compact),
+                                                              len(compact.columns)))
+        results = {}
+        for label, dframe in (('float64', legacy), ('compact', compact)):
+            megabytes = dframe.memory_usage(deep=True).sum() / 1024**2
+            selected, seconds = time_mask_filters(dframe)
+            results[label] = (megabytes, seconds)
+            print('\t{:<8} {:>8.1f} MB  mask filters {:>7.4f} s  ({} rows selected)'.format(
+                  label, megabytes, seconds, selected))
+        print('\tmemory: -{:.0f}%  mask filters: {:.1f}x'.format(
+              100 * (1 - results['compact'][0] / results['float64'][0]),
+              results['float64'][1] / results['compact'][1]))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
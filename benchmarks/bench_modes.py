@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of multimode partitioning (TestStation mode positions). A synthetic test
+dataframe with N boards is split into its board ON/OFF modes the legacy way
+(every one of the 2^N masks copies the dataframe and filters it board by board)
+and with the single pass state code groupby.
+
+Run from the project root folder:
+    python -m benchmarks.bench_modes
+"""
+
+import time
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from core.data_import.helpers import mask_to_mode, board_state_positions
+
+BOARD_COUNTS = (6, 9, 12)
+ROWS = 20000
+SYSTEMS_PER_BOARD = 4
+NUM_OBSERVED_MODES = 16  # functional cycle steps of the synthetic test
+
+
+def make_test_dataframe(num_boards, rows=ROWS):
+    """ Returns: (synthetic test dataframe, board ids). Rows cycle through a few
+        random board ON/OFF masks; a few rows have flashing (2) boards """
+    board_ids = ['B' + str(board) for board in range(1, num_boards+1)]
+    columns = {'Temp TC1: Amb': np.random.rand(rows), 'Vsetpoint': np.full(rows, 13.5)}
+    cycle = np.random.randint(0, 2, size=(NUM_OBSERVED_MODES, num_boards))
+    states = cycle[np.arange(rows) % NUM_OBSERVED_MODES].astype(float)
+    states[::97, 0] = 2.0
+    for i, board_id in enumerate(board_ids):
+        columns[board_id + ' ON/OFF'] = states[:, i]
+        for tp in range(1, SYSTEMS_PER_BOARD+1):
+            columns['{} TP{}: System {}'.format(board_id, tp, tp)] = np.random.rand(rows)
+    return pd.DataFrame(columns), board_ids
+
+def split_per_mask(df, board_ids):
+    """ Legacy partitioning: copy and filter the dataframe for every mask """
+    mode_df_dict = {}
+    for mask in [''.join(seq) for seq in itertools.product('01', repeat=len(board_ids))]:
+        if '1' not in mask:
+            continue
+        data = df.copy()
+        for board_id, digit in zip(board_ids, mask):
+            data = data.loc[(df[board_id + ' ON/OFF'] == float(digit))]
+        if not data.empty:
+            mode_df_dict[mask_to_mode(mask, board_ids)] = data
+    return mode_df_dict
+
+def split_by_state_codes(df, board_ids):
+    """ Single pass partitioning: rows of each mode from its state code group """
+    return {mode: df.iloc[positions]
+            for mode, positions in board_state_positions(df, board_ids).items()}
+
+def time_split(function, df, board_ids):
+    start = time.perf_counter()
+    mode_df_dict = function(df, board_ids)
+    return mode_df_dict, time.perf_counter() - start
+
+def main():
+    print('Multimode partitioning of {} rows'.format(ROWS))
+    for num_boards in BOARD_COUNTS:
+        df, board_ids = make_test_dataframe(num_boards)
+        legacy, legacy_seconds = time_split(split_per_mask, df, board_ids)
+        grouped, grouped_seconds = time_split(split_by_state_codes, df, board_ids)
+        assert sorted(legacy) == sorted(grouped)
+        assert all(legacy[mode].index.equals(grouped[mode].index) for mode in legacy)
+        print('\t{:>2} boards ({:>4} masks, {:>2} observed)  per mask: {:>8.3f} s  ' \
+              'groupby: {:>6.3f} s  ({:.0f}x)'.format(
+              num_boards, 2**num_boards - 1, len(grouped), legacy_seconds, grouped_seconds,
+              legacy_seconds / grouped_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of out-of-core test reading. The 'test files/Run11' datafiles are
+scaled up (rows repeated) into a temporary folder, and the test station is
+built and its Tables analysis written in memory and out-of-core (with a memory
+budget). Peak memory is traced with tracemalloc (numpy/pandas buffers included).
+
+Run from the project root folder:
+    python -m benchmarks.bench_out_of_core [scale] [memory budget MB]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+import tracemalloc
+import contextlib
+
+from benchmarks.bench_ingest import make_scaled_datafiles, RUN11_FOLDER
+from core.data_import.dv_station import TestStation
+from core.analysis.tables import create_xml_tables
+
+DEFAULT_SCALE = 2000
+DEFAULT_MEMORY_BUDGET = 16  # MB
+BOARDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+TEMPS = (23, 25)
+
+
+def analyze(folder, output_folder, memory_budget=None):
+    """ Returns: (seconds, peak MB) to build the test and write its tables """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        test = TestStation('bench', folder, BOARDS, None, False, False, 5, 0.5, *TEMPS,
+                           streaming_stats=True, memory_budget=memory_budget)
+        create_xml_tables(test, output_folder=output_folder, open_browser=False)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return seconds, peak
+
+def main(scale=DEFAULT_SCALE, memory_budget=DEFAULT_MEMORY_BUDGET):
+    folder = tempfile.mkdtemp(prefix='bench_out_of_core_')
+    try:
+        data_folder, outputs = os.path.join(folder, 'data'), []
+        os.makedirs(data_folder)
+        filepaths = make_scaled_datafiles(RUN11_FOLDER, data_folder, scale)
+        size = sum(os.path.getsize(filepath) for filepath in filepaths) / 1024**2
+        print('Run11 scaled x{} ({} files, {:.0f} MB of text)'.format(scale, len(filepaths), size))
+        for label, budget in (('in memory', None), ('out-of-core', memory_budget)):
+            output_folder = os.path.join(folder, label.replace(' ', '_'), '')
+            os.makedirs(output_folder)
+            seconds, peak = analyze(data_folder, output_folder, budget)
+            outputs.append(output_folder + 'bench.xml')
+            budget_text = ' (budget {} MB)'.format(budget) if budget else ''
+            print('\t{:<12} {:>8.3f} s  peak {:>8.1f} MB{}'.format(label, seconds, peak, budget_text))
+        print('\ttables identical:', filecmp.cmp(*outputs, shallow=False))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
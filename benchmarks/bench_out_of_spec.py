@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the out of spec files. The 'test files/Run11' datafiles are scaled
+up (rows repeated) into a temporary folder and analyzed against the P552 limits
+with a tight voltage tolerance, so many rows are out of spec (the repeated rows
+get distinct timestamps, so they are not dropped as duplicates). The out of spec
+files of every mode are written by the legacy extractor (each condition
+refiltered for Vin then Iin, the file flushed and stat'ed after every block)
+and by Mode.get_out_of_spec_data (one vectorized pass over all conditions,
+buffered writes), plain and gzip compressed.
+
+Run from the project root folder:
+    python -m benchmarks.bench_out_of_spec [scale]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import contextlib
+import pandas as pd
+
+from benchmarks.bench_ingest import make_scaled_datafiles, RUN11_FOLDER
+from core.data_import.dv_station import TestStation
+from core.data_import.helpers import write_out_of_spec_to_file
+from core.limits_import.limits import Limits, get_limits_at_mode_temp_voltage
+
+DEFAULT_SCALE = 1000
+BOARDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+LIMITS_FILE = os.path.join('test files', 'limits files', 'P552_L2.htm')
+VOLTAGE_TOLERANCE = 0.02
+MEGABYTE = 1024**2
+
+
+class LegacyRotatingFile(object):
+    """ Out of spec file flushed and stat'ed after every block (legacy writer) """
+    def __init__(self, filepath, max_file_size=20000000):
+        self.filepath, self.max_file_size, self.ii = filepath, max_file_size, 1
+        self.fh = open(self.filepath + '_%0.2d.txt' % self.ii, 'a')
+
+    def write(self, header, df):
+        self.fh.write(header)
+        df.to_csv(self.fh, header=df.columns, index=True, sep='\t', mode='a')
+        self.fh.flush()
+        if os.stat(self.fh.name).st_size > self.max_file_size:
+            self.fh.close()
+            self.ii += 1
+            self.fh = open(self.filepath + '_%0.2d.txt' % self.ii, 'a')
+
+    def close(self):
+        self.fh.close()
+
+def legacy_out_of_spec(mode, output_folder):
+    """ Writes the out of spec rows of mode, refiltering each condition """
+    out_of_spec_file = LegacyRotatingFile(output_folder + mode.test.name + ' - out of spec')
+    for temp in mode.temps:
+        for voltage in mode.voltages:
+            limits = get_limits_at_mode_temp_voltage(mode.test.limits, mode, temp, voltage)
+            dframe = mode.condition_df(temp, voltage)
+            for columns, lower, upper, analysis_type in (
+                    (mode.voltage_senses, voltage - VOLTAGE_TOLERANCE, voltage + VOLTAGE_TOLERANCE,
+                     'Out of spec data rows - Vin'),
+                    (mode.systems, limits['LL'], limits['UL'], 'Out of spec data rows - Iin')):
+                outside = ((dframe[columns] < lower) | (dframe[columns] > upper)).any(axis=1)
+                if outside.any():
+                    out_of_spec_df = dframe[outside.values]
+                    out_of_spec_df = out_of_spec_df[~out_of_spec_df.index.duplicated(keep='first')]
+                    write_out_of_spec_to_file(out_of_spec_file, out_of_spec_df, mode,
+                                              temp, voltage, analysis_type)
+    out_of_spec_file.close()
+
+def folder_megabytes(folder):
+    return sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder)) / MEGABYTE
+
+def main(scale=DEFAULT_SCALE):
+    folder = tempfile.mkdtemp(prefix='bench_out_of_spec_')
+    try:
+        data_folder = os.path.join(folder, 'data')
+        os.makedirs(data_folder)
+        make_scaled_datafiles(RUN11_FOLDER, data_folder, scale)
+        limits = Limits(LIMITS_FILE)
+        with contextlib.redirect_stdout(io.StringIO()):
+            test = TestStation('bench', data_folder, BOARDS, limits, False, False, 5,
+                               VOLTAGE_TOLERANCE, 23, cache=False)
+        test.df.index = pd.date_range(test.df.index[0], periods=len(test.df), freq='S',
+                                      name=test.df.index.name)
+        for mode in test.modes:  # only conditions with limits
+            mode_limits = limits.lim.get(mode.name, {})
+            mode.voltages = [voltage for voltage in mode.voltages
+                             if all(voltage in mode_limits.get(temp, {}) for temp in mode.temps)]
+        print('Run11 scaled x{} ({} rows, {} modes)'.format(scale, len(test.df), len(test.modes)))
+        for label, write in (('legacy', legacy_out_of_spec),
+                             ('vectorized', lambda mode, output: mode.get_out_of_spec_data(output)),
+                             ('gzip', lambda mode, output: mode.get_out_of_spec_data(output, compress=True))):
+            output_folder = os.path.join(folder, label, '')
+            os.makedirs(output_folder)
+            start = time.perf_counter()
+            for mode in test.modes:
+                write(mode, output_folder)
+            print('\t{:<10} {:>8.3f} s  {:>8.2f} MB'.format(
+                  label, time.perf_counter() - start, folder_megabytes(output_folder)))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
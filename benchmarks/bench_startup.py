@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the GUI startup time. The GUI is launched in a child interpreter
+with 'python -X importtime' and timed until its main window is visible. The
+import log is checked for the heavy analysis packages, which must not be
+imported before the first analysis runs.
+
+The benchmark fails (exit code 1) if the window visible time is over budget or
+if an analysis package is imported at startup.
+
+Run from the project root folder:
+    python -m benchmarks.bench_startup [--runs N] [--budget SECONDS] [--onscreen]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+PROJECT_FOLDER = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+WINDOW_VISIBLE_BUDGET = 1.0  # seconds from launch until the main window is visible
+DEFAULT_RUNS = 5
+DEFERRED_PACKAGES = ('pandas', 'numpy', 'matplotlib', 'lxml', 'bs4')
+VISIBLE_MARKER = 'WINDOW VISIBLE AT'
+
+# launches the GUI module (without running its __main__ block) and reports when
+# the window is visible
+CHILD_CODE = '''
+import sys, time, importlib.util
+spec = importlib.util.spec_from_file_location('gui_main', '__main__.py')
+gui_main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gui_main)
+app = gui_main.QApplication(sys.argv[:1])
+window = gui_main.TestMainWindow()
+app.processEvents()
+assert window.isVisible()
+print('{marker}', repr(time.time()), flush=True)
+'''.format(marker=VISIBLE_MARKER)
+
+
+def launch_gui(onscreen=False):
+    """ Returns: (seconds until window visible, list of importtime log rows) """
+    env = dict(os.environ)
+    if not onscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    start = time.time()
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD_CODE],
+                           cwd=PROJECT_FOLDER, env=env, stdout=subprocess.PIPE,
+                           stderr=subprocess.PIPE, universal_newlines=True)
+    visible = [line for line in child.stdout.splitlines() if line.startswith(VISIBLE_MARKER)]
+    if child.returncode or not visible:
+        raise RuntimeError('GUI did not start:\n' + child.stderr[-2000:])
+    return float(visible[0].split()[-1]) - start, parse_importtime(child.stderr)
+
+def parse_importtime(log):
+    """ Returns: list of (cumulative microseconds, depth, module) of an importtime log """
+    rows = []
+    for line in log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+def main(runs=DEFAULT_RUNS, budget=WINDOW_VISIBLE_BUDGET, onscreen=False):
+    times, imports = [], []
+    for _ in range(runs):
+        seconds, imports = launch_gui(onscreen)
+        times.append(seconds)
+    median = statistics.median(times)
+
+    print('GUI startup ({} runs)'.format(runs))
+    print('  window visible:  {:.3f} s median, {:.3f} s best (budget {:.2f} s)'.format(
+        median, min(times), budget))
+    top_level = sorted([row for row in imports if row[1] == 0], reverse=True)
+    print('  imports:         {:.3f} s'.format(sum(row[0] for row in top_level) / 1e6))
+    for cumulative, _, name in top_level[:8]:
+        print('    {:>8.1f} ms  {}'.format(cumulative / 1000.0, name))
+
+    imported = sorted({name.split('.')[0] for _, _, name in imports} & set(DEFERRED_PACKAGES))
+    failures = []
+    if imported:
+        failures.append('analysis packages imported at startup: ' + ', '.join(imported))
+    if median > budget:
+        failures.append('window visible time is over budget')
+    for failure in failures:
+        print('FAILED:', failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='GUI startup time benchmark')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--budget', type=float, default=WINDOW_VISIBLE_BUDGET,
+                        help='window visible budget in seconds (default: %(default)s)')
+    parser.add_argument('--onscreen', action='store_true',
+                        help='show the window on the display (default: offscreen)')
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget, args.onscreen))
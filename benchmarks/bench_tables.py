@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the Tables analysis statistics. Synthetic modes with 12 systems
+at 6 voltages and 3 temperatures are analyzed the legacy way (min, max, mean,
+std and out of limit counts computed per series for every mode/temp/voltage/
+system cell) and with the single grouped pass of core.analysis.stats.
+
+Run from the project root folder:
+    python -m benchmarks.bench_tables
+"""
+
+import time
+import types
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from core.analysis.stats import mode_stats_table, index_stats
+from core.data_import.helpers import get_series_stats, count_num_out_of_spec, rounded_stats
+
+NUM_MODES = 6
+NUM_SYSTEMS = 12
+TEMPS = (-40, 23, 85)
+VOLTAGES = (9.0, 10.0, 12.0, 13.5, 14.0, 16.0)
+ROWS_PER_CONDITION = 2000
+LIMITS = (0.95, 1.05)
+
+
+def make_test_station():
+    """ Returns: test station stand-in with synthetic mode currents at each condition """
+    modes, lim = [], {}
+    for number in range(1, NUM_MODES+1):
+        board_id = 'B' + str(number)
+        systems = ['{} TP{}: System {}'.format(board_id, tp, tp) for tp in range(1, NUM_SYSTEMS+1)]
+        vsenses = [board_id + ' VSense1']
+        hist_dict = {}
+        for temp in TEMPS:
+            hist_dict[temp] = {}
+            for voltage in VOLTAGES:
+                dframe = pd.DataFrame(np.random.normal(1.0, 0.02, (ROWS_PER_CONDITION, NUM_SYSTEMS)),
+                                      columns=systems)
+                dframe[vsenses[0]] = np.random.normal(voltage, 0.1, ROWS_PER_CONDITION)
+                hist_dict[temp][voltage] = dframe
+        lim[board_id] = {temp: {voltage: LIMITS for voltage in VOLTAGES} for temp in TEMPS}
+        mode = types.SimpleNamespace(name=board_id, board_mode=board_id, temps=TEMPS,
+                                     voltages=list(VOLTAGES), hist_dict=hist_dict, systems=systems,
+                                     voltage_senses=vsenses, has_led_binning=False)
+        mode.condition_values = lambda column, temp, voltage, hist_dict=hist_dict: \
+                                    hist_dict[temp][voltage][column].values
+        mode.conditions_block = partial(conditions_block, hist_dict)
+        modes.append(mode)
+    test = types.SimpleNamespace(modes=modes, voltage_tolerance=0.5)
+    return test, types.SimpleNamespace(lim=lim)
+
+def conditions_block(hist_dict, columns, conditions):
+    """ Returns: Mode.conditions_block of a mode stand-in's hist_dict """
+    blocks = [hist_dict[temp][voltage] for temp, voltage in conditions]
+    positions = [list(blocks[0].columns).index(column) for column in columns]
+    return np.concatenate([block.values for block in blocks])[:, positions], \
+           [len(block) for block in blocks]
+
+def per_cell_stats(test, limits):
+    """ Legacy statistics: every cell's series is analyzed on its own """
+    cells = {}
+    for mode in test.modes:
+        for temp in mode.temps:
+            for voltage in mode.voltages:
+                dframe = mode.hist_dict[temp][voltage]
+                for vsense in mode.voltage_senses:
+                    series = dframe[vsense]
+                    cells[(mode.board_mode, temp, voltage, vsense)] = get_series_stats(series) + \
+                        count_num_out_of_spec(series, voltage - test.voltage_tolerance,
+                                              voltage + test.voltage_tolerance)[:2]
+                lower_limit, upper_limit = limits.lim[mode.name][temp][voltage]
+                for system in mode.systems:
+                    series = dframe[system]
+                    cells[(mode.board_mode, temp, voltage, system)] = get_series_stats(series) + \
+                        count_num_out_of_spec(series, lower_limit, upper_limit)[:2]
+    return cells
+
+def grouped_stats(test, limits):
+    stats = index_stats(mode_stats_table(test, limits, run_limit_analysis=True))
+    return {key: rounded_stats(row) + (row['count'], row['count_out'])
+            for key, row in stats.items()}
+
+def main():
+    test, limits = make_test_station()
+    num_cells = NUM_MODES * len(TEMPS) * len(VOLTAGES) * (NUM_SYSTEMS + 1)
+    print('Tables statistics of {} cells ({} rows each)'.format(num_cells, ROWS_PER_CONDITION))
+    start = time.perf_counter()
+    legacy = per_cell_stats(test, limits)
+    legacy_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    grouped = grouped_stats(test, limits)
+    grouped_seconds = time.perf_counter() - start
+    assert sorted(legacy) == sorted(grouped)
+    mismatches = sum(legacy[key] != grouped[key] for key in legacy)
+    print('\tper cell: {:.3f} s  grouped: {:.3f} s  ({:.0f}x)  rounded mismatches: {}'.format(
+          legacy_seconds, grouped_seconds, legacy_seconds / grouped_seconds, mismatches))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the mode row views. The 'test files/Run11' datafiles are scaled up
+(rows repeated) into a temporary folder and the test station is built in memory.
+The memory held by the modes (row positions into the test df, their condition
+indexes and multimode currents) is compared with the legacy layout, where each
+mode kept a copy of its rows and each hist_dict condition another copy.
+
+Run from the project root folder:
+    python -m benchmarks.bench_views [scale]
+"""
+
+import io
+import sys
+import shutil
+import tempfile
+import contextlib
+
+from benchmarks.bench_ingest import make_scaled_datafiles, RUN11_FOLDER
+from core.data_import.dv_station import TestStation
+
+DEFAULT_SCALE = 500
+BOARDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+TEMPS = (23, 25)
+MEGABYTE = 1024**2
+
+
+def view_bytes(mode):
+    """ Returns: bytes of the row positions, condition index and multimode currents of mode """
+    conditions = mode.conditions
+    arrays = [mode.positions, conditions.setpoint_codes, conditions.ambients]
+    arrays += list(conditions.positions.values())
+    if mode.multimode_currents is not None:
+        arrays.append(mode.multimode_currents)
+    return sum(array.nbytes for array in arrays)
+
+def copy_bytes(mode):
+    """ Returns: bytes of the legacy copies of mode (its df and each condition's df) """
+    total = mode.df.memory_usage(deep=True).sum()
+    for temp in mode.hist_dict:
+        for voltage in mode.hist_dict[temp]:
+            total += mode.condition_df(temp, voltage).memory_usage(deep=True).sum()
+    return total
+
+def main(scale=DEFAULT_SCALE):
+    folder = tempfile.mkdtemp(prefix='bench_views_')
+    try:
+        make_scaled_datafiles(RUN11_FOLDER, folder, scale)
+        with contextlib.redirect_stdout(io.StringIO()):
+            test = TestStation('bench', folder, BOARDS, None, False, False, 5, 0.5, *TEMPS)
+        df_megabytes = test.df.memory_usage(deep=True).sum() / MEGABYTE
+        print('Run11 scaled x{} ({} rows, test df {:.1f} MB, {} modes)'.format(
+              scale, len(test.df), df_megabytes, len(test.modes)))
+        views = sum(view_bytes(mode) for mode in test.modes) / MEGABYTE
+        copies = sum(copy_bytes(mode) for mode in test.modes) / MEGABYTE
+        print('\tcopies {:>8.1f} MB  views {:>8.1f} MB  ({:.0f}x less)'.format(
+              copies, views, copies / views))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of writing the Tables xml file. The 'test files/Run10allV' test is
+analyzed against the P552 limits (outage board included) and its tables are
+repeated for many analysis temperatures to make a large tables file. The file
+is written by the legacy writer (whole tree built, serialized into one string
+with etree.tostring, then written) and by create_xml_tables (blocks streamed
+through etree.xmlfile). Peak memory is traced with tracemalloc (the serialized
+string is traced, the libxml2 tree itself is not) and the two files are compared.
+
+Run from the project root folder:
+    python -m benchmarks.bench_xml_tables [temperatures]
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+import tracemalloc
+import contextlib
+
+from lxml import etree
+
+from core.data_import.dv_station import TestStation
+from core.limits_import.limits import Limits
+from core.analysis.stats import station_stats_table, index_stats
+from core.analysis.tables import create_xml_tables, time_element, profile_element, \
+                                 write_user_inputs
+
+DEFAULT_TEMPERATURES = 100
+DATA_FOLDER = os.path.join('test files', 'Run10allV')
+LIMITS_FILE = os.path.join('test files', 'limits files', 'P552_L2.htm')
+BOARDS = ['B1', 'B2', 'B3', 'B5', 'B6', 'B7']
+
+
+def legacy_create_xml_tables(test, run_limit_analysis, limits, output_folder):
+    """ Builds the whole tables tree, then writes it as one string (legacy writer) """
+    xml_root = etree.Element("test", name=test.name, header_width=str(len(test.systems)))
+    xml_root.append(time_element(test))
+    xml_root.append(profile_element(test))
+    stats = index_stats(station_stats_table(test, limits, run_limit_analysis))
+    for temp in test.temps:
+        xml_temp = etree.SubElement(xml_root, "temperature", temp=str(temp)+'C')
+        for mode in test.modes:
+            mode.get_system_by_system_mode_stats(xml_temp, temp, run_limit_analysis, limits, stats)
+        if test.outage:
+            test.outage.get_system_by_system_outage_stats(xml_temp, temp, run_limit_analysis, limits)
+    write_user_inputs(xml_root, test)
+    with open(output_folder + test.name + '.xml', 'w') as xml_file:
+        xml_file.write(r'<?xml version="1.0" encoding="UTF-8"?><?xml-stylesheet type="text/xsl" href="templates/data.xsl"?>')
+        xml_file.write(etree.tostring(xml_root, pretty_print=True, encoding='unicode'))
+
+def write_tables(write, test, limits, output_folder):
+    """ Returns: (seconds, peak MB) to write the tables file """
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        write(test, True, limits, output_folder)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return seconds, peak
+
+def main(temperatures=DEFAULT_TEMPERATURES):
+    folder = tempfile.mkdtemp(prefix='bench_xml_tables_')
+    try:
+        limits = Limits(LIMITS_FILE)
+        with contextlib.redirect_stdout(io.StringIO()):
+            test = TestStation('bench', DATA_FOLDER, BOARDS, limits, True, False, 5, 0.5, 23)
+        test.temps = [23] * temperatures  # the same tables repeated
+        outputs = []
+        for label, write in (('legacy', legacy_create_xml_tables),
+                             ('streamed', lambda *args: create_xml_tables(*args, open_browser=False))):
+            output_folder = os.path.join(folder, label, '')
+            os.makedirs(output_folder)
+            seconds, peak = write_tables(write, test, limits, output_folder)
+            outputs.append(output_folder + 'bench.xml')
+            print('\t{:<10} {:>8.3f} s  peak {:>8.1f} MB  {:>8.1f} MB file'.format(
+                  label, seconds, peak, os.path.getsize(outputs[-1]) / 1024**2))
+        print('\tidentical tables files:', filecmp.cmp(*outputs, shallow=False))
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""
+Headless command line interface of the test analysis. It runs the same
+analyses as the GUI without a display (figures are saved to files), so tests
+can be analyzed unattended, e.g. on a build server:
+
+    python cli.py "test files/Run11" --boards 1,2,3 --temps 23 --analyses Tables Plot
+    python cli.py --manifest tests.json --jobs 4
+
+A manifest is a JSON list of tests. Each test is an object with the same keys
+as the command line options (e.g. {"folder": "...", "boards": "1,2", "temps":
+"23,85", "limits": "..."}); keys that are left out take the command line values.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # render figures to files, no display needed
+
+from core.data_import.dv_station import TestStation, STREAMING_MEMORY_BUDGET
+from core.limits_import.limits import Limits
+from core.analysis.runner import run_analysis, check_analyses_limits, save_figures, ANALYSES
+from core.analysis.export import EXPORT_FORMATS
+from core.re_and_global import OUTPUT_FOLDER
+
+
+DEFAULT_TEMP_TOL = 5
+DEFAULT_VOLTAGE_TOL = 0.5
+DEFAULT_PCTG_TOL = 10
+DEFAULT_ANALYSES = ['Tables']
+DEFAULT_WORKERS = 1
+MANIFEST_ONLY_OPTIONS = ('manifest', 'jobs')
+
+
+def parse_boards(boards):
+    """ Returns: list of board ids (e.g. - ['B3', 'B4']) from '3, 4' or [3, 4] """
+    if isinstance(boards, str):
+        boards = boards.split(',')
+    return ['B' + re.sub('[^0-9]', '', str(board)) for board in boards if str(board).strip()]
+
+def parse_temps(temps):
+    """ Returns: list of int temperatures from '-40, 23, 85' or [-40, 23, 85] """
+    if isinstance(temps, str):
+        temps = temps.split(',')
+    return [int(temp) for temp in temps if str(temp).strip()]
+
+def test_name_of(job):
+    """ Returns: test name of a job (defaults to the data folder name) """
+    return job['name'] or os.path.basename(os.path.normpath(job['folder']))
+
+def analyze_test(job):
+    """ Runs the selected analyses of one test
+    Args:
+        job (dict): Options of the test (same keys as the command line options)
+    Returns:
+        name (string): Test name
+        error (string): Error message ('' if the analyses ran)
+    """
+    name = test_name_of(job)
+    try:
+        boards, temps = parse_boards(job['boards'] or []), parse_temps(job['temps'])
+        limits = Limits(job['limits']) if job['limits'] else None
+        run_limit_analysis = job['limit_analysis'] and limits is not None
+        output_folder = os.path.join(job['output'], '')
+        print('\nTest Name:', name)
+        print('Data Folder:', job['folder'])
+        test = TestStation(name, job['folder'], boards, limits, run_limit_analysis,
+                           job['multimode'], job['temperature_tolerance'],
+                           job['voltage_tolerance'], *temps,
+                           workers=job['workers'], cache=job['cache'],
+                           streaming_stats=job['streaming_stats'],
+                           memory_budget=job['memory_budget'], memmap=job['memmap'])
+        if not test.num_rows:
+            return name, test.error_msg.strip()
+        test.print_board_information()
+        check_analyses_limits(job['analyses'], test, limits, run_limit_analysis)  # before any output
+        os.makedirs(output_folder, exist_ok=True)
+        for analysis in job['analyses']:
+            run_analysis(analysis, test, limits, job['hists_by_tp'], job['percent_from_mean'],
+                         run_limit_analysis, output_folder, open_tables=False,
+                         compress_out_of_spec=job['gzip_out_of_spec'],
+                         export_formats=job['export_stats'])
+        for filepath in save_figures(name, output_folder):
+            print('\tSaved', filepath)
+    except Exception as e:
+        return name, '{}: {}'.format(e.__class__.__name__, e)
+    return name, ''
+
+def load_manifest(filepath, defaults):
+    """ Returns: list of jobs (dicts of options) in a JSON manifest of tests """
+    with open(filepath) as manifest:
+        entries = json.load(manifest)
+    jobs = []
+    for i, entry in enumerate(entries):
+        unknown = set(entry) - set(defaults)
+        if unknown or 'folder' not in entry:
+            raise ValueError('Manifest test #' + str(i+1) + ' must have a "folder" and ' + \
+                             'no unknown keys (' + ', '.join(sorted(unknown)) + ')')
+        jobs.append(dict(defaults, **entry))
+    return jobs
+
+def set_job_workers(jobs, workers=None, parallel=False):
+    """ Sets the datafile reading processes of the jobs that do not set their own
+    Args:
+        jobs (list): Jobs (dicts of options), whose 'workers' is None if not set
+        workers (int): --workers option (None if not given)
+        parallel (bool): Jobs run in parallel processes. Their datafiles are then
+                         read in 1 process, and a --workers option is replaced
+    """
+    if parallel and workers not in (None, DEFAULT_WORKERS):
+        print('Warning: --workers', workers, 'is replaced by', DEFAULT_WORKERS, 'since the ' + \
+              'tests already run in parallel processes (set "workers" of a test in the ' + \
+              'manifest to read its datafiles in parallel)')
+    for job in jobs:
+        if job['workers'] is None:
+            job['workers'] = DEFAULT_WORKERS if parallel or workers is None else workers
+
+def run_jobs(jobs, max_workers=1):
+    """ Analyzes tests, concurrently in max_workers processes
+    Returns: list of (test name, error message) in job order """
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [analyze_test(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        return list(executor.map(analyze_test, jobs))
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Automotive Testing Data Analysis (headless)')
+    parser.add_argument('folder', nargs='?', help='folder containing the raw datafiles of a test')
+    parser.add_argument('--manifest', help='JSON list of tests to analyze (instead of folder)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of tests of a manifest analyzed at once (default: %(default)s)')
+    parser.add_argument('-n', '--name', default='', help='test name (default: folder name)')
+    parser.add_argument('-b', '--boards', default='',
+                        help='boards separated by commas, e.g. "3, 4, 5" (default: all boards)')
+    parser.add_argument('-t', '--temps', default='',
+                        help='temperatures separated by commas, e.g. "-40, 23, 85"')
+    parser.add_argument('-l', '--limits', default='', help='limits file')
+    parser.add_argument('-a', '--analyses', nargs='+', choices=ANALYSES, default=DEFAULT_ANALYSES,
+                        help='analyses to run (default: Tables)')
+    parser.add_argument('--multimode', action='store_true', help='analyze multimode combinations')
+    parser.add_argument('--limit-analysis', action='store_true',
+                        help='compare currents to the limits file')
+    parser.add_argument('--hists-by-tp', action='store_true',
+                        help='create histograms for each test position system')
+    parser.add_argument('--temperature-tolerance', type=float, default=DEFAULT_TEMP_TOL,
+                        help='temperature tolerance in C (default: %(default)s)')
+    parser.add_argument('--voltage-tolerance', type=float, default=DEFAULT_VOLTAGE_TOL,
+                        help='voltage tolerance in V (default: %(default)s)')
+    parser.add_argument('--percent-from-mean', type=int, default=DEFAULT_PCTG_TOL,
+                        help='histogram percent from mean lines (default: %(default)s)')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='processes used to read the raw datafiles of a test (default: ' + \
+                             str(DEFAULT_WORKERS) + '; tests of a manifest analyzed at once ' + \
+                             'read their datafiles in 1 process unless the manifest sets "workers")')
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='do not cache parsed datafiles in a sidecar folder of the data folder')
+    parser.add_argument('--streaming-stats', action='store_true',
+                        help='accumulate the table statistics from the datafile chunks as they ' \
+                             'are read, instead of keeping the data in memory (long tests, ' \
+                             'read out-of-core with a ' + str(STREAMING_MEMORY_BUDGET) + \
+                             ' MB memory budget unless --memory-budget is set)')
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help='read the test out-of-core: datafiles are read in chunks and the ' \
+                             'data of each mode is spilled to temporary files, keeping about ' \
+                             'MB megabytes of data in memory (implies --streaming-stats)')
+    parser.add_argument('--memmap', action='store_true',
+                        help='keep the datafile rows as memory mapped column files in a sidecar ' \
+                             'folder of the data folder (plots of tests read out-of-core)')
+    parser.add_argument('--gzip-out-of-spec', action='store_true',
+                        help='gzip compress the out of spec files')
+    parser.add_argument('--export-stats', nargs='+', choices=EXPORT_FORMATS, default=[],
+                        metavar='FORMAT',
+                        help='also export the Tables stats as a tidy dataset in these ' \
+                             'formats (%(choices)s)')
+    parser.add_argument('-o', '--output', default=OUTPUT_FOLDER,
+                        help='folder tables, figures and out of spec files are written to ' \
+                             '(default: %(default)s)')
+    args = parser.parse_args(argv)
+    if bool(args.folder) == bool(args.manifest):
+        parser.error('give either a data folder or a --manifest')
+    if args.folder and not args.temps:
+        parser.error('--temps is required')
+    return args
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    options = {key: value for key, value in vars(args).items()
+               if key not in MANIFEST_ONLY_OPTIONS}
+    if args.manifest:
+        jobs = load_manifest(args.manifest, dict(options, workers=None))  # None: not set by the test
+    else:
+        jobs = [options]
+    set_job_workers(jobs, args.workers, parallel=args.jobs > 1 and len(jobs) > 1)
+    results = run_jobs(jobs, args.jobs)
+    failed = [(name, error) for name, error in results if error]
+    print('\n\n ==> Analyzed', len(results) - len(failed), 'of', len(results), 'test(s).')
+    for name, error in failed:
+        print('\tFailed:', name, '-', error)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
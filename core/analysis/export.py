@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+
+''' This module exports the stats of the Tables analysis as a tidy columnar
+dataset (one row per test/temp/mode/voltage/system) in CSV, Parquet or JSON
+Lines files, so the stats of many tests can be aggregated without parsing the
+xml tables. Each file is written in bulk from the stats table computed for
+the xml tables (see core.analysis.stats). Outage board and multimode ratio
+tables are only in the xml tables. '''
+
+import numpy as np
+
+
+EXPORT_FORMATS = ('csv', 'parquet', 'jsonl')
+EXPORT_COLUMNS = ['test', 'temp', 'mode', 'board_mode', 'voltage', 'kind', 'system',
+                  'lower_limit', 'upper_limit', 'min', 'max', 'mean', 'std', 'count',
+                  'count_out', 'percent_out', 'check']
+DECIMAL_PLACES = 3  # rounding of the stats compared to the limits (as in the xml tables)
+
+
+def export_stats_table(test, stats):
+    ''' Returns the stats table of a test in the layout of the exported files
+    Args:
+        test (TestStation object): Test the stats were computed for
+        stats (dataframe): Stats table of test (see core.analysis.stats.STATS_COLUMNS)
+    Returns:
+        export (dataframe): One row per temp/mode/voltage condition and system
+                            current or vsense (see EXPORT_COLUMNS). percent_out
+                            is the percentage of readings outside the limits and
+                            check is 'G', 'Out of Spec' or 'NA' (no limits).
+    '''
+    export = stats.copy()
+    export.insert(0, 'test', test.name)
+    count, count_out = export['count'].values, export['count_out'].values
+    with np.errstate(invalid='ignore', divide='ignore'):
+        export['percent_out'] = np.where(count > 0, np.round(count_out / count, 4) * 100, 0.0)
+    has_limits = export['lower_limit'].notnull() & export['upper_limit'].notnull()
+    out_of_spec = (export['min'].round(DECIMAL_PLACES) < export['lower_limit']) | \
+                  (export['max'].round(DECIMAL_PLACES) > export['upper_limit'])
+    export['check'] = np.where(has_limits, np.where(out_of_spec, 'Out of Spec', 'G'), 'NA')
+    return export[EXPORT_COLUMNS].reset_index(drop=True)
+
+
+def export_stats_filepath(output_folder, test_name, export_format):
+    ''' Returns: path of the exported stats file (e.g. - '!output/Run11_stats.csv') '''
+    return output_folder + test_name + '_stats.' + export_format
+
+
+def write_stats(export, filepath, export_format):
+    ''' Writes an exported stats table to filepath in one of EXPORT_FORMATS '''
+    if export_format == 'csv':
+        export.to_csv(filepath, index=False)
+    elif export_format == 'parquet':
+        export.to_parquet(filepath)
+    elif export_format == 'jsonl':
+        export.to_json(filepath, orient='records', lines=True, double_precision=15)
+    else:
+        raise ValueError('Unknown stats export format: ' + str(export_format))
+
+
+def export_stats(test, stats, output_folder, export_formats):
+    ''' Writes the stats table of test to a file in each of export_formats
+    Returns:
+        filepaths (list): Paths of the files written
+    '''
+    export, filepaths = export_stats_table(test, stats), []
+    for export_format in export_formats:
+        filepath = export_stats_filepath(output_folder, test.name, export_format)
+        try:
+            write_stats(export, filepath, export_format)
+        except ImportError as e:
+            print('\tCould not export', filepath, '- Parquet support is not installed -', e)
+            continue
+        filepaths.append(filepath)
+    return filepaths
@@ -48,9 +48,8 @@ def histogram_of_each_system(test, mode, temp, limits=None, percent_from_mean=10
         nrows, ncols = make_subplot_layout(num_subplots)
         i = 1
         for system in mode.systems:
-            filtered_df = filter_temp_and_voltage(mode.df[[mode.test.ambient, mode.VSETPOINT, system]],
-                                                  mode.test.ambient, temp, voltage, mode.test.temperature_tolerance)
-            current_data = pd.to_numeric(filtered_df[system], downcast='float')
+            series = mode.condition_series(system, temp, voltage)
+            current_data = pd.to_numeric(series, downcast='float')
             avg = current_data.mean()
             sigma = current_data.std()
             minus_ten = round(avg*(1-(percent_from_mean/100.0)), 3)
@@ -109,7 +108,7 @@ def histogram_of_mode_with_binning(test, mode, temp, limits, led_bin, percent_fr
 
     i = 1
     for voltage in mode.voltages: # make subplot for each voltage
-        dframe = mode.hist_dict[temp][voltage]
+        dframe = mode.condition_df(temp, voltage)
         current_data = mode.strip_index_and_melt_to_series_for_binning(dframe, led_bin) ## put all system currents in single series
         avg = current_data.mean()
         sigma = current_data.std()
@@ -162,7 +161,7 @@ def histogram_of_mode_no_binning(test, mode, temp, limits, percent_from_mean):
     for voltage in mode.voltages: # make subplot for each voltage
         if voltage not in mode.hist_dict[temp]:
             continue
-        dframe = mode.hist_dict[temp][voltage]
+        dframe = mode.condition_df(temp, voltage)
         current_data = mode.strip_index_and_melt_to_series(dframe) ## put all system currents in single series
         avg = current_data.mean()
         sigma = current_data.std()
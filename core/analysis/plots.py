@@ -31,18 +31,19 @@ def set_up_plot_area(test, pstyle='ggplot'):
     fig.suptitle(test.name, fontsize = 20, fontweight= 'bold')  # main title
     return fig, axes
 
-def plot_voltage_functional_cycle(test, ax):
-    ax.plot_date(test.df.index.to_pydatetime(), test.df[test.VSETPOINT], 'k--', 
+def plot_voltage_functional_cycle(test, ax, start=None, end=None):
+    vsenses = [vsense for vsense in test.voltage_senses \
+               if any(board_id in vsense for board_id in test.board_ids)]
+    dframe = test.scan_data([test.VSETPOINT] + vsenses, start, end)
+    ax.plot_date(dframe.index.to_pydatetime(), dframe[test.VSETPOINT].astype(float), 'k--', 
                  linewidth=3, zorder=10)  # plot voltage setpoint on first subplot
     cmap = plt.get_cmap('viridis')
     colors = cmap(np.linspace(0, 1.0, len(test.thermocouples))) 
-    vsenses = [vsense for vsense in test.voltage_senses \
-               if any(board_id in vsense for board_id in test.board_ids)]
     vsense_labels = [replace_board_id_with_board_name(vsense, test.boards) \
                      for vsense in vsenses]
     vsetpoint_vsense_labels = ['Vsetpoint'] + vsense_labels  # adds Vsetpoint label to legend
     for vsense, color in zip(vsenses, colors):
-        test.df[vsense].plot(ax=ax, linewidth=2, c=color)
+        dframe[vsense].plot(ax=ax, linewidth=2, c=color)
     ax.set_title("Voltage and Functional Cycle")
     ax.set_ylabel("Voltage (V)")
     ax.set_ylim([0,20])
@@ -51,26 +52,28 @@ def plot_voltage_functional_cycle(test, ax):
     ax.legend(fontsize=8, loc='center left', bbox_to_anchor=(1.0, 0.5),
               ncol=ncol, labels=vsetpoint_vsense_labels)
 
-def plot_temperature_cycle(test, ax):
+def plot_temperature_cycle(test, ax, start=None, end=None):
     cmap = plt.get_cmap('viridis')
     colors = cmap(np.linspace(0, 1.0, len(test.thermocouples)))    
+    dframe = test.scan_data(test.thermocouples, start, end)
     for thermocouple, color in zip(test.thermocouples, colors):
-        test.df[thermocouple].plot(ax=ax, linewidth=2, c=color)
+        dframe[thermocouple].plot(ax=ax, linewidth=2, c=color)
     ax.set_title("Temperature Profile")
     ax.set_ylabel(u"Temp (\N{DEGREE SIGN}C)")
     ncol = determine_legend_ncols(test.thermocouples)
     ax.legend(fontsize=8, loc='center left', bbox_to_anchor=(1.0, 0.5),
               labels=test.thermocouples, ncol=ncol)
 
-def plot_mode_currents(test, axes, row=2):
+def plot_mode_currents(test, axes, row=2, start=None, end=None):
     # start on third row subplot
     for mode in test.modes:
         axes[row].set_title(mode.name)
         axes[row].set_ylabel("Current (A)")
         cmap = plt.get_cmap('jet')
         colors = cmap(np.linspace(0, 1.0, len(mode.systems)))
+        dframe = mode.time_range_df(start, end)  # built from the mode's rows of the test df once
         for system, color in zip(mode.systems, colors):
-            axes[row].scatter(mode.df.index, mode.df[system], 
+            axes[row].scatter(dframe.index, dframe[system], 
                               c=color, alpha=0.7)
         axes[row].yaxis.set_major_locator(ticker.MaxNLocator(5))
         ncol = determine_legend_ncols(mode.systems)
@@ -78,14 +81,15 @@ def plot_mode_currents(test, axes, row=2):
                          ncol=ncol, labels = [sys.split(' ', 1)[1] for sys in mode.systems])
         row +=1
 
-def plot_outage_voltages(test, axes):
+def plot_outage_voltages(test, axes, start=None, end=None):
     row = len(test.modes) + 2
     axes[row].set_title(test.outage.name)
     axes[row].set_ylabel("Voltage (V)")
     cmap = plt.get_cmap('jet')
     colors = cmap(np.linspace(0, 1.0, len(test.outage.systems)))
+    dframe = test.scan_data(test.outage.systems, start, end)
     for system, color in zip(test.outage.systems, colors):
-        axes[row].scatter(test.df.index, test.df[system], 
+        axes[row].scatter(dframe.index, dframe[system], 
                           c=color, alpha=0.7)
     axes[row].yaxis.set_major_locator(ticker.MaxNLocator(5))
     ncol = determine_legend_ncols(test.outage.systems)
@@ -98,21 +102,22 @@ def set_figure_size_and_name(fig):
     fig.canvas.set_window_title('temporal plot')
 
 def print_status(function):
-    def wrapper(*args):
+    def wrapper(*args, **kwargs):
         print('\nPlotting temporal plot...')
-        function(*args)
+        function(*args, **kwargs)
         print('...complete.')
     return wrapper
 
 
 # MAIN PLOTTING FUNCTION 
 @print_status
-def plot_modes(test, limits=None):
-    ''' Creates a temporal plot of the functional cycle, temperature profile, and test mode currents '''
+def plot_modes(test, limits=None, start=None, end=None):
+    ''' Creates a temporal plot of the functional cycle, temperature profile, and test mode currents
+        (of the scans from start to end timestamps if given, e.g. - '2018-02-26 10:46') '''
     fig, axes = set_up_plot_area(test)  # set up figure and axes for plotting 
-    plot_voltage_functional_cycle(test, ax=axes[0])  # subplot 1: voltage and functional cycle
-    plot_temperature_cycle(test, ax=axes[1])  # subplot 2: temperatures
-    plot_mode_currents(test, axes)  # subplots 3 and up: mode currents
+    plot_voltage_functional_cycle(test, axes[0], start, end)  # subplot 1: voltage and functional cycle
+    plot_temperature_cycle(test, axes[1], start, end)  # subplot 2: temperatures
+    plot_mode_currents(test, axes, start=start, end=end)  # subplots 3 and up: mode currents
     if test.outage:
-        plot_outage_voltages(test, axes) # last subplot
+        plot_outage_voltages(test, axes, start, end) # last subplot
     set_figure_size_and_name(fig) # set fig size and name
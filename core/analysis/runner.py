@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+''' This module runs the analysis tools selected by the user on a test station.
+It is shared by the GUI and the headless command line interface. The plotting
+and table modules (matplotlib, lxml) are only imported by the first analysis
+that needs them, so importing this module keeps program startup fast. '''
+
+import os
+import re
+
+from core.re_and_global import OUTPUT_FOLDER
+
+
+ANALYSES = ['Plot', 'Histograms', 'Tables', 'Out of Spec']
+FIGURE_FORMAT = 'png'
+LIMIT_ANALYSES = ['Histograms', 'Tables']  # use the current limits if run_limit_analysis
+
+
+def run_analysis(analysis_name, test, limits, hists_by_tp, percent_from_mean,
+                 run_limit_analysis, output_folder=OUTPUT_FOLDER, open_tables=True,
+                 compress_out_of_spec=False, export_formats=()):
+    ''' Runs one analysis tool (one of ANALYSES) on input test. Plots and
+        histograms are drawn on new pyplot figures (see save_figures). Out of
+        spec files are gzip compressed if compress_out_of_spec. The Tables stats
+        are also exported in each of export_formats (e.g. - ['csv', 'parquet']).
+        The limits of the selected analyses are checked once before the first
+        one runs (see check_analyses_limits). '''
+    if analysis_name == 'Plot':
+        if getattr(test, 'partitions', None) is not None and getattr(test, 'store', None) is None:
+            print('\nTemporal plots are not available for tests read out-of-core ' \
+                  '(memory budget) without a memmap store, skipping.')
+            return
+        from core.analysis.plots import plot_modes
+        plot_modes(test)
+    elif analysis_name == 'Histograms':
+        from core.analysis.histograms import make_mode_histograms
+        make_mode_histograms(test, system_by_system=hists_by_tp, limits=limits, percent_from_mean=percent_from_mean)
+    elif analysis_name == 'Tables':
+        from core.analysis.tables import create_xml_tables
+        create_xml_tables(test, run_limit_analysis, limits, output_folder, open_browser=open_tables,
+                          export_formats=export_formats)
+    elif analysis_name == 'Out of Spec':
+        print('\nCreating out of spec raw data text file(s)...')
+        if limits:
+            for mode in test.modes:
+                mode.get_out_of_spec_data(output_folder, compress_out_of_spec)
+            print('...complete.')
+        else:
+            print('...limits were not provided. Raw out of spec ' \
+                  'file(s) cannot be created without limits.')
+    else:
+        print('Analysis tool not found')
+
+
+def check_analyses_limits(analysis_names, test, limits, run_limit_analysis):
+    ''' Checks that the limits used by the selected analyses exist for every
+        temp/voltage condition of test (and the outage board for the tables),
+        before any of them runs and writes output. A single LimitNotFoundError
+        lists every missing limit. Analyses that do not use the limits are not
+        checked. '''
+    if not limits:
+        return
+    limit_analyses = [analysis_name for analysis_name in analysis_names
+                      if analysis_name == 'Out of Spec' or
+                         (run_limit_analysis and analysis_name in LIMIT_ANALYSES)]
+    if limit_analyses:
+        from core.limits_import.limits import check_limits
+        outage = test.outage if 'Tables' in limit_analyses else None
+        check_limits(limits, test.modes, outage or None)
+
+
+def save_figures(test_name, output_folder=OUTPUT_FOLDER, fmt=FIGURE_FORMAT):
+    ''' Saves every open pyplot figure to output_folder (named after the test
+        and the figure title) and closes it. Returns list of saved file paths. '''
+    import matplotlib.pyplot as plt
+    filepaths = []
+    for number in plt.get_fignums():
+        fig = plt.figure(number)
+        title = fig._suptitle.get_text() if fig._suptitle else 'figure ' + str(number)
+        if not title.startswith(test_name):
+            title = test_name + ' ' + title
+        title = re.sub(r'[\\/:*?"<>|\s]+', ' ', title).strip()  # valid filename
+        filepath = os.path.join(output_folder, title + ' (' + str(number) + ').' + fmt)
+        fig.set_size_inches(16, 9)
+        fig.savefig(filepath, format=fmt)
+        plt.close(fig)
+        filepaths.append(filepath)
+    return filepaths
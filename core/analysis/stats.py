@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+
+''' This module computes the statistics of the Tables analysis. Every
+(mode, temp, voltage, system) aggregate of a test - count, min, max, mean,
+std and the count outside the lower/upper limits - is computed in a single
+grouped pass over the mode data, and returned as a tidy stats table (one row
+per condition and column). The xml table writer only formats the table.
+
+For very long tests the same table can be produced by StreamingStats, which
+keeps compact per condition accumulators (count, min, max, Welford mean/M2,
+out of limit count) updated chunk by chunk as the data is read. '''
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from core.data_import.helpers import reading_range, reading_values
+from core.limits_import.limits import get_system_limits
+from core.exceptions.custom_exceptions import LimitNotFoundError
+
+
+KEY_COLUMNS = ['board_mode', 'temp', 'voltage', 'system']
+STATS_COLUMNS = ['mode', 'board_mode', 'temp', 'voltage', 'kind', 'system', 'lower_limit',
+                 'upper_limit', 'count', 'min', 'max', 'mean', 'std', 'count_out']
+CURRENT = 'current'
+VSENSE = 'vsense'
+
+
+def mode_stats_table(test, limits=None, run_limit_analysis=False, modes=None):
+    ''' Computes the stats of every mode/temp/voltage condition with data in one pass
+    Args:
+        test (TestStation object): Test to be analyzed
+        limits (Limits object): Current limits (used if run_limit_analysis)
+        run_limit_analysis (boolean): Count currents outside of the current limits
+        modes (list of Mode objects): Modes to analyze (default: every mode of test)
+    Returns:
+        stats (dataframe): One row per mode/temp/voltage condition and system
+                           current or vsense column (see STATS_COLUMNS). The
+                           limits of vsenses are voltage +/- voltage tolerance;
+                           currents have NaN limits without limit analysis.
+    '''
+    modes = test.modes if modes is None else modes
+    keys, aggregates = [], []
+    for mode in modes:
+        conditions = [(temp, voltage) for temp in mode.temps for voltage in mode.voltages
+                      if temp in mode.hist_dict and voltage in mode.hist_dict[temp]]
+        if not conditions:
+            continue
+        mode_keys = sum(mode_condition_keys(test, mode, conditions, limits, run_limit_analysis), [])
+        keys.extend(mode_keys)
+        aggregates.append(mode_aggregates(mode, conditions, mode_keys))
+    if not keys:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+    table = pd.DataFrame(keys, columns=STATS_COLUMNS[:8])
+    for stat, values in zip(STATS_COLUMNS[8:], zip(*aggregates)):
+        table[stat] = np.concatenate(values)
+    return table
+
+def mode_aggregates(mode, conditions, keys):
+    ''' Returns: (count, min, max, mean, std, count_out) arrays of the stats rows
+        keys of a mode at conditions (in keys order: conditions x vsenses then
+        system currents). The rows x columns block of the mode's conditions is
+        grouped once by condition; the limits of each condition are broadcast over
+        its rows to count the readings outside them. '''
+    columns = list(mode.voltage_senses) + list(mode.systems)
+    limits = np.array([key[6:8] for key in keys], dtype=float).reshape(len(conditions), len(columns), 2)
+    values, outs = [], []
+    for first, last in ((0, len(mode.voltage_senses)), (len(mode.voltage_senses), len(columns))):
+        block, counts = mode.conditions_block(columns[first:last], conditions)
+        rows_condition = np.repeat(np.arange(len(conditions)), counts)
+        outs.append(outside_limits(block, limits[rows_condition, first:last, 0],
+                                   limits[rows_condition, first:last, 1]))
+        values.append(reading_values(block))  # vsenses and currents can differ in dtype
+    counts = np.array(counts, dtype=np.int64)
+    count_out = np.zeros((len(conditions), len(columns)), dtype=np.int64)
+    with_rows = counts > 0
+    if with_rows.any():  # the rows of each condition are contiguous
+        count_out[with_rows] = np.add.reduceat(np.hstack(outs), (np.cumsum(counts) - counts)[with_rows],
+                                               axis=0, dtype=np.int64)
+    grouped = pd.DataFrame(np.hstack(values)).groupby(rows_condition)
+    every_condition = np.arange(len(conditions))
+    stats = [grouped.count().reindex(every_condition, fill_value=0)] + \
+            [stat.reindex(every_condition) for stat in (grouped.min(), grouped.max(),
+                                                        grouped.mean(), grouped.std())]
+    stats = [stat.values.ravel() for stat in stats]
+    return [stats[0].astype(np.int64)] + stats[1:] + [count_out.ravel()]
+
+def outside_limits(values, lower_limit, upper_limit):
+    ''' Returns: boolean array of values outside the limits. The limits are
+        compared at the precision of values, so a float32 reading equal to a
+        limit (e.g. - 1.2) is within it. '''
+    dtype = values.dtype if values.dtype.kind == 'f' else np.float64
+    lower_limit, upper_limit = np.array([lower_limit, upper_limit], dtype=dtype)
+    return (values < lower_limit) | (values > upper_limit)
+
+def station_stats_table(test, limits=None, run_limit_analysis=False):
+    ''' Returns: stats table of test (from its streaming stats if the test keeps
+        them for the same limit analysis, otherwise computed from the mode data) '''
+    streaming_stats = getattr(test, 'stats', None)
+    if streaming_stats is not None and streaming_stats.analyzes(limits, run_limit_analysis):
+        return streaming_stats.table()
+    return mode_stats_table(test, limits, run_limit_analysis)
+
+def condition_keys(test, mode, temp, voltage, limits=None, run_limit_analysis=False):
+    ''' Returns: list of the key/limit columns of the stats rows of a mode at
+        temp/voltage condition (vsenses first, then system currents) '''
+    return mode_condition_keys(test, mode, [(temp, voltage)], limits, run_limit_analysis)[0]
+
+def mode_condition_keys(test, mode, conditions, limits=None, run_limit_analysis=False):
+    ''' Returns: list of the condition_keys of each (temp, voltage) of conditions.
+        The current limits of every condition of the mode are looked up at once. '''
+    if limits and run_limit_analysis and conditions:
+        temps, voltages = np.array(conditions, dtype=float).T
+        lower_limits, upper_limits = get_system_limits(limits, mode, temps, voltages)
+    else:
+        lower_limits = upper_limits = np.full((len(conditions), len(mode.systems)), np.nan)
+    condition_keys = []
+    for (temp, voltage), lower, upper in zip(conditions, lower_limits.tolist(), upper_limits.tolist()):
+        keys = [(mode.name, mode.board_mode, temp, voltage, VSENSE, vsense,
+                 voltage - test.voltage_tolerance, voltage + test.voltage_tolerance)
+                for vsense in mode.voltage_senses]
+        keys.extend((mode.name, mode.board_mode, temp, voltage, CURRENT, system,
+                     lower_limit, upper_limit)
+                    for system, lower_limit, upper_limit in zip(mode.systems, lower, upper))
+        condition_keys.append(keys)
+    return condition_keys
+
+def index_stats(stats):
+    ''' Returns: dict of (board_mode, temp, voltage, system) -> stats row (dict),
+        for looking up single conditions while writing tables '''
+    return {tuple(row[key] for key in KEY_COLUMNS): row
+            for row in stats.to_dict('records')}
+
+
+class StreamingStats(object):
+    '''
+    Streaming accumulators of the stats table (see mode_stats_table). Rows are
+    added chunk by chunk; a chunk's stats are computed in two passes (same as
+    pandas) and merged into the accumulators with the parallel Welford update,
+    so a condition read in a single chunk gives exactly the pandas results.
+
+    Attributes:
+        limits => current limits used for the out of limit counts
+        run_limit_analysis => count currents outside of the current limits
+        keys => key/limit columns of each accumulator (STATS_COLUMNS[:8])
+        count, min, max, mean, m2, count_out => accumulators (numpy arrays)
+
+    Essential methods:
+        update => accumulate the rows of a mode at a temp/voltage condition
+        table => stats table of the accumulated rows
+    '''
+
+    def __init__(self, limits=None, run_limit_analysis=False):
+        self.limits = limits
+        self.run_limit_analysis = bool(run_limit_analysis and limits)
+        self.keys = []
+        self.codes = {}  # (board_mode, temp, voltage, system) -> accumulator position
+        self.count = np.zeros(0, dtype=np.int64)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)  # sum of squared differences from the mean
+        self.count_out = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def analyzes(self, limits, run_limit_analysis):
+        ''' Returns: True if the out of limit counts are for input limit analysis '''
+        return self.run_limit_analysis == bool(run_limit_analysis and limits) and \
+               (not self.run_limit_analysis or limits is self.limits)
+
+    def update(self, test, mode, temp, voltage, dframe, rows=None):
+        ''' Accumulates the rows of mode at temp/voltage condition
+        Args:
+            test (TestStation object): Test of mode
+            mode (Mode object): Mode of rows
+            temp (int): Temperature condition of rows
+            voltage (float): Voltage condition of rows
+            dframe (dataframe): Rows of mode (with multimode columns), e.g. - of
+                                a chunk of a datafile
+            rows (numpy array): Positions of the condition rows in dframe
+                                (default: every row of dframe)
+        Returns:
+            None
+        '''
+        try:
+            keys = condition_keys(test, mode, temp, voltage, self.limits, self.run_limit_analysis)
+        except LimitNotFoundError:  # every missing limit is reported before the tables (check_limits)
+            keys = condition_keys(test, mode, temp, voltage)
+        columns = [dframe[key[5]].values if rows is None else dframe[key[5]].values[rows]
+                   for key in keys]
+        block = np.array([reading_values(values) for values in columns])  # one row per column
+        if not block.shape[1]:
+            return
+        codes = self.__codes(keys)
+        count_out = np.array([outside_limits(values, *key[6:8]).sum()
+                              for values, key in zip(columns, keys)], dtype=np.int64)
+        valid = ~np.isnan(block)
+        count = valid.sum(axis=1)
+        minimum, maximum = np.array([reading_range(values) for values in columns], dtype=float).T
+        with warnings.catch_warnings():  # columns without readings stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.where(count > 0, np.where(valid, block, 0.0).sum(axis=1) / count, 0.0)
+        m2 = np.where(valid, (block - mean[:, np.newaxis])**2, 0.0).sum(axis=1)
+        self.__merge(codes, count, minimum, maximum, mean, m2, count_out)
+
+    def __codes(self, keys):
+        ''' Returns: accumulator positions of keys (new accumulators are added) '''
+        codes = []
+        for key in keys:
+            code = self.codes.setdefault((key[1], key[2], key[3], key[5]), len(self.keys))
+            if code == len(self.keys):
+                self.keys.append(key)
+            codes.append(code)
+        new = len(self.keys) - len(self.count)
+        if new:
+            self.count = np.concatenate([self.count, np.zeros(new, dtype=np.int64)])
+            self.min = np.concatenate([self.min, np.full(new, np.nan)])
+            self.max = np.concatenate([self.max, np.full(new, np.nan)])
+            self.mean = np.concatenate([self.mean, np.zeros(new)])
+            self.m2 = np.concatenate([self.m2, np.zeros(new)])
+            self.count_out = np.concatenate([self.count_out, np.zeros(new, dtype=np.int64)])
+        return np.array(codes, dtype=np.int64)
+
+    def __merge(self, codes, count, minimum, maximum, mean, m2, count_out):
+        ''' Merges the stats of a chunk into the accumulators (parallel Welford) '''
+        total = self.count[codes] + count
+        delta = mean - self.mean[codes]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, count / total, 0.0)
+        self.mean[codes] = self.mean[codes] + delta * weight
+        self.m2[codes] = self.m2[codes] + m2 + delta**2 * self.count[codes] * weight
+        self.min[codes] = np.fmin(self.min[codes], minimum)
+        self.max[codes] = np.fmax(self.max[codes], maximum)
+        self.count[codes] = total
+        self.count_out[codes] = self.count_out[codes] + count_out
+
+    def table(self):
+        ''' Returns: stats table of the accumulated rows (see mode_stats_table) '''
+        if not self.keys:
+            return pd.DataFrame(columns=STATS_COLUMNS)
+        table = pd.DataFrame(self.keys, columns=STATS_COLUMNS[:8])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table['count'] = self.count
+            table['min'], table['max'] = self.min, self.max
+            table['mean'] = np.where(self.count > 0, self.mean, np.nan)
+            table['std'] = np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+        table['count_out'] = self.count_out
+        return table[STATS_COLUMNS]
@@ -11,51 +11,117 @@ import webbrowser
 from core.data_import.mode import *
 from core.data_import.board import *
 from core.re_and_global import *
+from core.analysis.stats import station_stats_table, index_stats
+from core.analysis.export import export_stats
 
 
-def create_xml_tables(test, run_limit_analysis=False, limits=None):
-    ''' This function fills the mode objects with stats from test using mode method '''
+XML_HEADER = b'<?xml version="1.0" encoding="UTF-8"?><?xml-stylesheet type="text/xsl" href="templates/data.xsl"?>'
+INDENT = '  '  # pretty print indentation of one level
+
+
+def create_xml_tables(test, run_limit_analysis=False, limits=None,
+                      output_folder=OUTPUT_FOLDER, open_browser=True, export_formats=()):
+    ''' This function fills the mode objects with stats from test using mode method.
+        The tables are streamed to the xml file one block (profile, mode, outage
+        board) at a time, so only the block being computed is held in memory.
+        The tables are opened in the web browser unless open_browser is False.
+        The stats are also exported in each of export_formats (see core.analysis.export). '''
     print('\nCreating analysis tables...')
 
-    output_folder = r"!output/"
-    xml_root = etree.Element("test", name=test.name, header_width=str(len(test.systems)))
-    time_analysis = etree.SubElement(xml_root, "time")
-    last_time = test.df.tail(1).index[0].to_pydatetime()
+    stats_table = station_stats_table(test, limits, run_limit_analysis)
+    stats = index_stats(stats_table)
+    with open(output_folder + test.name + '.xml', 'wb') as output_file:
+        output_file.write(XML_HEADER)
+        with etree.xmlfile(output_file, encoding='utf-8') as xml_file:
+            with xml_file.element("test", name=test.name, header_width=str(len(test.systems))):
+                write_element(xml_file, time_element(test), 1)
+                write_element(xml_file, profile_element(test), 1)
+                xml_file.flush()
+                for temp in test.temps:
+                    write_temperature(xml_file, test, temp, run_limit_analysis, limits, stats)
+                write_element(xml_file, write_user_inputs(etree.Element("test"), test), 1)
+                xml_file.write('\n')
+        output_file.write(b'\n')
+    for filepath in export_stats(test, stats_table, output_folder, export_formats):
+        print('\tExported stats to', filepath)
+
+    print('...complete.')
+    if open_browser:
+        webbrowser.open('file://' + os.path.realpath(output_folder + test.name) + '.xml', new=0)
+
+
+def time_element(test):
+    ''' Returns: time element holding the last scan time of test '''
+    time_analysis = etree.Element("time")
+    last_time = test.last_scan_time().to_pydatetime()
     last_time_value = etree.SubElement(time_analysis, "timestamp")
     last_time_value.text = last_time.strftime('%m/%d/%Y at %I:%M:%S %p')
+    return time_analysis
 
-    temp_analysis = etree.SubElement(xml_root, "profile")
+
+def profile_element(test):
+    ''' Returns: profile element holding the range of each thermocouple of test '''
+    temp_analysis = etree.Element("profile")
     for tc in test.thermocouples:
         thermocouple = etree.SubElement(temp_analysis, "thermocouple")
         name = etree.SubElement(thermocouple, "name")
         temp_minimum = etree.SubElement(thermocouple, "temp-min")
         temp_maximum = etree.SubElement(thermocouple, "temp-max")
         name.text = str(tc)
-        temp_minimum.text = str(round(test.df[tc].min(), 2))
-        temp_maximum.text = str(round(test.df[tc].max(), 2))
+        tc_min, tc_max = test.thermocouple_range(tc)
+        temp_minimum.text = str(round(tc_min, 2))
+        temp_maximum.text = str(round(tc_max, 2))
+    return temp_analysis
+
 
-    for temp in test.temps:
-        xml_temp = etree.SubElement(xml_root, "temperature", temp=str(temp)+'C')
+def write_temperature(xml_file, test, temp, run_limit_analysis, limits, stats):
+    ''' Streams the tables of every mode (and the outage board) at temp, each
+        written and freed as soon as it is computed '''
+    xml_temp = etree.Element("temperature", temp=str(temp)+'C')
+    if not test.outage and not any(temp in mode.hist_dict for mode in test.modes):
+        for mode in test.modes:  # no data at temp, the temperature element stays empty
+            mode.get_system_by_system_mode_stats(xml_temp, temp, run_limit_analysis, limits, stats)
+        write_element(xml_file, xml_temp, 1)
+        return
+    xml_file.write('\n' + INDENT)
+    with xml_file.element("temperature", temp=str(temp)+'C'):
         for mode in test.modes:
-            mode.get_system_by_system_mode_stats(xml_temp, temp, run_limit_analysis, limits)
+            mode.get_system_by_system_mode_stats(xml_temp, temp, run_limit_analysis, limits, stats)
+            write_children(xml_file, xml_temp, 2)
         if test.outage:
             test.outage.get_system_by_system_outage_stats(xml_temp, temp, run_limit_analysis, limits)
-    write_user_inputs(xml_root, test)
+            write_children(xml_file, xml_temp, 2)
+        xml_file.write('\n' + INDENT)
+    xml_file.flush()
 
-    xml_file = open(output_folder + test.name + '.xml', 'w')
-    xml_file.write(r'<?xml version="1.0" encoding="UTF-8"?><?xml-stylesheet type="text/xsl" href="templates/data.xsl"?>')
-    xml_file.close()
 
-    with open(output_folder + test.name +'.xml', 'a') as xml_file:
-        xml_data = etree.tostring(xml_root, pretty_print=True, encoding='unicode')
-        xml_file.write(xml_data)
-        xml_file.close()
+def write_children(xml_file, element, level):
+    ''' Writes the children of element at level, then removes them from element '''
+    for child in list(element):
+        write_element(xml_file, child, level)
+        element.remove(child)
 
-    print('...complete.')
-    webbrowser.open('file://' + os.path.realpath(output_folder + test.name) + '.xml', new=0)
+
+def write_element(xml_file, element, level):
+    ''' Writes an element on a new line, pretty printed at an indentation level '''
+    indent(element, level)
+    xml_file.write('\n' + INDENT * level, element, with_tail=False)
+
+
+def indent(element, level=0):
+    ''' Sets the whitespace of the subtree of element as etree.tostring(pretty_print=True)
+        would print it at an indentation level (elements holding text are left as is) '''
+    children = list(element)
+    if children and not element.text:
+        element.text = '\n' + INDENT * (level + 1)
+        for child in children:
+            indent(child, level + 1)
+            child.tail = '\n' + INDENT * (level + 1)
+        children[-1].tail = '\n' + INDENT * level
 
 
 def write_user_inputs(xml_root, test):
+    ''' Returns: user-inputs element (appended to xml_root) holding the analysis inputs '''
     user_inputs = etree.SubElement(xml_root, "user-inputs")
     test_name = etree.SubElement(user_inputs, "test-name")
     folder = etree.SubElement(user_inputs, "folder")
@@ -71,4 +137,5 @@ def write_user_inputs(xml_root, test):
     limits_file.text = test.limits.filepath if test.limits else None
     temperatures_analyzed.text = ', '.join([str(temp) for temp in test.temps])
     temperature_tolerance.text = str(test.temperature_tolerance)
-    voltage_tolerance.text = str(test.voltage_tolerance)
\ No newline at end of file
+    voltage_tolerance.text = str(test.voltage_tolerance)
+    return user_inputs
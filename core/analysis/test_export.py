@@ -0,0 +1,41 @@
+"""
+This module tests the stats export in export.py
+"""
+
+import types
+import pytest
+import numpy as np
+import pandas as pd
+from core.analysis.export import *
+from core.analysis.stats import STATS_COLUMNS
+
+
+@pytest.fixture
+def stats():
+    """ Returns stats table of a vsense and two system currents (one without limits) """
+    return pd.DataFrame([
+        ('DRL', 'B1', 23, 13.5, 'vsense', 'B1 VSense1', 13.0, 14.0, 40, 13.1, 13.9, 13.5, 0.2, 0),
+        ('DRL', 'B1', 23, 13.5, 'current', 'B1 TP1: System 1', 1.0, 1.2, 40, 0.9, 1.2004, 1.1, 0.05, 5),
+        ('DRL', 'B1', 23, 13.5, 'current', 'B1 TP2: System 2', np.nan, np.nan, 40, 1.0, 1.1, 1.05, 0.02, 0),
+    ], columns=STATS_COLUMNS)
+
+
+def test_export_stats_table(stats):
+    export = export_stats_table(types.SimpleNamespace(name='Run11'), stats)
+    assert list(export.columns) == EXPORT_COLUMNS
+    assert (export['test'] == 'Run11').all()
+    assert export['percent_out'].tolist() == [0.0, 12.5, 0.0]
+    assert export['check'].tolist() == ['G', 'Out of Spec', 'NA']  # below 1.0, 1.2004 rounds to 1.2
+
+
+@pytest.mark.parametrize('export_format, read', [
+    ('csv', lambda filepath: pd.read_csv(filepath, keep_default_na=False, na_values=[''])),
+    ('jsonl', lambda filepath: pd.read_json(filepath, orient='records', lines=True)),
+])
+def test_export_stats_files(tmpdir, stats, export_format, read):
+    output_folder = str(tmpdir) + '/'
+    filepaths = export_stats(types.SimpleNamespace(name='Run11'), stats, output_folder, [export_format])
+    assert filepaths == [output_folder + 'Run11_stats.' + export_format]
+    exported = read(filepaths[0])
+    pd.testing.assert_frame_equal(exported, export_stats_table(types.SimpleNamespace(name='Run11'), stats),
+                                  check_dtype=False)
@@ -0,0 +1,54 @@
+"""
+This module tests the limits check of the analyses in runner.py
+"""
+
+import os
+import types
+import pytest
+from core.analysis.runner import *
+from core.limits_import.limits import Limits
+from core.exceptions.custom_exceptions import LimitNotFoundError
+
+
+LIMITS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', '..', 'test files', 'limits files', 'P552_L2.htm')
+
+
+@pytest.fixture
+def test_station():
+    """ Returns test station stand-in with an LB mode at 23C/9V (limits) and 23C/12V (none) """
+    test = types.SimpleNamespace(outage=False, temperature_tolerance=5, voltage_tolerance=0.5)
+    test.modes = [types.SimpleNamespace(name='LB', test=test, hist_dict={23: {9.0: 10, 12.0: 10}},
+                                        systems=['B1 TP1: P552 PT'], has_led_binning=False)]
+    return test
+
+
+@pytest.mark.parametrize('analysis_names, run_limit_analysis, raises', [
+    (['Plot'], True, False),
+    (['Histograms'], False, False),
+    (['Histograms'], True, True),
+    (['Tables'], False, False),
+    (['Tables'], True, True),
+    (['Out of Spec'], False, True),
+    (['Plot', 'Histograms', 'Tables'], False, False),
+    (['Plot', 'Tables', 'Out of Spec'], False, True),
+])
+def test_analysis_limits_checked_only_if_used(test_station, analysis_names, run_limit_analysis, raises):
+    limits = Limits(LIMITS_FILE, cache=False)
+    if raises:
+        with pytest.raises(LimitNotFoundError) as error:
+            check_analyses_limits(analysis_names, test_station, limits, run_limit_analysis)
+        assert error.value.conditions == [('LB', 23, 12.0)]
+    else:
+        check_analyses_limits(analysis_names, test_station, limits, run_limit_analysis)
+
+
+def test_outage_limits_checked_with_the_tables(test_station):
+    limits = Limits(LIMITS_FILE, cache=False)
+    test_station.modes[0].hist_dict = {23: {9.0: 10}}
+    test_station.voltages = [9.0, 12.0]
+    test_station.outage = types.SimpleNamespace(name='OUTAGE', test=test_station)
+    check_analyses_limits(['Histograms', 'Out of Spec'], test_station, limits, True)
+    with pytest.raises(LimitNotFoundError) as error:
+        check_analyses_limits(['Out of Spec', 'Tables'], test_station, limits, True)
+    assert [condition[0] for condition in error.value.conditions] == ['OUTAGE ON', 'OUTAGE OFF']
@@ -0,0 +1,88 @@
+"""
+This module tests the grouped statistics in stats.py
+"""
+
+import types
+import pytest
+import numpy as np
+import pandas as pd
+from core.analysis.stats import *
+from core.data_import.helpers import count_num_out_of_spec, get_series_stats, rounded_stats
+
+
+SYSTEMS = ['B1 TP1: System 1', 'B1 TP2: System 2']
+VSENSES = ['B1 VSense1']
+
+
+@pytest.fixture
+def test_station():
+    """ Returns test station stand-in with one mode at two temp/voltage conditions """
+    rng = np.random.RandomState(0)
+    hist_dict = {23: {}}
+    for voltage in (9.0, 13.5):
+        dframe = pd.DataFrame(rng.rand(40, 2) + 1.0, columns=SYSTEMS)
+        dframe[VSENSES[0]] = voltage + rng.rand(40) - 0.5
+        dframe.iloc[3, 0] = np.nan
+        hist_dict[23][voltage] = dframe
+    mode = types.SimpleNamespace(name='DRL', board_mode='B1', temps=(23, 85),
+                                 voltages=[9.0, 13.5, 16.0], hist_dict=hist_dict,
+                                 systems=SYSTEMS, voltage_senses=VSENSES, has_led_binning=False)
+    mode.condition_values = lambda column, temp, voltage: hist_dict[temp][voltage][column].values
+    mode.conditions_block = lambda columns, conditions: (
+        np.concatenate([hist_dict[temp][voltage][columns].values for temp, voltage in conditions]),
+        [len(hist_dict[temp][voltage]) for temp, voltage in conditions])
+    return types.SimpleNamespace(modes=[mode], voltage_tolerance=0.3)
+
+
+def test_mode_stats_table_matches_series_stats(test_station):
+    stats = index_stats(mode_stats_table(test_station))
+    assert len(stats) == 2 * (len(SYSTEMS) + len(VSENSES))
+    mode = test_station.modes[0]
+    for voltage, dframe in mode.hist_dict[23].items():
+        for column in SYSTEMS + VSENSES:
+            row = stats[('B1', 23, voltage, column)]
+            assert rounded_stats(row) == get_series_stats(dframe[column])
+            if column in VSENSES:
+                total_count, count_out, _ = count_num_out_of_spec(dframe[column], voltage - 0.3,
+                                                                  voltage + 0.3)
+                assert (row['count'], row['count_out']) == (total_count, count_out)
+            else:
+                assert row['count'] == dframe[column].count() and row['count_out'] == 0
+    assert ('B1', 23, 16.0, SYSTEMS[0]) not in stats  # no data at condition
+
+
+def test_mode_stats_table_without_modes(test_station):
+    test_station.modes = []
+    assert list(mode_stats_table(test_station).columns) == STATS_COLUMNS
+
+
+def test_mode_stats_table_counts_currents_outside_limits(test_station):
+    limits = types.SimpleNamespace(lim={'DRL': {23: {9.0: [1.2, 1.8], 13.5: [1.1, 1.9]}}})
+    stats = index_stats(mode_stats_table(test_station, limits, run_limit_analysis=True))
+    for voltage, (lower_limit, upper_limit) in limits.lim['DRL'][23].items():
+        for system in SYSTEMS:
+            series = test_station.modes[0].hist_dict[23][voltage][system]
+            row = stats[('B1', 23, voltage, system)]
+            assert (row['lower_limit'], row['upper_limit']) == (lower_limit, upper_limit)
+            assert row['count_out'] == count_num_out_of_spec(series, lower_limit, upper_limit)[1]
+
+
+@pytest.mark.parametrize("num_chunks", [1, 3])
+def test_streaming_stats_match_mode_stats_table(test_station, num_chunks):
+    mode = test_station.modes[0]
+    streaming_stats = StreamingStats()
+    for voltage, dframe in mode.hist_dict[23].items():
+        for rows in np.array_split(np.arange(len(dframe)), num_chunks):
+            streaming_stats.update(test_station, mode, 23, voltage, dframe, rows)
+    expected = index_stats(mode_stats_table(test_station))
+    stats = index_stats(streaming_stats.table())
+    assert sorted(stats) == sorted(expected)
+    for key, row in stats.items():
+        assert rounded_stats(row) == rounded_stats(expected[key])
+        assert (row['count'], row['count_out']) == (expected[key]['count'], expected[key]['count_out'])
+
+
+def test_outside_limits_compares_at_reading_precision():
+    readings = np.array([1.1, 1.2, 1.3], dtype=np.float32)
+    assert list(outside_limits(readings, 1.1, 1.2)) == [False, False, True]
+    assert list(outside_limits(readings.astype(float), 1.15, np.nan)) == [True, False, False]
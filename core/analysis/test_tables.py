@@ -0,0 +1,42 @@
+"""
+This module tests the streamed xml writing of tables.py
+"""
+
+import io
+import pytest
+from lxml import etree
+from core.analysis.tables import *
+
+
+@pytest.fixture
+def mode_element():
+    """ Returns mode tables element with nested, empty and text elements """
+    xml_mode = etree.Element("mode", id='DRL', width='3')
+    xml_voltage = etree.SubElement(xml_mode, "voltage", value='13.5V')
+    etree.SubElement(xml_voltage, "limits").text = 'Limits:  0.5A to 1.0A'
+    xml_systems = etree.SubElement(xml_voltage, "systems")
+    for name in ('B1 TP1: System 1', 'B1 TP2: System 2'):
+        xml_system = etree.SubElement(xml_systems, "system")
+        etree.SubElement(xml_system, "name").text = name
+        etree.SubElement(xml_system, "check")
+    etree.SubElement(xml_mode, "voltage", value='16.0V')
+    return xml_mode
+
+
+def test_streamed_root_is_pretty_printed(mode_element):
+    root = etree.Element("temperature", temp='23C')
+    root.append(etree.fromstring(etree.tostring(mode_element)))
+    output = io.BytesIO()
+    with etree.xmlfile(output, encoding='utf-8') as xml_file:
+        with xml_file.element("temperature", temp='23C'):
+            write_element(xml_file, mode_element, 1)
+            xml_file.write('\n')
+    assert output.getvalue() + b'\n' == etree.tostring(root, pretty_print=True)
+
+
+def test_element_indented_at_level(mode_element):
+    root = etree.Element("temperature")
+    root.append(etree.fromstring(etree.tostring(mode_element)))
+    expected = etree.tostring(root, pretty_print=True, encoding='unicode').splitlines()[1:-1]
+    indent(mode_element, 1)
+    assert ('  ' + etree.tostring(mode_element, encoding='unicode')).splitlines() == expected
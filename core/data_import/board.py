@@ -4,17 +4,15 @@
 This module contains the Board class and Outage class. These classes
 model the test station boards. """
 
-import re
+import numpy as np
+import pandas as pd
 from lxml import etree
 
-from core.re_and_global import REGEX_SPECIFIC_BOARD_SYSTEMS, \
-                               REGEX_SPECIFIC_BOARD_ON_OFF
+from core.re_and_global import ON_OFF
 
-from core.data_import.helpers import filter_board_on_or_off, \
-                                     filter_temp_and_voltage, \
-                                     get_system_test_position_int, \
+from core.data_import.helpers import get_system_test_position_int, \
                                      check_if_out_of_spec, \
-                                     get_outage_stats_at_temp_voltage, \
+                                     get_series_stats, \
                                      count_num_out_of_spec
 
 from core.limits_import.limits import get_limits_for_outage_on, \
@@ -80,13 +78,7 @@ class Board(object):
             'systems' attribute with these systems.
             (e.g. - 'B3 TP4: System 46')
         """
-        set_of_systems = set()
-        for col_name in self.test.df.columns:
-            if re.search(REGEX_SPECIFIC_BOARD_SYSTEMS(self.id), col_name):
-                system_name = re.search(REGEX_SPECIFIC_BOARD_SYSTEMS(self.id), col_name).group()
-                set_of_systems.add(system_name)
-
-        self.systems = sorted(list(set_of_systems),
+        self.systems = sorted(self.test.schema.systems.get(self.id, []),
                               key=lambda sys: get_system_test_position_int(sys, index=1))
 
 
@@ -114,39 +106,37 @@ class Outage(Board):
         Returns:
             systems (list): list of systems used on this board
         """
-        systems = []
-        for col_name in self.test.df.columns:
-            if re.search(REGEX_SPECIFIC_BOARD_SYSTEMS(self.id), col_name):
-                systems.append(col_name)
-        return systems
+        return list(self.test.schema.systems.get(self.id, []))
 
     def __find_on_off_col(self):
         """ Find board_on_off column for outage board
         Returns:
             board_on_off (list): list of the board_on_off df column
         """
-        board_on_off = []
-        for col_name in self.test.df.columns:
-            if re.search(REGEX_SPECIFIC_BOARD_ON_OFF(self.id), col_name):
-                board_on_off.append(col_name)
-        return board_on_off
+        return [self.test.schema.on_off[self.id]] if self.id in self.test.schema.on_off else []
+
+    def analysis_columns(self):
+        """ Returns: list of the test columns used by the outage analysis """
+        return [self.test.VSETPOINT] + self.test.thermocouples + self.board_on_off + self.systems
 
     def get_system_by_system_outage_stats(self, xml_temp, temp, run_limit_analysis, limits):
         """ Retrieve outage stats for each system """
         xml_outages = etree.SubElement(xml_temp, "outages",
                                        id=self.name, width=self.xml_header_width)
-        df = self.test.df[[self.test.VSETPOINT] + self.test.thermocouples + \
-                          self.board_on_off + self.systems]
-        df_on = filter_board_on_or_off(df, self.id, 1)
-        df_off = filter_board_on_or_off(df, self.id, 0)
-        self.get_outage_stats_in_state(df_off, xml_outages, temp, run_limit_analysis,
-                                       limits, outage_state='OFF')
-        self.get_outage_stats_in_state(df_on, xml_outages, temp, run_limit_analysis,
-                                       limits, outage_state='ON')
-
-    def get_outage_stats_in_state(self, df, xml_outages, temp, run_limit_analysis,
+        df, conditions = self.test.outage_data(self.analysis_columns())
+        board_states = df[self.id + ' ' + ON_OFF].values
+        on_rows, off_rows = np.flatnonzero(board_states == 1), np.flatnonzero(board_states == 0)
+        self.get_outage_stats_in_state(df, off_rows, conditions.subset(off_rows),
+                                       xml_outages, temp, run_limit_analysis, limits,
+                                       outage_state='OFF')
+        self.get_outage_stats_in_state(df, on_rows, conditions.subset(on_rows),
+                                       xml_outages, temp, run_limit_analysis, limits,
+                                       outage_state='ON')
+
+    def get_outage_stats_in_state(self, df, rows, conditions, xml_outages, temp, run_limit_analysis,
                                   limits, outage_state):
-        """ Get outage stats for outage 'ON' or 'OFF' state """
+        """ Get outage stats for outage 'ON' or 'OFF' state (rows are the positions of
+            the state's rows in df and conditions is their ConditionIndex) """
         xml_outage = etree.SubElement(xml_outages, "outage", id=self.name+' '+outage_state,
                                       width=self.xml_header_width)
         for voltage in self.test.voltages:
@@ -154,12 +144,10 @@ class Outage(Board):
                                            width=self.xml_header_width)
             xml_systems = etree.SubElement(xml_voltage, "systems")
             for system in self.systems:
-                series = filter_temp_and_voltage(df, self.test.ambient, temp, voltage,
-                                                 self.test.temperature_tolerance)[system]
+                series = pd.Series(df[system].values[rows[conditions.rows(temp, voltage)]])
                 xml_system = etree.SubElement(xml_systems, "system")
                 out_of_spec_bool = 'NA'
-                outage_min, outage_max, outage_mean, outage_std = get_outage_stats_at_temp_voltage(
-                                                                    df, self, system, temp, voltage)
+                outage_min, outage_max, outage_mean, outage_std = get_series_stats(series)
                 xml_name = etree.SubElement(xml_system, "name")
                 xml_name.text = str(system).split(' ', 1)[1]
                 xml_min = etree.SubElement(xml_system, "min")
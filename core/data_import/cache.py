@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+
+"""
+This module contains the DatafileCache class which keeps the parsed (typed)
+dataframe of each raw datafile in a columnar Feather file. The cache lives in a
+sidecar folder next to the raw data so later analyses of the same test folder
+skip text parsing entirely.
+"""
+
+import os
+import json
+import time
+import hashlib
+
+import pandas as pd
+
+from core.data_import.datafile import DATE_TIME
+from core.sidecar import hash_file_contents
+
+
+CACHE_VERSION = 5  # bump when the parsed dataframe or manifest layout changes
+MANIFEST = 'manifest.json'
+DEFAULT_MAX_CACHE_SIZE = 1024**3  # bytes (1 GB)
+MTIME_RESOLUTION = 2.0  # seconds (coarsest file system timestamps, FAT)
+
+
+class DatafileCache(object):
+    """
+    Persistent cache of parsed raw datafile dataframes.
+
+    Attributes:
+        directory (string): Folder holding the cached Feather files and manifest
+        max_size (int): Cap (bytes) on the total size of cached Feather files.
+                        Least recently used entries are evicted beyond it
+        entries (dict): Manifest; abs datafile path -> size, mtime, content hash,
+                        time the contents were hashed, cache file, cache file
+                        bytes, and time of last access
+        enabled (bool): False if the cache folder can't be written or the
+                        Feather libraries are not installed
+    Essential methods:
+        identify: Retrieves the key (path, size, mtime, hash) of a raw datafile
+        get: Returns the cached dataframe of a datafile key (or None)
+        put: Stores the parsed dataframe of a datafile key
+        save: Writes the manifest to disk
+    """
+    def __init__(self, directory, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.entries = {}
+        self.enabled = True
+
+        self.__load_manifest()
+
+    def __repr__(self):
+        return '{}: {} ({} entries)'.format(self.__class__.__name__,
+                                            self.directory, len(self.entries))
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST)
+
+    @property
+    def size(self):
+        """ Total bytes of cached Feather files """
+        return sum(entry['bytes'] for entry in self.entries.values())
+
+    def __load_manifest(self):
+        """ Read manifest from cache folder, creating the folder if needed """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            print('\tDatafile cache disabled, could not create', self.directory, '-', e)
+            self.enabled = False
+            return
+        try:
+            with open(self.manifest_path) as manifest:
+                contents = json.load(manifest)
+            if contents.get('version') == CACHE_VERSION:
+                self.entries = contents['entries']
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+
+    def identify(self, filepath):
+        """ Returns: dict key (abs path, size, mtime, content hash) of a raw datafile.
+            Size and mtime are the fast check: the hash of the cached entry is
+            reused when they match, unless the datafile was modified within
+            MTIME_RESOLUTION of being hashed (it may have been written again
+            since, with the same size and mtime). Otherwise the contents are hashed. """
+        path, stat = os.path.abspath(filepath), os.stat(filepath)
+        key = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        entry = self.entries.get(path)
+        if entry is not None and entry['size'] == key['size'] and entry['mtime'] == key['mtime'] \
+           and entry['hashed_at'] - key['mtime'] > MTIME_RESOLUTION:
+            key.update(hash=entry['hash'], hashed_at=entry['hashed_at'])
+        else:
+            hashed_at = time.time()  # before reading, so a write during hashing is caught
+            key.update(hash=hash_file_contents(filepath), hashed_at=hashed_at)
+        return key
+
+    def get(self, key):
+        """ Returns: the cached dataframe for input datafile key or None if it
+            is not cached. A stale entry for the same path is invalidated. """
+        if not self.enabled:
+            return None
+        entry = self.entries.get(key['path'])
+        if entry is None:
+            return None
+        if any(entry[field] != key[field] for field in ('size', 'mtime', 'hash')):
+            self.__remove(key['path'])  # datafile changed since it was cached
+            return None
+        try:
+            dframe = pd.read_feather(os.path.join(self.directory, entry['file']))
+        except Exception as e:
+            print('\tCould not read cached datafile', entry['file'], '-', e)
+            self.__remove(key['path'])
+            return None
+        entry['last_access'], entry['hashed_at'] = time.time(), key['hashed_at']
+        return dframe.set_index(DATE_TIME)
+
+    def put(self, key, dframe):
+        """ Store parsed dataframe of input datafile key, then evict least
+            recently used entries until the cache is under its size cap """
+        if not self.enabled:
+            return
+        self.__remove(key['path'])
+        filename = hashlib.sha1((key['path'] + key['hash'] + str(CACHE_VERSION)).encode()) \
+                          .hexdigest() + '.feather'
+        filepath = os.path.join(self.directory, filename)
+        try:
+            dframe.reset_index().to_feather(filepath)
+        except ImportError as e:
+            print('\tDatafile cache disabled, Feather support is not installed -', e)
+            self.enabled = False
+            return
+        except Exception as e:
+            print('\tCould not cache datafile', key['path'], '-', e)
+            return
+        entry = dict(key, file=filename, bytes=os.path.getsize(filepath),
+                     last_access=time.time())
+        self.entries[key['path']] = entry
+        self.evict()
+
+    def evict(self):
+        """ Remove entries of deleted datafiles, then least recently used entries
+            while the cache is larger than max_size """
+        for path in [path for path in self.entries if not os.path.exists(path)]:
+            self.__remove(path)
+        total_size = self.size
+        for path in sorted(self.entries, key=lambda p: self.entries[p]['last_access']):
+            if total_size <= self.max_size:
+                break
+            total_size -= self.entries[path]['bytes']
+            self.__remove(path)
+
+    def save(self):
+        """ Write manifest to disk (atomically replaces the previous manifest) """
+        if not self.enabled:
+            return
+        temp_path = self.manifest_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as manifest:
+                json.dump({'version': CACHE_VERSION, 'entries': self.entries}, manifest)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            print('\tCould not save datafile cache manifest -', e)
+
+    def __remove(self, path):
+        """ Remove entry (and its Feather file) for input datafile path """
+        entry = self.entries.pop(path, None)
+        if entry:
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except OSError:
+                pass
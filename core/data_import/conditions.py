@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+
+"""
+This module contains the ConditionIndex class, which holds the row positions of
+test data at each temperature/voltage test condition. The condition of every
+row is classified once per TestStation; modes and board states get sub-indexes
+mapped from it, so analyses slice their data by position instead of scanning
+the ambient and Vsetpoint columns again for every condition.
+"""
+
+import numpy as np
+
+from core.re_and_global import VSETPOINT
+
+
+def setpoint_code_dtype(setpoints):
+    """ Returns: smallest dtype of the codes of input distinct setpoints """
+    return np.int16 if len(setpoints) < np.iinfo(np.int16).max else np.int32
+
+
+class ConditionIndex(object):
+    """
+    Row positions of a dataframe at each temperature/voltage condition. A row is
+    at a condition if its Vsetpoint equals the voltage and its ambient reading is
+    strictly within temperature_tolerance of the temperature (same as
+    helpers.filter_temp_and_voltage). Ambient readings are compared at their
+    own precision (e.g. - float32).
+
+    Attributes:
+        setpoints => distinct Vsetpoints of the rows, sorted (numpy array)
+        setpoint_codes => position in setpoints of each row's Vsetpoint (int16)
+        ambients => ambient thermocouple reading of each row (numpy array)
+        temperature_tolerance => temperature tolerance of the test
+        positions => (temp, voltage) -> sorted row positions at that condition
+                     ((temp, None) -> row positions at that temperature)
+
+    Essential methods:
+        rows => row positions at a temp/voltage condition
+        take => rows of a dataframe (aligned with the index) at a condition
+        subset => index of a subset of the rows (e.g. - a mode's rows)
+        append => extend the index with the rows of another index
+    """
+
+    def __init__(self, vsetpoints, ambients, temperature_tolerance, temps=(), voltages=(),
+                 positions=None):
+        self.setpoints, codes = np.unique(np.asarray(vsetpoints, dtype=float), return_inverse=True)
+        self.setpoint_codes = codes.astype(setpoint_code_dtype(self.setpoints))
+        self.ambients = np.asarray(ambients)
+        self.temperature_tolerance = temperature_tolerance
+        self.positions = {} if positions is None else positions
+        for temp in temps:
+            for voltage in voltages:
+                self.rows(temp, voltage)
+
+    @classmethod
+    def from_dataframe(cls, df, ambient, temperature_tolerance, temps=(), voltages=()):
+        """ Returns: ConditionIndex of the rows of df (ambient is the label of
+            the ambient thermocouple column; without one no row is at a temperature) """
+        ambients = df[ambient].values if ambient is not None else np.full(len(df), np.nan)
+        return cls(df[VSETPOINT].values, ambients, temperature_tolerance, temps, voltages)
+
+    def __len__(self):
+        return len(self.setpoint_codes)
+
+    @property
+    def vsetpoints(self):
+        """ Vsetpoint of each row (numpy array) """
+        return self.setpoints[self.setpoint_codes]
+
+    def rows(self, temp, voltage=None):
+        """ Returns: sorted row positions (numpy array) at temp/voltage condition,
+            or at temp for any voltage if voltage is None. Conditions that were
+            not indexed yet are classified on first use and kept. """
+        key = (temp, voltage)
+        if key not in self.positions:
+            if voltage is None:
+                tolerance = self.temperature_tolerance
+                self.positions[key] = np.flatnonzero((self.ambients > temp - tolerance) &
+                                                     (self.ambients < temp + tolerance))
+            else:
+                temp_rows = self.rows(temp)
+                code = np.searchsorted(self.setpoints, voltage)
+                if code < len(self.setpoints) and self.setpoints[code] == voltage:
+                    self.positions[key] = temp_rows[self.setpoint_codes[temp_rows] == code]
+                else:  # no row at voltage
+                    self.positions[key] = temp_rows[:0]
+        return self.positions[key]
+
+    def take(self, df, temp, voltage=None):
+        """ Returns: rows of df at temp/voltage condition (df rows must be the
+            indexed rows, in the same order) """
+        return df.iloc[self.rows(temp, voltage)]
+
+    def subset(self, positions):
+        """ Maps the indexed conditions onto a subset of the rows
+        Args:
+            positions (numpy array): Sorted row positions of the subset
+        Returns:
+            ConditionIndex of the subset rows (positions relative to the subset)
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        subset_positions = {}
+        for key, rows in self.positions.items():
+            local = np.searchsorted(positions, rows)
+            found = local < len(positions)
+            found[found] = positions[local[found]] == rows[found]
+            subset_positions[key] = local[found]
+        subset = ConditionIndex((), (), self.temperature_tolerance, positions=subset_positions)
+        subset.setpoints = self.setpoints
+        subset.setpoint_codes = self.setpoint_codes[positions]
+        subset.ambients = self.ambients[positions]
+        return subset
+
+    def append(self, other):
+        """ Appends the rows of another index (e.g. - of newly ingested rows) """
+        offset = len(self)
+        keys = set(self.positions) | set(other.positions)
+        temp_keys = set((temp, None) for temp, _ in keys)  # voltage keys are built from these
+        for key in list(temp_keys) + list(keys - temp_keys):
+            self.positions[key] = np.concatenate([self.rows(*key), other.rows(*key) + offset])
+        setpoints = np.union1d(self.setpoints, other.setpoints)
+        code_dtype = setpoint_code_dtype(setpoints)
+        self.setpoint_codes = np.concatenate([
+            np.searchsorted(setpoints, self.setpoints).astype(code_dtype)[self.setpoint_codes],
+            np.searchsorted(setpoints, other.setpoints).astype(code_dtype)[other.setpoint_codes]])
+        self.setpoints = setpoints
+        self.ambients = np.concatenate([self.ambients, other.ambients])
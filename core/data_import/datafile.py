@@ -0,0 +1,286 @@
+#!/usr/bin/python3
+
+"""
+This module contains functions that read a single Labview raw datafile
+(e.g. - '20180226_104538_Validation V47 Run 11_B_1.txt') into a typed
+pandas dataframe indexed by the 'Date Time' of each scan.
+"""
+
+import io
+import os
+from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.data_import.schema import HeaderSchema
+from core.re_and_global import VSETPOINT
+
+
+RAW_DATE_FORMAT = '%Y/%m/%d %H:%M:%S.%f'
+DATE_TIME = 'Date Time'
+DATE_COLUMNS = ['Date', 'Time']
+OFF_READING = 'OFF'  # board channel is not measured (board OFF)
+NO_READING = 'No Reading'  # thermocouple is not connected
+ENGINES = ('c', 'python')
+TAIL_BLOCK_SIZE = 64 * 1024
+THERMOCOUPLE_DTYPE = np.float32  # thermocouple readings (ranges reported as written)
+BOARD_READING_DTYPE = np.float32  # currents and voltage senses (stats from reading_values)
+ON_OFF_DTYPE = np.int8  # board ON/OFF codes (e.g. - 0 OFF, 1 ON, 2 flashing)
+VSETPOINT_DTYPE = 'category'  # int8 codes of the few distinct voltage setpoints
+PARSE_DTYPES = {ON_OFF_DTYPE: np.float32,  # until 'OFF' is filled
+                VSETPOINT_DTYPE: np.float64}  # C parser categories would be strings
+
+## parsing function for datetime index on dataframes (legacy python engine only)
+DATE_PARSER = lambda x: datetime.strptime(x, RAW_DATE_FORMAT)
+
+
+def raw_column_dtypes(columns):
+    """ Returns: dict of data column label -> dtype declared from the header of
+        a raw datafile: int8 board ON/OFF codes, float32 thermocouples and board
+        readings (currents, voltage senses), a categorical Vsetpoint and float64
+        for the rest. Stats of float32 readings are computed from their values as
+        written in the datafile (see helpers.reading_values). """
+    schema = HeaderSchema.of(columns)
+    on_off_columns = set(schema.on_off.values())
+    dtypes = {}
+    for col in columns:
+        if col in DATE_COLUMNS:
+            continue
+        if col in on_off_columns:
+            dtypes[col] = ON_OFF_DTYPE
+        elif col in schema.thermocouples:
+            dtypes[col] = THERMOCOUPLE_DTYPE
+        elif col in schema.board_of:
+            dtypes[col] = BOARD_READING_DTYPE
+        elif col == VSETPOINT:
+            dtypes[col] = VSETPOINT_DTYPE
+        else:
+            dtypes[col] = np.float64
+    return dtypes
+
+def read_raw_datafile(filepath, engine='c'):
+    """ Read a Labview raw datafile into a dataframe of compact numeric columns
+    Args:
+        filepath (string): Path to the tab separated raw datafile
+        engine (string): 'c' (default) for the vectorized C parser or 'python'
+                         for the legacy row by row parser
+    Returns:
+        dframe (dataframe): Scans indexed by 'Date Time', with the dtypes of
+                            raw_column_dtypes. 'OFF' board readings are 0 and
+                            'No Reading' thermocouple readings are NaN
+    """
+    if engine == 'c':
+        return _read_raw_datafile_c(filepath)
+    elif engine == 'python':
+        return _read_raw_datafile_python(filepath)
+    raise ValueError('Unknown ingest engine "' + str(engine) + '". ' + \
+                     'Expected one of: ' + ', '.join(ENGINES))
+
+def read_raw_datafiles(filepaths, engine='c', workers=1, cache=None):
+    """ Read many raw datafiles, optionally in parallel and through a cache
+    Args:
+        filepaths (list of strings): Paths to the raw datafiles
+        engine (string): Parser engine passed on to read_raw_datafile
+        workers (int): Number of worker processes. 1 (default) reads the files
+                       one after another in this process
+        cache (DatafileCache): Optional cache of parsed datafiles. Files that
+                               are not cached are parsed and then stored
+    Returns:
+        dframes (list of dataframes): One dataframe per file, in input order
+    """
+    dframes = [None] * len(filepaths)
+    if cache is not None:
+        keys = [cache.identify(filepath) for filepath in filepaths]
+        dframes = [cache.get(key) for key in keys]
+    missing = [i for i, dframe in enumerate(dframes) if dframe is None]
+    parsed = _parse_raw_datafiles([filepaths[i] for i in missing], engine, workers)
+    for i, dframe in zip(missing, parsed):
+        dframes[i] = dframe
+        if cache is not None:
+            cache.put(keys[i], dframe)
+    if cache is not None:
+        cache.save()
+    return dframes
+
+def _parse_raw_datafiles(filepaths, engine, workers):
+    """ Returns: list of parsed dataframes, in input order """
+    reader = partial(read_raw_datafile, engine=engine)
+    if workers is None or workers <= 1 or len(filepaths) <= 1:
+        return [reader(filepath) for filepath in filepaths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(filepaths))) as executor:
+        return list(executor.map(reader, filepaths))  # map preserves file order
+
+def read_raw_datafile_rows(filepath, columns, offset=0, engine='c', max_bytes=None):
+    """ Read the complete rows of a raw datafile that follow a byte offset. Used
+        to pick up rows appended to the active datafile of a running test.
+    Args:
+        filepath (string): Path to the tab separated raw datafile
+        columns (list of strings): Column labels of the datafile (its header)
+        offset (int): Byte offset to read from. 0 reads the file from the top
+                      (the header line is skipped). A row that the offset falls
+                      inside of is skipped
+        engine (string): Parser engine ('c' or 'python')
+        max_bytes (int): Read at most this many bytes (default: to end of file)
+    Returns:
+        dframe (dataframe): Scans read (None if no complete row follows offset)
+        offset (int): Byte offset just past the last complete row read
+    """
+    if engine not in ENGINES:
+        raise ValueError('Unknown ingest engine "' + str(engine) + '". ' + \
+                         'Expected one of: ' + ', '.join(ENGINES))
+    with open(filepath, 'rb') as datafile:
+        if offset > 0:
+            datafile.seek(offset - 1)
+            at_row_start = datafile.read(1) == b'\n'
+        else:
+            at_row_start = False  # first line is the header
+        data = datafile.read() if max_bytes is None else datafile.read(max_bytes)
+    start = 0
+    if not at_row_start:
+        start = data.find(b'\n') + 1  # skip the header or a partial row
+        if start == 0:
+            return None, offset
+    end = data.rfind(b'\n') + 1  # a partially written last row is left for later
+    if end <= start:
+        return None, offset + start
+    source = io.BytesIO(data[start:end])
+    if engine == 'c':
+        dframe = _read_raw_datafile_c(source, columns, header=None)
+    else:
+        dframe = _read_raw_datafile_python(source, columns, header=None)
+    return dframe, offset + end
+
+def iter_raw_datafile_chunks(filepath, columns, chunk_bytes, engine='c', offset=0, end=None):
+    """ Yields the complete rows of a raw datafile in dataframes parsed from
+        about chunk_bytes of text each (a longer row is read whole), so a file
+        of any size is read with bounded memory.
+    Args:
+        filepath (string): Path to the tab separated raw datafile
+        columns (list of strings): Column labels of the datafile (its header)
+        chunk_bytes (int): Bytes of text parsed at once
+        engine (string): Parser engine ('c' or 'python')
+        offset (int): Byte offset to read from (see read_raw_datafile_rows)
+        end (int): Byte offset to stop at, the end of a row (default: end of
+                   the last complete row)
+    """
+    if end is None:
+        end = raw_rows_end(filepath, os.path.getsize(filepath))
+    while offset < end:
+        dframe, next_offset = read_raw_datafile_rows(filepath, columns, offset, engine,
+                                                     max_bytes=min(chunk_bytes, end - offset))
+        if next_offset == offset:  # a row longer than chunk_bytes
+            chunk_bytes *= 2
+            continue
+        offset = next_offset
+        if dframe is not None:
+            yield dframe
+
+def raw_rows_end(filepath, size):
+    """ Returns: byte offset just past the last complete (newline terminated)
+        row within the first size bytes of a raw datafile """
+    with open(filepath, 'rb') as datafile:
+        end = size
+        while end > 0:
+            start = max(0, end - TAIL_BLOCK_SIZE)
+            datafile.seek(start)
+            newline = datafile.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+def read_raw_header(filepath):
+    """ Returns: list of column labels in the first line of a raw datafile """
+    with open(filepath) as datafile:
+        return datafile.readline().rstrip('\r\n').split('\t')
+
+def _read_raw_datafile_c(source, columns=None, header=0):
+    """ Parse with the C engine. Every data column is declared with its compact
+        dtype up front (ON/OFF codes and Vsetpoint with their PARSE_DTYPES) and
+        the 'OFF' / 'No Reading' tokens are parsed straight to NaN, so no object
+        columns are ever created. Board column NaNs ('OFF') are
+        then set to 0. """
+    if columns is None:
+        columns = read_raw_header(source)
+    data_columns = [col for col in columns if col not in DATE_COLUMNS]
+    board_columns = HeaderSchema.of(columns).board_columns
+    dtypes = raw_column_dtypes(columns)
+    cast_dtypes = {col: dtype for col, dtype in dtypes.items() if dtype in PARSE_DTYPES}
+    parse_dtypes = dict(dtypes, **{col: PARSE_DTYPES[dtype] for col, dtype in cast_dtypes.items()})
+    parse_dtypes.update(dict.fromkeys(DATE_COLUMNS, str))
+    dframe = pd.read_csv(source, sep='\t', engine='c', dtype=parse_dtypes, header=header,
+                         names=columns, na_values=[OFF_READING, NO_READING])
+    date_time = pd.to_datetime(dframe[DATE_COLUMNS[0]] + ' ' + dframe[DATE_COLUMNS[1]],
+                               format=RAW_DATE_FORMAT)
+    dframe = dframe[data_columns].fillna(dict.fromkeys(board_columns, 0))
+    if cast_dtypes:
+        dframe = dframe.astype(cast_dtypes)
+    dframe.index = pd.DatetimeIndex(date_time, name=DATE_TIME)
+    return dframe
+
+def _read_raw_datafile_python(source, columns=None, header=0):
+    """ Parse with the python engine and a per row date parser (legacy path) """
+    dframe = pd.read_csv(source, parse_dates={DATE_TIME: [0, 1]},
+                         date_parser=DATE_PARSER, index_col=DATE_TIME,
+                         sep='\t', engine='python', header=header, names=columns)
+    dframe = dframe.replace([OFF_READING, NO_READING], [0, np.nan])
+    return dframe.astype(float).astype(raw_column_dtypes(dframe.columns))
+
+def raw_column_schema(dframes):
+    """ Returns: list of every column label in the input dataframes, in first seen order """
+    columns, seen = [], set()
+    for dframe in dframes:
+        for col in dframe.columns:
+            if col not in seen:
+                seen.add(col)
+                columns.append(col)
+    return columns
+
+def concat_raw_dataframes(dframes):
+    """ Assembles the per file dataframes of a test into a single dataframe
+    Args:
+        dframes (list of dataframes): Raw datafile dataframes in file (mtime) order
+    Returns:
+        dframe (dataframe): All scans. Files that are missing a column of the
+                            schema get NaN float readings for that column
+    """
+    if not dframes:
+        return pd.DataFrame()
+    columns = raw_column_schema(dframes)
+    dframes = [dframe if list(dframe.columns) == columns else dframe.reindex(columns=columns)
+               for dframe in dframes]
+    return pd.concat(share_categories(dframes))
+
+def share_categories(dframes):
+    """ Returns: dframes with every categorical column (Vsetpoint) recoded to the
+        sorted union of its categories in all of them. pd.concat keeps a column
+        categorical only if its categories are the same in every dataframe (e.g. -
+        not for datafiles or chunks run at different setpoints). """
+    if len(dframes) < 2:
+        return dframes
+    categories = {}
+    for dframe in dframes:
+        for col, dtype in dframe.dtypes.items():
+            if pd.api.types.is_categorical_dtype(dtype):
+                categories.setdefault(col, []).append(dtype.categories.values)
+    if not categories:
+        return dframes
+    for col in categories:  # e.g. - a column missing from a datafile (NaN floats)
+        categories[col].extend(dframe[col].dropna().unique() for dframe in dframes
+                               if not pd.api.types.is_categorical_dtype(dframe[col].dtype))
+    categories = {col: pd.Index(np.unique(np.concatenate(values)))
+                  for col, values in categories.items()}
+    shared = []
+    for dframe in dframes:
+        recode = [col for col in categories
+                  if not pd.api.types.is_categorical_dtype(dframe[col].dtype) or
+                  not dframe[col].cat.categories.equals(categories[col])]
+        if recode:
+            dframe = dframe.copy(deep=False)  # other columns are not copied
+            for col in recode:
+                dframe[col] = pd.Categorical(dframe[col], categories=categories[col])
+        shared.append(dframe)
+    return shared
@@ -8,30 +8,34 @@ data size analysis. """
 
 import os
 import re
-import itertools
+import numpy as np
 import pandas as pd
 
-from core.data_import.helpers import run_from_ipython, \
-                                     get_system_test_position_int, \
+from core.data_import.helpers import get_system_test_position_int, \
                                      copy_and_remove_b6_from, \
-                                     mask_to_mode
+                                     board_state_positions, \
+                                     reading_range
+from core.data_import.datafile import read_raw_datafiles, read_raw_datafile_rows, \
+                                      iter_raw_datafile_chunks, read_raw_header, \
+                                      raw_rows_end, raw_column_schema, concat_raw_dataframes
+from core.data_import.cache import DatafileCache
+from core.data_import.conditions import ConditionIndex
+from core.data_import.schema import HeaderSchema
+from core.data_import.partitions import PartitionStore
+from core.data_import.memmap_store import MemmapStore, sidecar_memmap_directory
+from core.sidecar import sidecar_cache_directory
 from core.data_import.board import Board, Outage
 from core.data_import.mode import Mode
+from core.analysis.stats import StreamingStats
 from core.exceptions.custom_exceptions import BoardNotFoundError
 from .. re_and_global import REGEX_RAW_DATAFILE, \
-                             REGEX_EMPTY_TEST_POSITION, \
-                             REGEX_TEMPS, \
-                             REGEX_BOARDS, \
-                             REGEX_SYSTEMS, \
-                             REGEX_VOLTAGE_SENSES, \
                              ON_OFF
 
-pd.options.mode.chained_assignment = None  # default='warn'
+OUTAGE_PARTITION = 'outage'  # partition of the outage board columns (out-of-core)
+CHUNK_FRACTION = 16  # out-of-core: raw text read at once is memory_budget / CHUNK_FRACTION
+STREAMING_MEMORY_BUDGET = 256  # MB, memory budget of streaming stats without one
 
 
-## parsing function for datetime index on dataframes
-DATE_PARSER = lambda x: pd.datetime.strptime(x, '%Y/%m/%d %H:%M:%S.%f')
-
 class TestStation(object):
     """
     Holds information and test data collected on a test station board.
@@ -40,17 +44,41 @@ class TestStation(object):
         folder => directory folder containing raw csv file data that was analyzed
         systems => list of used test positions and system numbers (also used for df query)
         boards => list of boards (as board objects) that were used for test
-        mode_df_dict =>
-        modes =>
+        mode_positions => mode id -> row positions of df in that mode
+        modes => Mode instances, whose rows are views (positions) into df
         df => dataframe that holds all board data
+        schema => HeaderSchema (column classification) of df, shared by the boards and modes
+        conditions => ConditionIndex of df rows at each temp/voltage condition
+        stats => StreamingStats of the modes (None unless streaming_stats), which
+                 replace the condition dataframes of each mode's hist_dict. They are
+                 updated from the chunks of the datafiles as they are read, so
+                 streaming stats read the test out-of-core (with a memory budget
+                 of STREAMING_MEMORY_BUDGET if none is set)
+        offsets => filename -> bytes of each datafile already ingested into df
+        num_rows => number of scans ingested
+        memory_budget => MB of test data held in memory at once. If set, the test
+                         is read out-of-core: the datafiles are read in chunks whose
+                         rows are routed to the modes and spilled to partitions
+                         (df keeps only the columns, stats are streamed)
+        partitions => PartitionStore of the spilled rows (None unless out-of-core)
+        store => MemmapStore of the rows of df in a sidecar folder of the data folder
+                 (None unless memmap), for reading time ranges of a few columns
     Essential Methods:
+        update => ingest only new datafiles and rows appended since the last
+                  build/update (real time mode)
+        last_scan_time => timestamp of the last scan
+        thermocouple_range => min and max reading of a thermocouple
+        outage_data => outage board data and its conditions
+        scan_data => columns of the scans between two timestamps
     """
 
     VSETPOINT = 'Vsetpoint'
     VSENSE1 = 'VSense1'
 
     def __init__(self, name, folder, boards, limits=None, run_limit_analysis=False,
-                 multimode=False, temperature_tolerance=3, voltage_tolerance=0.5, *temps):
+                 multimode=False, temperature_tolerance=3, voltage_tolerance=0.5, *temps,
+                 engine='c', workers=1, cache=False, streaming_stats=False,
+                 memory_budget=None, memmap=False):
         self.name = name
         self.folder = folder
         self.files = []
@@ -68,7 +96,9 @@ class TestStation(object):
         self.thermocouples = []
         self.on_off = [ON_OFF]
         self.df = pd.DataFrame() # 'mother' dataframe holds all measured data
-        self.mode_df_dict = {}  # holds mode_df for each data mask
+        self.schema = None  # HeaderSchema of df columns
+        self.mode_positions = {}  # mode id -> row positions of df in that mode
+        self.conditions = None  # row positions of df at each temp/voltage condition
         self.mode_ids = []
         self.modes = []
         self.multimode = multimode
@@ -76,19 +106,30 @@ class TestStation(object):
         self.out_of_spec_df = pd.DataFrame()
         self.error_msg = ''
         self.ambient = None
+        self.engine = engine  # raw datafile parser ('c' or legacy 'python')
+        self.workers = workers if workers else 1  # parallel raw datafile parsing processes
+        self.cache = cache  # keep parsed datafiles in a sidecar cache folder
+        if streaming_stats and not memory_budget:  # stats are fed from the datafile chunks
+            memory_budget = STREAMING_MEMORY_BUDGET
+        self.memory_budget = memory_budget  # MB, read out-of-core if set
+        self.partitions = PartitionStore() if memory_budget else None
+        self.memmap = memmap  # keep the rows in a sidecar memmap store
+        self.store = None  # MemmapStore of the rows (if memmap)
+        # accumulate mode stats instead of hist_dict dfs (always out-of-core)
+        self.streaming_stats = self.partitions is not None
+        self.num_rows = 0
+        self.stats = None  # StreamingStats of the modes (if streaming_stats)
+        self.offsets = {}  # filename -> bytes of datafile already in df
+        self.headers = {}  # filename -> column labels of datafile
+        self.last_times = {}  # filename -> timestamp of last scan of datafile in df
+        self.raw_columns = []  # every datafile column (before empty columns are deleted)
+        self.__modes_by_id = {}  # mode id -> Mode instance
+        self.__voltages = set()  # out-of-core: setpoints of every scan
+        self.__tc_ranges = {}  # out-of-core: thermocouple -> (min, max) reading
+        self.__last_time = None  # out-of-core: timestamp of the last scan
 
         self.__build_dataframe()
-        if not self.df.empty:
-            self.__scan_for_boards()
-            self.__scan_for_systems()
-            self.__scan_for_vsetpoints()
-            self.__scan_for_voltage_senses()
-            self.__scan_for_thermocouples()
-            self.__set_ambient_thermocouple()
-            self.__create_boards()
-            self.__set_current_board_ids()
-            self.__make_df_dict()
-            self.__make_modes()
+        self.__analyze_dataframe()
 
     def __repr__(self):
         return '{}: {} {}'.format(self.__class__.__name__,
@@ -99,60 +140,231 @@ class TestStation(object):
         using the pandas module """
         print('Scanning folder for datafiles...')
         if os.listdir(self.folder): # if folder not empty
-            datafiles = os.listdir(self.folder)
-            datafiles.sort(key=lambda fn: os.path.getmtime(os.path.join(self.folder, fn)))
-            for filenumber, filename in enumerate(datafiles):
+            for filenumber, filename in enumerate(self.__sorted_datafiles()):
                 if bool(re.search(REGEX_RAW_DATAFILE, filename)):  # valid board file
                     print('\tAppending file', '#'+str(filenumber+1)+': ', filename)
-                    try:
-                        if run_from_ipython():  # if running from ipython (jupyter)
-                            next_file_df = pd.read_csv(self.folder+'/'+ filename,
-                                                       parse_dates={'Date Time': [0, 1]},
-                                                       date_parser=DATE_PARSER,
-                                                       index_col='Date Time', sep='\t',
-                                                       engine='python')
-                        else:  # else running on local machine
-                            next_file_df = pd.read_csv( 
-                                               os.path.abspath(os.path.join(os.sep, self.folder, filename)),
-                                               parse_dates={'Date Time': [0, 1]}, date_parser=DATE_PARSER,
-                                               index_col='Date Time', sep='\t', engine='python')
-                    except Exception:
-                        print('The following error occurred while attempting to convert the ' \
-                              'data files to pandas dataframes:\n\n')
-                        raise
                     self.files.append(filename)
-                    self.df = self.df.append(next_file_df)
                 else:  # not a valid board file
                     print('\tSkipped file', '#'+str(filenumber+1)+': ', filename)
-            self.delete_empty_columns()
+            filepaths = [os.path.join(self.folder, filename) for filename in self.files]
+            sizes = [os.path.getsize(filepath) for filepath in filepaths]
+            for filename, filepath, size in zip(self.files, filepaths, sizes):
+                self.offsets[filename] = raw_rows_end(filepath, size)
+                self.headers[filename] = read_raw_header(filepath)
+            if self.partitions is not None:
+                self.__summarize_datafiles()
+                return
+            if self.workers > 1:
+                print('\tReading', len(self.files), 'files with', self.workers, 'workers...')
+            cache = DatafileCache(sidecar_cache_directory(self.folder)) if self.cache else None
             try:
-                self.df = self.df.replace(['OFF'], [0])
-                self.df = self.df.astype(float)
-            except TypeError as e:
-                pass
-            if self.df.empty:
-                self.error_msg = '\nNo files in the selected folder match ' + \
-                                 'the Labview raw datafile convention.\n'
+                complete_dfs = iter(read_raw_datafiles(
+                    [filepath for filename, filepath, size in zip(self.files, filepaths, sizes)
+                     if self.offsets[filename] == size],
+                    engine=self.engine, workers=self.workers, cache=cache))
+                file_dfs = []
+                for filename, filepath, size in zip(self.files, filepaths, sizes):
+                    if self.offsets[filename] == size:
+                        file_df = next(complete_dfs)
+                    else:  # last row is still being written, read only the complete rows
+                        file_df, self.offsets[filename] = read_raw_datafile_rows(
+                            filepath, self.headers[filename], 0, self.engine)
+                    if file_df is not None and not file_df.empty:
+                        self.last_times[filename] = file_df.index[-1]
+                        file_dfs.append(file_df)
+            except Exception:
+                print('The following error occurred while attempting to convert the ' \
+                      'data files to pandas dataframes:\n\n')
+                raise
+            self.raw_columns = raw_column_schema(file_dfs)
+            self.df = concat_raw_dataframes(file_dfs)  # single copy of all file data
+            self.delete_empty_columns()
+            self.num_rows = len(self.df)
+            self.__check_for_rows()
         else:
             self.error_msg = '\nThere are no datafiles in the selected folder.\n'
 
+    def __check_for_rows(self):
+        if not self.num_rows:
+            self.error_msg = '\nNo files in the selected folder match ' + \
+                             'the Labview raw datafile convention.\n'
+
+    def __chunk_bytes(self):
+        """ Returns: bytes of raw text read at once out-of-core """
+        return max(1, int(self.memory_budget * 1024**2) // CHUNK_FRACTION)
+
+    def __summarize_datafiles(self):
+        """ First out-of-core pass: reads the datafiles chunk by chunk, keeping
+            only the column schema, the first scan (to delete empty columns),
+            setpoints, thermocouple ranges and scan times. df has no rows. """
+        print('\tSummarizing', len(self.files), 'files in chunks of',
+              self.__chunk_bytes(), 'bytes...')
+        self.__voltages, self.__tc_ranges, self.__last_time = set(), {}, None
+        file_heads = []  # first scan of test + columns of every file
+        for filename in self.files:
+            filepath = os.path.join(self.folder, filename)
+            for chunk in iter_raw_datafile_chunks(filepath, self.headers[filename],
+                                                  self.__chunk_bytes(), self.engine,
+                                                  end=self.offsets[filename]):
+                if filename not in self.last_times:  # first chunk of file
+                    file_heads.append((chunk.iloc[:0] if file_heads else chunk.iloc[:1]).copy())
+                self.last_times[filename] = chunk.index[-1]
+                self.__summarize_chunk(chunk)
+        self.raw_columns = raw_column_schema(file_heads)
+        self.df = concat_raw_dataframes(file_heads)
+        self.delete_empty_columns()
+        self.df = self.df.iloc[:0]
+        self.__check_for_rows()
+
+    def __summarize_chunk(self, chunk):
+        """ Adds the setpoints, thermocouple ranges and scans of a chunk to the
+            out-of-core summary """
+        self.__voltages.update(chunk[self.VSETPOINT])
+        for tc in HeaderSchema.of(chunk.columns).thermocouples:
+            tc_min, tc_max = self.__tc_ranges.get(tc, (np.nan, np.nan))
+            chunk_min, chunk_max = reading_range(chunk[tc].values)
+            self.__tc_ranges[tc] = (np.fmin(tc_min, chunk_min), np.fmax(tc_max, chunk_max))
+        self.__last_time = chunk.index[-1]
+        self.num_rows += len(chunk)
+
+    def __sorted_datafiles(self):
+        """ Returns: list of files in folder, oldest modified first """
+        datafiles = os.listdir(self.folder)
+        datafiles.sort(key=lambda fn: os.path.getmtime(os.path.join(self.folder, fn)))
+        return datafiles
+
+    def __analyze_dataframe(self):
+        """ (Re)derives boards, systems, conditions, modes and their data from df """
+        self.boards, self.systems, self.voltages = [], [], []
+        self.voltage_senses, self.thermocouples = [], []
+        self.current_board_ids, self.mode_ids, self.modes = [], [], []
+        self.mode_positions, self.__modes_by_id = {}, {}
+        self.ambient, self.outage, self.conditions = None, False, None
+        self.schema = HeaderSchema.of(self.df.columns)
+        self.stats = StreamingStats(self.limits, self.run_limit_analysis) \
+                     if self.streaming_stats else None
+        if self.num_rows:
+            self.__scan_for_boards()
+            self.__scan_for_systems()
+            self.__scan_for_vsetpoints()
+            self.__scan_for_voltage_senses()
+            self.__scan_for_thermocouples()
+            self.__set_ambient_thermocouple()
+            self.__create_boards()
+            self.__set_current_board_ids()
+            self.__index_conditions()
+            fill_store = self.__open_store()
+            if self.partitions is not None:
+                self.__route_datafiles(fill_store)
+            else:
+                self.__make_mode_positions()
+                self.__make_modes()
+
+    def reload(self):
+        """ Re-reads every datafile in folder and rebuilds the station """
+        self.files, self.offsets, self.headers, self.last_times = [], {}, {}, {}
+        self.raw_columns, self.error_msg = [], ''
+        self.df, self.num_rows = pd.DataFrame(), 0
+        self.__build_dataframe()
+        self.__analyze_dataframe()
+
+    def update(self):
+        """ Ingests only the datafiles added to folder and the rows appended to
+            datafiles since the last build/update. The new rows are appended to
+            df, mode_positions and each mode's positions and hist_dict in place. Falls back
+            to a full reload if a datafile was truncated or brings new columns,
+            and re-derives the modes from df if new setpoints/modes appear.
+            Out-of-core, the new rows are routed to the mode partitions instead
+            (and new setpoints/modes re-route every datafile).
+        Returns:
+            num_rows (int): Number of new scans ingested
+        """
+        if not self.num_rows:
+            self.reload()
+            return self.num_rows
+        print('Scanning folder for new datafiles and rows...')
+        chunks = []
+        for filename in self.__sorted_datafiles():
+            if not re.search(REGEX_RAW_DATAFILE, filename):
+                continue
+            filepath = os.path.join(self.folder, filename)
+            if filename not in self.offsets:  # new datafile
+                print('\tAppending file', filename)
+                self.files.append(filename)
+                self.offsets[filename] = 0
+            elif os.path.getsize(filepath) < self.offsets[filename]:
+                print('\t', filename, 'was truncated - reloading all datafiles...')
+                self.reload()
+                return self.num_rows
+            if self.offsets[filename] == 0:  # header may have been incomplete
+                self.headers[filename] = read_raw_header(filepath)
+            chunk, self.offsets[filename] = read_raw_datafile_rows(  # rows past the offset
+                filepath, self.headers[filename], self.offsets[filename], self.engine)
+            if chunk is not None and not chunk.empty:
+                self.last_times[filename] = chunk.index[-1]
+                chunks.append(chunk)
+        if not chunks:
+            print('\tNo new rows.')
+            return 0
+        new_df = concat_raw_dataframes(chunks)
+        if not set(new_df.columns) <= set(self.raw_columns):
+            print('\tNew columns in datafiles - reloading all datafiles...')
+            self.reload()
+            return self.num_rows
+        new_df = new_df.reindex(columns=self.df.columns)  # without deleted empty columns
+        print('\tAppending', len(new_df), 'new rows.')
+        if self.store is not None:
+            self.store.append(new_df)
+            self.store.save(self.offsets)
+        offset = len(self.df)
+        if self.partitions is not None:
+            self.__summarize_chunk(new_df)
+        else:
+            self.df = concat_raw_dataframes([self.df, new_df])
+            self.num_rows = len(self.df)
+        new_mode_positions = self.__split_mode_positions(new_df)
+        if self.__conditions_changed(new_df, new_mode_positions):
+            print('\tNew setpoints or modes in data - rebuilding modes...')
+            self.__analyze_dataframe()
+            return len(new_df)
+        if self.partitions is not None:
+            self.__route_chunk(new_df)
+            return len(new_df)
+        new_conditions = ConditionIndex.from_dataframe(new_df, self.ambient,
+                                                       self.temperature_tolerance,
+                                                       self.temps, self.voltages)
+        self.conditions.append(new_conditions)
+        for mode_id, positions in new_mode_positions.items():
+            self.mode_positions[mode_id] = np.concatenate([self.mode_positions[mode_id],
+                                                           positions + offset])
+            if mode_id in self.__modes_by_id:
+                self.__modes_by_id[mode_id].extend(new_df.iloc[positions],
+                                                   new_conditions.subset(positions),
+                                                   positions + offset)
+        return len(new_df)
+
+    def __conditions_changed(self, new_df, new_mode_positions):
+        """ Returns: True if new rows bring setpoints, modes or thermocouple
+            misreadings that change what is derived from df """
+        if not set(new_df[self.VSETPOINT]) <= set(self.voltages):
+            return True
+        if not set(new_mode_positions) <= set(self.mode_ids):
+            return True
+        return any((new_df[tc] > 150).any() or (new_df[tc] < -150).any()
+                   for tc in self.thermocouples)
+
     def delete_empty_columns(self):
         """ Deletes empty test position and thermocouple columns in dataframe """
-        for col in self.df.columns.copy():
-            if re.search(REGEX_EMPTY_TEST_POSITION, col):
-                del self.df[col]
-        temps = list(filter(lambda col_name: re.search(REGEX_TEMPS, col_name), self.df.columns))
-        for temp_col in temps.copy():  # delete temperature columns with no readings
-            if self.df[temp_col][0] == 'No Reading':
+        schema = HeaderSchema.of(self.df.columns)
+        for col in schema.empty_test_positions:
+            del self.df[col]
+        for temp_col in schema.thermocouples:  # delete temperature columns with no readings
+            if pd.isnull(self.df[temp_col].iloc[0]):  # 'No Reading'
                 del self.df[temp_col]
 
     def __scan_for_boards(self):
         """ Scan for boards present in dataframe """
-        set_of_boards = set()
-        for col_name in self.df.columns:
-            if re.search(REGEX_BOARDS, col_name):
-                set_of_boards.add(re.search(REGEX_BOARDS, col_name).group())
-        present_board_ids = sorted(list(set_of_boards)) 
+        present_board_ids = list(self.schema.boards)
         if not self.board_ids:  # Real Time mode (autosense what boards are present)
             self.board_ids = present_board_ids
         else:  # Normal mode (boards to analyze are chosen by user)
@@ -163,31 +375,55 @@ class TestStation(object):
 
     def __scan_for_systems(self):
         """ Scans data for all systems and removes blank test positions """
-        set_of_systems = set()
-        for col_name in self.df.columns:
-            if re.search(REGEX_SYSTEMS, col_name):
-                system_name = re.search(REGEX_SYSTEMS, col_name).groups()[0]
-                set_of_systems.add(system_name)
-        self.systems = sorted(list(set_of_systems),
+        self.systems = sorted(self.schema.system_names,
                               key=lambda sys: get_system_test_position_int(sys))
 
     def __scan_for_voltage_senses(self):
         """ Scans for voltage sense columns """
-        for col_name in self.df.columns:
-            if re.search(REGEX_VOLTAGE_SENSES, col_name):
-                self.voltage_senses.append(col_name)
+        self.voltage_senses.extend(self.schema.voltage_senses)
 
     def __scan_for_thermocouples(self):
         """ Scans for thermocouple columns and removes those that have misreadings """
-        possible_thermocouples = []
-        for col_name in self.df.columns:
-            if re.search(REGEX_TEMPS, col_name):
-                possible_thermocouples.append(col_name)
-        for tc in possible_thermocouples:
-            tc_series = self.df[tc]
-            if not (tc_series > 150).any() and not (tc_series < -150).any():
+        for tc in self.schema.thermocouples:
+            tc_min, tc_max = self.thermocouple_range(tc)
+            if not tc_max > 150 and not tc_min < -150:
                 self.thermocouples.append(tc) # only thermocouples without test errors
 
+    def thermocouple_range(self, tc):
+        """ Returns: (min, max) reading of thermocouple tc (as written in the datafiles) """
+        if self.partitions is not None:
+            return self.__tc_ranges.get(tc, (np.nan, np.nan))
+        return reading_range(self.df[tc].values)
+
+    def last_scan_time(self):
+        """ Returns: timestamp of the last scan of the test """
+        if self.partitions is not None:
+            return self.__last_time
+        return self.df.index[-1]
+
+    def outage_data(self, columns):
+        """ Returns: dataframe holding the input outage board columns of every scan
+            (df itself in memory, the outage partition read back out-of-core) and
+            the ConditionIndex of its rows """
+        if self.partitions is None or OUTAGE_PARTITION not in self.partitions:
+            return self.df, self.conditions
+        dframe = self.partitions.read(OUTAGE_PARTITION)[columns]
+        return dframe, ConditionIndex.from_dataframe(dframe, self.ambient,
+                                                     self.temperature_tolerance)
+
+    def scan_data(self, columns, start=None, end=None):
+        """ Returns: dataframe of input df columns of the scans with timestamps from
+            start to end (inclusive, default: every scan). Read from the memmap store
+            if the test keeps one (only the pages of those rows and columns). """
+        if self.store is not None:
+            return self.store.read(columns, start, end)
+        dframe = self.df[columns]
+        if start is not None:
+            dframe = dframe[dframe.index >= pd.Timestamp(start)]
+        if end is not None:
+            dframe = dframe[dframe.index <= pd.Timestamp(end)]
+        return dframe
+
     def __set_ambient_thermocouple(self):
         """ Set ambient thermocouple to first thermocouple """
         if self.thermocouples:
@@ -214,55 +450,115 @@ class TestStation(object):
         self.current_board_ids = sorted([board.id for board in self.boards if not board.outage])
 
     def __scan_for_vsetpoints(self):
-        self.voltages = sorted(set(self.df[self.VSETPOINT]))
-
-    def __make_df_dict(self):
-        """ Outputs dictionary of ON time mask modes dataframes. This includes
-            all boards in df (even off ones, outage included). """
-        # TODO ==> refactor
-        if self.multimode:
-            # list of all combinations on/off
-            masks = [''.join(seq) for seq in itertools.product('01', repeat=len(self.boards))]
-            for mask in masks:  # retrieve only excited modes
-                if '1' not in mask:
-                    continue
-                mode = mask_to_mode(mask, self.board_ids)
-                # float type to compare with df board on/off col
-                float_mask = [float(digit) for digit in mask]
-                data = self.df.copy()  # make copy of 'mother' dataframe
-                # for each specific mode (mask), join together all board dfs that are ON in mask
-                i = 0
-                for i in range(len(mask)):
-                    board, on_off_state = self.boards[i].id, float_mask[i]
-                    data = data.loc[(self.df[board + ' ' + ON_OFF] == on_off_state)]
-                    i += 1
-                if not data.empty:
-                    self.mode_df_dict[mode] = data  # save mode data in dictionary with mode key
+        if self.partitions is not None:
+            self.voltages = sorted(self.__voltages)
+        else:
+            self.voltages = sorted(set(self.df[self.VSETPOINT]))
+
+    def __index_conditions(self):
+        """ Classifies the temp/voltage condition of every row of df once """
+        self.conditions = ConditionIndex.from_dataframe(self.df, self.ambient,
+                                                        self.temperature_tolerance,
+                                                        self.temps, self.voltages)
 
+    def __make_mode_positions(self):
+        """ Outputs dictionary of ON time mask modes row positions of df. This
+            includes all boards in df (even off ones, outage included). """
+        self.mode_positions = self.__split_mode_positions(self.df)
+        self.mode_ids = list(self.mode_positions.keys())  # assign mode ids
+        # sort by length first, then board number
+        self.mode_ids = sorted(sorted(self.mode_ids), key=lambda x: len(x))
+
+    def __split_mode_positions(self, df):
+        """ Returns: dictionary of mode id -> row positions of input df in that mode """
+        mode_positions = {}
+        if self.multimode:  # every observed on/off combination, in a single pass
+            mode_positions = board_state_positions(df, [board.id for board in self.boards])
         else: # (NOT multimode)
-            data = pd.DataFrame  # make copy of 'mother' dataframe
             for board in self.boards:
                 mode = board.id
                 if mode != 'TEMPORARY OUTAGE STRING': # TODO -> skip voltage/outage boards
-                    data = self.df.loc[(self.df[mode + ' ' + ON_OFF] == 1.0)]
-                    if not data.empty:
-                        self.mode_df_dict[mode] = data
-
-        self.mode_ids = list(self.mode_df_dict.keys())  # assign mode ids
-        # sort by length first, then board number
-        self.mode_ids = sorted(sorted(self.mode_ids), key=lambda x: len(x))
+                    positions = np.flatnonzero(df[mode + ' ' + ON_OFF].values == 1.0)
+                    if len(positions):
+                        mode_positions[mode] = positions
+        return mode_positions
 
     def __make_modes(self):
         """ Create Mode instances for each mode present in data and append to 'modes' attribute """
         for mode_id in self.mode_ids:
-            board_ids = self.get_current_boards_from_mode_id(mode_id)
-            mode_id_no_outage = ''.join(sorted(board_ids))
-            if len(board_ids) == 1:
-                self.modes.append(Mode(self, mode_id_no_outage, self.mode_df_dict[mode_id],
-                                       self.voltages, *self.temps))
-            elif len(board_ids) == 2 and self.boards_have_same_system_labels(*board_ids):
-                self.modes.append(Mode(self, mode_id_no_outage, self.mode_df_dict[mode_id],
-                                       self.voltages, *self.temps))
+            self.__make_mode(mode_id, self.mode_positions[mode_id],
+                             self.conditions.subset(self.mode_positions[mode_id]))
+
+    def __make_mode(self, mode_id, positions, conditions, partition=None):
+        """ Creates the Mode instance of mode_id, if it is analyzed (single boards
+            and pairs of boards with the same system labels) """
+        board_ids = self.get_current_boards_from_mode_id(mode_id)
+        mode_id_no_outage = ''.join(sorted(board_ids))
+        if len(board_ids) == 1 or \
+           (len(board_ids) == 2 and self.boards_have_same_system_labels(*board_ids)):
+            mode = Mode(self, mode_id_no_outage, positions, self.voltages, *self.temps,
+                        conditions=conditions, partition=partition)
+            self.modes.append(mode)
+            self.__modes_by_id[mode_id] = mode
+
+    def __route_datafiles(self, fill_store=False):
+        """ Second out-of-core pass: reads the datafiles chunk by chunk again and
+            routes the rows of each chunk to the modes (spilled to partitions),
+            writing them to the memmap store too if fill_store """
+        self.partitions.clear()
+        for filename in self.files:
+            filepath = os.path.join(self.folder, filename)
+            for chunk in iter_raw_datafile_chunks(filepath, self.headers[filename],
+                                                  self.__chunk_bytes(), self.engine,
+                                                  end=self.offsets[filename]):
+                chunk = chunk.reindex(columns=self.df.columns)
+                if fill_store:
+                    self.store.append(chunk)
+                self.__route_chunk(chunk)
+        if fill_store:
+            self.store.save(self.offsets)
+
+    def __open_store(self):
+        """ Opens the memmap store of the data folder (if memmap). A store that does
+            not hold exactly the ingested rows is rewritten: from df in memory, by
+            the routing pass out-of-core.
+        Returns:
+            fill_store (bool): True if the routing pass has to write the store
+        """
+        self.store = None
+        if not self.memmap:
+            return False
+        store = MemmapStore(sidecar_memmap_directory(self.folder))
+        if not store.enabled:
+            return False
+        self.store = store
+        if store.matches(self.df.columns, self.offsets):
+            return False
+        print('\tWriting memmap store of the datafiles...')
+        store.clear()
+        if self.partitions is not None:
+            return True
+        store.append(self.df)
+        store.save(self.offsets)
+        return False
+
+    def __route_chunk(self, chunk):
+        """ Routes the rows of a chunk (with the columns of df) to the modes and
+            spills them to the partitions (out-of-core) """
+        conditions = ConditionIndex.from_dataframe(chunk, self.ambient, self.temperature_tolerance,
+                                                   self.temps, self.voltages)
+        for mode_id, positions in self.__split_mode_positions(chunk).items():
+            if mode_id not in self.mode_ids:  # first rows of mode
+                self.mode_ids.append(mode_id)
+                self.mode_ids = sorted(sorted(self.mode_ids), key=lambda x: len(x))
+                self.__make_mode(mode_id, [], conditions.subset([]), mode_id)
+                self.modes = [self.__modes_by_id[known_id] for known_id in self.mode_ids
+                              if known_id in self.__modes_by_id]
+            if mode_id in self.__modes_by_id:
+                self.__modes_by_id[mode_id].extend(chunk.iloc[positions],
+                                                   conditions.subset(positions))
+        if self.outage:
+            self.partitions.append(OUTAGE_PARTITION, chunk[self.outage.analysis_columns()])
 
     def get_current_boards_from_mode_id(self, mode_id):
         """ Gets current board ids for input mode
@@ -5,8 +5,11 @@ This module contains helper functions...
 """
 
 import re
+import numpy as np
+import pandas as pd
 from core.re_and_global import VSETPOINT, ON_OFF
 
+READING_DIGITS = (6, 7, 8, 9)  # significant digits of float32 readings (6: %g)
 
 def rename_columns(mdf, board, columns):
     """ Renames columns of input dataframe by adding board number to the col labels.
@@ -47,6 +50,32 @@ def mask_to_mode(mask, board_ids):
         i += 1
     return mode
 
+def board_state_positions(df, board_ids):
+    """ Partitions the rows of input dataframe into the modes (board ON/OFF
+        combinations) observed in it. The ON/OFF states of each row are encoded
+        into a single integer mask code (first board is the most significant bit)
+        and rows are grouped by code in one pass, so only observed modes are built.
+        Rows where any board is not 0 (OFF) or 1 (ON), e.g. flashing, and rows
+        where all boards are OFF are left out.
+    Args:
+        df (dataframe): Dataframe with a 'Bx ON/OFF' column for each board
+        board_ids (list): Board ids in mask order (e.g. - ['B3', 'B4'])
+    Returns:
+        mode_positions (dict): mode (e.g. - 'B3B4') -> sorted row positions in that mode
+    """
+    states = df[[board_id + ' ' + ON_OFF for board_id in board_ids]].values
+    valid = ((states == 0) | (states == 1)).all(axis=1)
+    weights = 2 ** np.arange(len(board_ids) - 1, -1, -1, dtype=np.int64)
+    codes = np.where(valid, states.dot(weights), -1).astype(np.int64)
+    mode_positions = {}
+    groups = pd.Series(codes).groupby(codes).indices  # code -> row positions
+    for code in sorted(groups):
+        if code <= 0:  # all boards OFF or a board not ON/OFF
+            continue
+        mask = format(code, '0' + str(len(board_ids)) + 'b')
+        mode_positions[mask_to_mode(mask, board_ids)] = groups[code]
+    return mode_positions
+
 def copy_and_remove_b6_from(list_of_boards):
     """ Removes B6 (Outage) from input board list
     Args:
@@ -121,54 +150,66 @@ def filter_board_on_or_off(df, board_id, board_on_off_code):
     return dframe
 
 # Stats helpers
-def get_system_stats_at_mode_temp_voltage(system, mode, temp, voltage):
-    """ Get basic stats for input system at mode/temp/voltage condition
-    Args:
-        system (string): Dataframe column name/label of system to be analyzed
-        mode (Mode object): Mode to be analyzed
-        temp (int): Temperature condition to analyze at
-        voltage (float): Voltage condition to analyze at
-    Returns:
-        stats at mode/temp/voltage condition (tuple): min, max, mean, stdev
-    """
-    decimal_places = 3
-    if temp in mode.hist_dict:
-        if voltage in mode.hist_dict[temp]:
-            series = mode.hist_dict[temp][voltage][system]
-            if not series.empty:
-                return round(series.min(), decimal_places),  \
-                       round(series.max(), decimal_places),  \
-                       round(series.mean(), decimal_places), \
-                       round(series.std(), decimal_places)
-    return 'NA', 'NA', 'NA', 'NA'
+def reading_value(value):
+    """ Returns: float64 of a (float32) reading as it was written in the raw
+        datafile (e.g. - 0.31, not 0.3100000023841858), so displayed and rounded
+        readings do not depend on the precision they are stored in """
+    return np.float64(str(value))
 
-def get_vsense_stats_at_mode_temp_voltage(vsense, mode, temp, voltage):
-    """ Return basic stats for vsense at mode/temp/voltage condition """
+def reading_values(values):
+    """ Returns: float64 array of (float32) readings as written in the raw datafile,
+        the vectorized reading_value. Each reading is rounded to the fewest
+        significant digits that give back the same float32, so sums (means,
+        deviations) are the sums of the datafile values. """
+    values = np.asarray(values)
+    if values.dtype != np.float32:
+        return values.astype(np.float64, copy=False)
+    readings = values.astype(np.float64)
+    flat_readings, values = readings.reshape(-1), values.reshape(-1)  # e.g. - rows x systems
+    pending = np.flatnonzero(np.isfinite(flat_readings) & (flat_readings != 0))
+    for digits in READING_DIGITS:
+        if not len(pending):
+            break
+        pending_readings = flat_readings[pending]
+        decimals = digits - 1 - np.floor(np.log10(np.abs(pending_readings))).astype(np.int64)
+        scale = 10.0 ** np.abs(decimals)
+        rounded = np.where(decimals >= 0, np.round(pending_readings * scale) / scale,
+                           np.round(pending_readings / scale) * scale)
+        written = rounded.astype(np.float32) == values[pending]
+        flat_readings[pending[written]] = rounded[written]
+        pending = pending[~written]
+    return readings
+
+def reading_range(values):
+    """ Returns: (min, max) of an array of readings as written in the raw
+        datafile (NaN if there is no reading) """
+    if not len(values) or np.isnan(values).all():
+        return np.nan, np.nan
+    return reading_value(np.nanmin(values)), reading_value(np.nanmax(values))
+
+def get_series_stats(series):
+    """ Return basic stats (min, max, mean, stdev) of series already filtered
+        to a temp/voltage condition (e.g. - outage currents of a system) """
     decimal_places = 3
-    dframe = filter_temp_and_voltage(mode.df, mode.test.ambient, temp,
-                                     voltage, mode.test.temperature_tolerance)
-    series = dframe[vsense]
     if not series.empty:
-        return round(series.min(), decimal_places),  \
-               round(series.max(), decimal_places),  \
+        series_min, series_max = reading_range(series.values)
+        series = pd.Series(reading_values(series.values))
+        return round(series_min, decimal_places),  \
+               round(series_max, decimal_places),  \
                round(series.mean(), decimal_places), \
                round(series.std(), decimal_places)
     return 'NA', 'NA', 'NA', 'NA'
 
-# Outage analysis helpers
-def get_outage_stats_at_temp_voltage(df, board, system, temp, voltage):
-    """ Return basic stats for outage at temp/voltage condition """
+def rounded_stats(row):
+    """ Return min, max, mean, stdev of a stats table row (see core.analysis.stats)
+        rounded for display ('NA' if there is no data at the condition) """
     decimal_places = 3
-    dframe = filter_temp_and_voltage(df, board.test.ambient, temp, voltage, \
-                                     board.test.temperature_tolerance)
-    series = dframe[system]
-    if not series.empty:
-        return round(series.min(), decimal_places),  \
-               round(series.max(), decimal_places),  \
-               round(series.mean(), decimal_places), \
-               round(series.std(), decimal_places)
-    return 'NA', 'NA', 'NA', 'NA'
+    if row is None:
+        return 'NA', 'NA', 'NA', 'NA'
+    return tuple(round(np.float64(row[stat]), decimal_places)
+                 for stat in ('min', 'max', 'mean', 'std'))
 
+# Outage analysis helpers
 def get_outage_off_stats_single_sys(df, board, system, temp):
     """ Return outage stats for input system at input temp """
     decimal_places = 3
@@ -202,17 +243,23 @@ def count_num_out_of_spec(series, lower_limit, upper_limit):
     """
     total_count = series.count()
     count_out_of_spec = series[(series < lower_limit) | (series > upper_limit)].count()
+    return total_count, count_out_of_spec, format_percent_out(count_out_of_spec, total_count)
+
+def format_percent_out(count_out_of_spec, total_count):
+    """ Return percentage of scans outside of limits (e.g. - '12.50%') """
     if total_count == 0:
-        percent_out = '0.0%'
-    else:
-        percent_out = '%.2f' % (round(count_out_of_spec/total_count, 4)*100)
-        percent_out += '%'
-    return total_count, count_out_of_spec, percent_out
+        return '0.0%'
+    return '%.2f' % (round(count_out_of_spec/total_count, 4)*100) + '%'
 
 def write_out_of_spec_to_file(file, df, mode, temp, voltage, analysis_type):
-    """ Append out of spec mode/temp/voltage condition to out of spec file """
+    """ Append out of spec mode/temp/voltage condition to out of spec file. The
+        (int8) board ON/OFF codes are written as floats (e.g. - '1.0'), as they
+        were before the compact column schema. """
     condition_header = '\t'.join(['\n\n\n\n\n' + str(temp) + u'\N{DEGREE SIGN}C',
                           mode.name, str(voltage) + 'V' + '\t' + str(analysis_type), '\n'])
+    on_off_codes = [col for col in df.columns if df[col].dtype.kind in 'iu']
+    if on_off_codes:
+        df = df.astype(dict.fromkeys(on_off_codes, np.float64))
     file.write(condition_header, df)
 
 # Miscellaneous helpers
@@ -0,0 +1,261 @@
+#!/usr/bin/python3
+
+"""
+This module contains the MemmapStore class which keeps the rows of a test as
+fixed-width binary column arrays (one file per column, plus the scan timestamps)
+in a sidecar folder next to the raw data. The arrays are memory mapped, so
+opening a store only reads its manifest, and reading a time range of a few
+columns only touches the pages of those rows and columns.
+"""
+
+import os
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from core.data_import.datafile import DATE_TIME
+
+
+MEMMAP_FOLDER = '.test-analysis-memmap'
+STORE_VERSION = 3  # bump when the column file layout changes
+MANIFEST = 'manifest.json'
+TIME_FILE = 'time.bin'
+TIME_DTYPE = np.int64  # scan timestamps, nanoseconds since epoch
+CATEGORY_CODE_DTYPE = np.int16  # codes of categorical columns (e.g. - Vsetpoint)
+
+
+def sidecar_memmap_directory(folder):
+    """ Returns: path of the memmap store folder kept inside a test data folder """
+    return os.path.join(folder, MEMMAP_FOLDER)
+
+def timestamp_value(timestamp):
+    """ Returns: nanoseconds since epoch of a timestamp (string, datetime or Timestamp) """
+    return pd.Timestamp(timestamp).value
+
+
+class MemmapStore(object):
+    """
+    Rows of a test as memory mapped column arrays, in scan (df) order.
+
+    Attributes:
+        directory (string): Folder holding the column files and manifest
+        columns (list): Column labels, in df order
+        dtypes (dict): Column label -> numpy dtype of its fixed-width array
+        categories (dict): Categorical column label -> list of its categories (the
+                           column array holds codes into it, -1 for NaN)
+        num_rows (int): Number of rows stored
+        sources (dict): Datafile name -> bytes of it stored (to check that the
+                        store is up to date with the raw datafiles)
+        is_sorted (bool): True if the rows are in timestamp order (else a time
+                          ordering of the rows is computed when first needed)
+        enabled (bool): False if the store folder can't be written
+    Essential methods:
+        matches: True if the store holds the input columns and datafile bytes
+        append: Writes rows (indexed by 'Date Time') to the end of the columns
+        positions: Row positions between two timestamps
+        read: Dataframe of some columns between two timestamps
+        take: Dataframe of some columns at row positions
+        save: Writes the manifest to disk
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = []
+        self.dtypes = {}
+        self.categories = {}
+        self.num_rows = 0
+        self.sources = {}
+        self.is_sorted = True
+        self.enabled = True
+        self.__maps = {}  # column label (or TIME_FILE) -> memmap of its file
+        self.__order = None  # row positions in timestamp order (if not is_sorted)
+
+        self.__load_manifest()
+
+    def __repr__(self):
+        return '{}: {} ({} rows, {} columns)'.format(self.__class__.__name__, self.directory,
+                                                     self.num_rows, len(self.columns))
+
+    def __len__(self):
+        return self.num_rows
+
+    def __contains__(self, column):
+        return column in self.dtypes
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST)
+
+    def __load_manifest(self):
+        """ Read manifest from store folder, creating the folder if needed """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            print('\tMemmap store disabled, could not create', self.directory, '-', e)
+            self.enabled = False
+            return
+        try:
+            with open(self.manifest_path) as manifest:
+                contents = json.load(manifest)
+            if contents.get('version') == STORE_VERSION:
+                self.columns = [column for column, dtype in contents['columns']]
+                self.dtypes = {column: np.dtype(dtype) for column, dtype in contents['columns']}
+                self.categories = contents['categories']
+                self.num_rows = contents['num_rows']
+                self.sources = contents['sources']
+                self.is_sorted = contents['sorted']
+        except (OSError, ValueError, KeyError, TypeError):
+            self.clear()
+        if not self.__files_complete():  # appended rows of an unsaved session
+            self.clear()
+
+    def __column_file(self, column):
+        """ Returns: path of the binary file of a column (TIME_FILE for the timestamps) """
+        filename = TIME_FILE if column == TIME_FILE else 'c' + str(self.columns.index(column)) + '.bin'
+        return os.path.join(self.directory, filename)
+
+    def __files_complete(self):
+        """ Returns: True if every column file holds exactly num_rows values """
+        for column, dtype in [(TIME_FILE, np.dtype(TIME_DTYPE))] + \
+                             [(column, self.dtypes[column]) for column in self.columns]:
+            filepath = self.__column_file(column)
+            size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+            if size != self.num_rows * dtype.itemsize:
+                return False
+        return True
+
+    def matches(self, columns, sources):
+        """ Returns: True if the store holds exactly the input columns and the
+            input datafile bytes (dict of datafile name -> bytes) """
+        return self.enabled and self.num_rows > 0 and list(columns) == self.columns and \
+               {filename: int(size) for filename, size in sources.items()} == self.sources
+
+    def append(self, dframe):
+        """ Writes the rows of dframe (indexed by 'Date Time', with the store's
+            columns if it has rows) to the end of the column files """
+        if not self.enabled or dframe.empty:
+            return
+        if not self.columns:
+            self.columns = list(dframe.columns)
+            self.categories = {column: [] for column in self.columns
+                               if pd.api.types.is_categorical_dtype(dframe[column].dtype)}
+            self.dtypes = {column: np.dtype(CATEGORY_CODE_DTYPE) if column in self.categories
+                           else dframe[column].values.dtype for column in self.columns}
+        elif list(dframe.columns) != self.columns:
+            raise ValueError('Rows have columns {} instead of the store columns {}'.format(
+                             list(dframe.columns), self.columns))
+        times = dframe.index.values.astype('datetime64[ns]').view(TIME_DTYPE)
+        if self.num_rows:
+            last_time = self.__memmap(TIME_FILE)[-1]
+            self.is_sorted = self.is_sorted and bool(times[0] >= last_time)
+        self.is_sorted = self.is_sorted and bool((np.diff(times) >= 0).all())
+        self.__write(TIME_FILE, times)
+        for column in self.columns:
+            if column in self.categories:
+                self.__write(column, self.__category_codes(column, dframe[column]))
+            else:
+                self.__write(column, np.asarray(dframe[column].values, dtype=self.dtypes[column]))
+        self.num_rows += len(dframe)
+        self.__maps, self.__order = {}, None
+
+    def __category_codes(self, column, series):
+        """ Returns: codes of the values of series in the categories of a categorical
+            column (values not in them yet are added to its categories) """
+        values = series.values if pd.api.types.is_categorical_dtype(series.dtype) \
+                 else pd.Categorical(series.values)
+        categories = self.categories[column]
+        categories.extend(category for category in values.categories.tolist()
+                          if category not in categories)
+        codes = pd.Index(categories).get_indexer(values.categories)
+        return np.append(codes, -1)[values.codes].astype(CATEGORY_CODE_DTYPE)  # NaN: -1
+
+    def __write(self, column, values):
+        with open(self.__column_file(column), 'ab') as column_file:
+            np.ascontiguousarray(values).tofile(column_file)
+
+    def __memmap(self, column):
+        """ Returns: read only memory map of a column file """
+        if column not in self.__maps:
+            dtype = TIME_DTYPE if column == TIME_FILE else self.dtypes[column]
+            self.__maps[column] = np.memmap(self.__column_file(column), dtype=dtype,
+                                            mode='r', shape=(self.num_rows,)) \
+                                  if self.num_rows else np.empty(0, dtype=dtype)
+        return self.__maps[column]
+
+    def positions(self, start=None, end=None):
+        """ Returns: positions (slice if the rows are in timestamp order, else numpy
+            array) of the rows with timestamps from start to end (inclusive) """
+        times = self.__memmap(TIME_FILE)
+        if not self.is_sorted:
+            if self.__order is None:
+                self.__order = np.argsort(times, kind='mergesort')
+            times = times[self.__order]
+        low = 0 if start is None else int(np.searchsorted(times, timestamp_value(start), 'left'))
+        high = len(times) if end is None else \
+               int(np.searchsorted(times, timestamp_value(end), 'right'))
+        if self.is_sorted:
+            return slice(low, max(low, high))
+        return np.sort(self.__order[low:high])
+
+    def read(self, columns=None, start=None, end=None):
+        """ Returns: dataframe of columns (default: every column) with timestamps
+            from start to end (inclusive) """
+        return self.take(self.positions(start, end), columns)
+
+    def take(self, positions, columns=None):
+        """ Returns: dataframe of columns (default: every column) at row positions
+            (slice or numpy array) """
+        columns = self.columns if columns is None else columns
+        index = pd.DatetimeIndex(np.array(self.__memmap(TIME_FILE)[positions])
+                                 .view('datetime64[ns]'), name=DATE_TIME)
+        return pd.DataFrame({column: self.__column_values(column, positions)
+                             for column in columns}, index=index, columns=columns)
+
+    def __column_values(self, column, positions):
+        """ Returns: values of a column at row positions (a Categorical of the
+            codes of a categorical column) """
+        values = np.array(self.__memmap(column)[positions])
+        if column in self.categories:
+            return pd.Categorical.from_codes(values, self.categories[column])
+        return values
+
+    def save(self, sources=None):
+        """ Write manifest to disk (atomically replaces the previous manifest)
+        Args:
+            sources (dict): Datafile name -> bytes of it stored (default: unchanged)
+        """
+        if not self.enabled:
+            return
+        if sources is not None:
+            self.sources = {filename: int(size) for filename, size in sources.items()}
+        temp_path = self.manifest_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as manifest:
+                json.dump({'version': STORE_VERSION, 'num_rows': self.num_rows,
+                           'sorted': self.is_sorted, 'sources': self.sources,
+                           'columns': [[column, self.dtypes[column].str] for column in self.columns],
+                           'categories': self.categories},
+                          manifest)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            print('\tCould not save memmap store manifest -', e)
+
+    def clear(self):
+        """ Deletes every row and column of the store """
+        self.__maps, self.__order = {}, None
+        self.columns, self.dtypes, self.num_rows, self.sources = [], {}, 0, {}
+        self.categories = {}
+        self.is_sorted = True
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.bin'):
+                os.remove(os.path.join(self.directory, filename))
+
+    def close(self):
+        """ Releases the memory maps of the column files """
+        self.__maps, self.__order = {}, None
+
+    def delete(self):
+        """ Deletes the store folder """
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -6,21 +6,24 @@ project. For eaxample, "DRL" or "Park" or "Park+Turn" could be modes.
 """
 
 import re
+import numpy as np
 import pandas as pd
 from lxml import etree
 
 from core.data_import.helpers import copy_and_remove_b6_from, \
-                                     filter_temp_and_voltage, \
-                                     get_system_stats_at_mode_temp_voltage, \
                                      check_if_out_of_spec, \
-                                     count_num_out_of_spec, \
-                                     get_vsense_stats_at_mode_temp_voltage, \
+                                     format_percent_out, \
+                                     reading_values, \
+                                     rounded_stats, \
                                      write_out_of_spec_to_file
 
 from core.data_import.rotating_file import RotatingFile
+from core.data_import.conditions import ConditionIndex
 
-from core.limits_import.limits import get_limits_for_system_with_binning, \
-                                      get_limits_at_mode_temp_voltage
+from core.limits_import.limits import get_system_bin, get_system_limits, \
+                                     get_limits_at_mode_temp_voltage
+
+from core.re_and_global import OUTPUT_FOLDER
 
 
 class Mode(object):
@@ -32,16 +35,29 @@ class Mode(object):
         board_mode => boards that are ON in this mode (e.g. - 'B3B4')
         temps => temperatures at which test data is analyzed
         systems => test system headers with mode_tag appended to each (for query on test mdf)
-        hist_dict => temp key, voltage key, then currents df queried with that temp/voltage combo
-        df => dataframe of only data when this mode is in operation
+        hist_dict => temp key, voltage key, then number of rows at that temp/voltage combo
+        positions => row positions of test.df while this mode is in operation (the
+                     mode's rows are views into the test's df, not copies)
+        df => dataframe of only data when this mode is in operation, built on
+              demand from positions (read back from the test's partitions if the
+              mode's rows are spilled to disk)
+        conditions => ConditionIndex of df rows at each temp/voltage condition
+        partition => key of the mode's rows in test.partitions (None if in memory)
 
     Essential methods:
+        condition_df => rows of df at a temp/voltage condition
+        condition_values => values of a df column at a temp/voltage condition
+        condition_series => series of a df column at a temp/voltage condition
+        time_range_df => rows of df between two timestamps
 
     """
     VSETPOINT = 'Vsetpoint'
 
-    def __init__(self, test, board_mode, df, voltages, *temps):
+    def __init__(self, test, board_mode, positions, voltages, *temps, conditions=None,
+                 partition=None):
         self.test = test
+        self.partition = partition  # out-of-core test: rows are spilled to test.partitions
+        self.__conditions_version = 0  # partition version the spilled conditions index
         self.board_mode = board_mode # board id(s) (e.g. - 'B3B4')
         self.name = self.board_mode # name of mode (e.g. - 'DRLTURN'), to be pulled from limits
         self.temps = temps
@@ -49,17 +65,21 @@ class Mode(object):
         self.current_board_ids = re.findall('B[]0-9]*', board_mode) # find boards present in mode
         self.boards = [board for board in self.test.boards if board.id in self.current_board_ids]
         self.systems = []
-        self.hist_dict = {}  # temp -> voltage -> df of currents only at that temp/voltage combo
+        self.hist_dict = {}  # temp -> voltage -> number of rows at that temp/voltage combo
         self.multimode = False  # placeholder -> scans later to check if multimode or not
-        self.df = pd.DataFrame() # dataframe of mode currents (added together if multi-mode)
+        self.positions = np.asarray(positions, dtype=np.int64)  # rows of test.df in mode
+        self.multimode_currents = None  # rows x systems summed currents (if multimode)
         self.voltage_senses = [] # holds voltage sense positions for boards on in mode
         self.out_of_spec = pd.DataFrame()
         self.has_led_binning = False
         self.led_bins = []
+        self.system_bins = []  # LED bin of each system (if LED binning)
+        self.conditions = conditions if conditions is not None else \
+                          test.conditions.subset(self.positions)
 
         self.__scan_for_multimode()
         self.__set_systems()
-        self.__create_hist_dict(df)
+        self.__create_hist_dict()
         self.__scan_for_voltage_senses()
         self.__get_mode_name_and_set_binning()
 
@@ -67,6 +87,25 @@ class Mode(object):
         return '{}: {} ({})'.format(self.__class__.__name__,
                                     self.name, self.board_mode)
 
+    @property
+    def df(self):
+        return self.__rows_df()
+
+    @property
+    def conditions(self):
+        if self.partition is not None:  # index the spilled rows when they are read back
+            version = self.test.partitions.version(self.partition)
+            if version and version != self.__conditions_version:
+                self.__conditions = ConditionIndex.from_dataframe(
+                    self.test.partitions.read(self.partition), self.test.ambient,
+                    self.test.temperature_tolerance, self.temps, self.voltages)
+                self.__conditions_version = version
+        return self.__conditions
+
+    @conditions.setter
+    def conditions(self, conditions):
+        self.__conditions = conditions
+
     def __scan_for_multimode(self):
         """ Check if mode is multimode (current sharing with multiple modules) """
         if len(self.current_board_ids) > 1:
@@ -85,28 +124,128 @@ class Mode(object):
         else:
             self.systems = self.boards[0].systems
 
-    def __create_hist_dict(self, df):
-        """ Creates histogram dictionary, which holds a series for each
-            system's currents at each temperature/voltage condition """
+    def __create_hist_dict(self):
+        """ Creates histogram dictionary, which holds the number of rows at
+            each temperature/voltage condition (the rows themselves are read
+            through condition_df/condition_values) """
+        if self.multimode and self.partition is None:
+            self.multimode_currents = self.sum_multimode_currents(self.test.df, self.positions)
         for temp in self.temps:
             self.hist_dict[temp] = dict.fromkeys(self.voltages)
             for voltage in self.voltages:
-                self.df = self.create_multimode_cols(df)
-                dframe = filter_temp_and_voltage(self.df, self.test.ambient, temp,
-                                                 voltage, self.test.temperature_tolerance)
-                if not dframe.empty:
-                    self.hist_dict[temp][voltage] = dframe
+                rows = self.conditions.rows(temp, voltage)
+                if len(rows):
+                    self.hist_dict[temp][voltage] = len(rows)
                 else:
                     self.hist_dict[temp].pop(voltage, None)
             if not self.hist_dict[temp]:
                 self.hist_dict.pop(temp, None)
 
+    def __frame(self):
+        """ Returns: (dataframe holding the rows of this mode, positions of the
+            mode's rows in it or None if it holds only the mode's rows) """
+        if self.partition is not None:
+            dframe = self.test.partitions.read(self.partition)
+            if dframe is not None:
+                return dframe, None
+        return self.test.df, self.positions
+
+    def __rows_df(self, rows=None, frame=None):
+        """ Returns: dataframe of the mode's rows at positions rows (default: every
+            row of the mode), with the multimode columns (frame: __frame() if
+            already read) """
+        dframe, positions = self.__frame() if frame is None else frame
+        if positions is not None:
+            dframe = dframe.iloc[positions if rows is None else positions[rows]]
+        elif rows is not None:
+            dframe = dframe.iloc[rows]
+        if self.multimode_currents is not None:
+            currents = self.multimode_currents if rows is None else self.multimode_currents[rows]
+            dframe = pd.concat([dframe, pd.DataFrame(currents, index=dframe.index,
+                                                     columns=self.systems)], axis=1)
+        return dframe
+
+    def condition_df(self, temp, voltage):
+        """ Returns: rows of df at temp/voltage condition """
+        return self.__rows_df(self.conditions.rows(temp, voltage))
+
+    def __values(self, column, rows, frame=None):
+        """ Returns: values (numpy array) of df column at the mode's rows at positions
+            rows (frame: __frame() if already read) """
+        if self.multimode_currents is not None and column in self.systems:
+            return self.multimode_currents[rows, self.systems.index(column)]
+        dframe, positions = self.__frame() if frame is None else frame
+        values = dframe[column].values
+        return values[rows] if positions is None else values[positions[rows]]
+
+    def condition_values(self, column, temp, voltage):
+        """ Returns: values (numpy array) of df column at temp/voltage condition """
+        return self.__values(column, self.conditions.rows(temp, voltage))
+
+    def conditions_block(self, columns, conditions):
+        """ Returns: array (rows x columns) of the values of df columns at the rows of
+            each (temp, voltage) of conditions, concatenated in order, and the list
+            of the number of rows of each condition """
+        rows = [self.conditions.rows(temp, voltage) for temp, voltage in conditions]
+        counts = [len(condition_rows) for condition_rows in rows]
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        return self.__values_block(list(columns), rows, self.__frame()), counts
+
+    def condition_series(self, column, temp, voltage):
+        """ Returns: series of df column at temp/voltage condition """
+        return pd.Series(self.condition_values(column, temp, voltage), name=column)
+
+    def time_range_df(self, start=None, end=None):
+        """ Returns: rows of df with timestamps from start to end (inclusive, default:
+            every row), e.g. - a zoomed time window of a plot """
+        if start is None and end is None:
+            return self.df
+        dframe, positions = self.__frame()
+        times = dframe.index.values if positions is None else dframe.index.values[positions]
+        in_range = np.ones(len(times), dtype=bool)
+        if start is not None:
+            in_range &= times >= np.datetime64(pd.Timestamp(start))
+        if end is not None:
+            in_range &= times <= np.datetime64(pd.Timestamp(end))
+        return self.__rows_df(np.flatnonzero(in_range))
+
+    def extend(self, df, conditions=None, positions=None):
+        """ Appends newly ingested rows of this mode to positions and hist_dict (real
+            time mode), or spills them to the mode's partition (out-of-core test)
+        Args:
+            df (dataframe): New rows of test data while this mode is in operation
+            conditions (ConditionIndex): Conditions of the new rows (default: classified here)
+            positions (numpy array): Row positions of the new rows in test.df (in memory)
+        Returns:
+            None
+        """
+        if conditions is None:
+            conditions = ConditionIndex.from_dataframe(df, self.test.ambient,
+                                                       self.test.temperature_tolerance)
+        if self.partition is not None:
+            dframe = self.create_multimode_cols(df)
+            self.test.partitions.append(self.partition, dframe)
+        else:
+            dframe = None  # new rows are read back through positions
+            self.positions = np.concatenate([self.positions, positions])
+            if self.multimode:
+                self.multimode_currents = np.concatenate(
+                    [self.multimode_currents, self.sum_multimode_currents(df)])
+            self.conditions.append(conditions)
+        for temp in self.temps:
+            for voltage in self.voltages:
+                rows = conditions.rows(temp, voltage)
+                if not len(rows):
+                    continue
+                voltage_dict = self.hist_dict.setdefault(temp, {})
+                voltage_dict[voltage] = voltage_dict.get(voltage, 0) + len(rows)
+                if self.test.stats is not None:  # out-of-core (streamed from the chunks)
+                    self.test.stats.update(self.test, self, temp, voltage, dframe, rows)
+
     def __scan_for_voltage_senses(self):
         """ Scans for voltage sense columns for boards in mode """
         for board in self.current_board_ids:
-            for vsense in self.test.voltage_senses:
-                if board in vsense:
-                    self.voltage_senses.append(vsense)
+            self.voltage_senses.extend(self.test.schema.board_voltage_senses.get(board, []))
 
     def __get_mode_name_and_set_binning(self):
         """ Pull name of mode from limits file (if provided) """
@@ -117,14 +256,31 @@ class Mode(object):
                 if board in self.test.limits.led_binning_dict:
                     self.has_led_binning = True
                     self.led_bins = self.test.limits.led_binning_dict[board]
+            if self.has_led_binning:
+                self.system_bins = [get_system_bin(self, system) for system in self.systems]
+
+    def sum_multimode_currents(self, dframe, positions=None):
+        """ Returns: array (rows x systems) of the multimode currents of dframe rows at
+            positions (default: every row). The currents of the ON boards are
+            summed for all systems at once, from the readings as written (float64). """
+        num_systems = len(self.systems)
+        board_currents = []
+        for board in self.boards:
+            columns = [dframe[system].values if positions is None else dframe[system].values[positions]
+                       for system in board.systems[:num_systems]]
+            board_currents.append(reading_values(np.column_stack(columns)))
+        mode_currents = board_currents[0]
+        for currents in board_currents[1:]:  # add each ON current board
+            mode_currents = mode_currents + currents
+        return mode_currents
 
     def create_multimode_cols(self, dframe):
-        """ If multimode, a multimode current column is computed and added to dframe for each system """
+        """ If multimode, returns dframe with a multimode current column added for each
+            system (dframe itself is not modified) """
         if self.multimode:  # if mode is a multimode (multiple current boards ON)
-            for i, sys in enumerate(self.systems):
-                dframe[sys] = 0.0  # create multimode col of float zeroes
-                for board in self.boards: # add each ON current board
-                    dframe[sys] = dframe[sys] + pd.to_numeric(dframe[board.systems[i]], downcast='float')
+            currents = pd.DataFrame(self.sum_multimode_currents(dframe), index=dframe.index,
+                                    columns=self.systems)
+            dframe = pd.concat([dframe, currents], axis=1)
         return dframe
 
     def strip_index_and_melt_to_series(self, dframe):
@@ -140,16 +296,22 @@ class Mode(object):
         hist_dframe = pd.to_numeric(hist_dframe['currents'], downcast='float')
         return hist_dframe
 
-    def get_system_by_system_mode_stats(self, xml_temp, temp, run_limit_analysis=False, limits=None):
+    def get_system_by_system_mode_stats(self, xml_temp, temp, run_limit_analysis=False, limits=None,
+                                        stats=None):
         """ Get voltage/current statistics and limit analysis for this mode
         Args:
             xml_temp (xml obj): part of tables xml file to write stats to
             temp (int): temperature at which to analyze
             run_limit_analysis (boolean): T/F user entry on whether to run limit analysis
             limits (Limits obj): input limits for test samples (currents and perhaps outage)
+            stats (dict): indexed stats table of the test (see core.analysis.stats),
+                          computed for this mode if not given
         Returns:
             None
         """
+        if stats is None:
+            from core.analysis.stats import mode_stats_table, index_stats
+            stats = index_stats(mode_stats_table(self.test, limits, run_limit_analysis, [self]))
         if (temp in self.hist_dict): # data exists at this temperature
             xml_header_width = str(len(self.voltage_senses)+len(self.systems)+1)
             xml_mode = etree.SubElement(xml_temp, "mode", id=self.name, width=xml_header_width)
@@ -157,42 +319,47 @@ class Mode(object):
                 xml_voltage = etree.SubElement(xml_mode, "voltage", value=str(voltage)+'V', width=xml_header_width)
                 if run_limit_analysis and limits:
                     xml_limits = etree.SubElement(xml_voltage, "limits", width=xml_header_width)
-                    min_current = limits.lim[self.name][temp][voltage][0]
-                    max_current = limits.lim[self.name][temp][voltage][1]
-                    xml_limits.text = 'Limits:  ' + str(min_current)+'A to '+str(max_current)+'A'
+                    mode_limit_dict = get_limits_at_mode_temp_voltage(limits, self, temp, voltage)
+                    if self.has_led_binning:
+                        xml_limits.text = 'Limits:  ' + ',  '.join(
+                            led_bin + ' ' + str(mode_limit_dict[led_bin+' LL']) + 'A to ' +
+                            str(mode_limit_dict[led_bin+' UL']) + 'A' for led_bin in self.led_bins)
+                    else:
+                        xml_limits.text = 'Limits:  ' + str(mode_limit_dict['LL'])+'A to '+str(mode_limit_dict['UL'])+'A'
                 # vsense analysis
                 xml_vsenses = etree.SubElement(xml_voltage, "vsenses")
                 for vsense in self.voltage_senses:
-                    self.run_vsense_analysis(temp, voltage, vsense, xml_vsenses)
+                    self.run_vsense_analysis(temp, voltage, vsense, xml_vsenses,
+                                             stats.get((self.board_mode, temp, voltage, vsense)))
                 # current analysis
                 xml_systems = etree.SubElement(xml_voltage, "systems")
                 for system in self.systems:
-                    self.run_current_analysis(temp, voltage, system, xml_systems, limits, run_limit_analysis)
+                    self.run_current_analysis(temp, voltage, system, xml_systems, limits, run_limit_analysis,
+                                              stats.get((self.board_mode, temp, voltage, system)))
         else:  # data does not exist at this temperature
             print('\tData does not exist for', self.name, 'at', temp, 'C.')
 
-    def run_vsense_analysis(self, temp, voltage, vsense, xml_vsenses):
-        """ Run voltage sensing analysis for each temp/voltage/system condition in this mode.
+    def run_vsense_analysis(self, temp, voltage, vsense, xml_vsenses, vsense_stats=None):
+        """ Writes voltage sensing analysis for a temp/voltage/system condition in this mode.
             Builds an xml table displaying basic results and statistics.
         Args:
             temp (int): temperature at which to analyze
             voltage (float): voltage at which to analyze
             vsense (string): dataframe column header of mode vsense
             xml_vsenses (xml object): part of tables file to write vsense stats to
+            vsense_stats (dict): stats table row of vsense at condition (None if no data)
         Returns:
             None
         """
         if (temp in self.hist_dict):
             xml_vsense = etree.SubElement(xml_vsenses, "vsense")
-            vsense_min, vsense_max, vsense_mean, vsense_std = get_vsense_stats_at_mode_temp_voltage(
-                                                                        vsense, self, temp, voltage)
+            vsense_min, vsense_max, vsense_mean, vsense_std = rounded_stats(vsense_stats)
             out_of_spec_bool = check_if_out_of_spec(voltage - self.test.voltage_tolerance,
                                                     voltage + self.test.voltage_tolerance,
                                                     vsense_min, vsense_max)
-            vsense_series = filter_temp_and_voltage(self.df, self.test.ambient, temp, voltage,
-                                                    self.test.temperature_tolerance)[vsense]
-            total_count, out_of_spec_count, percent_out = count_num_out_of_spec(
-                 vsense_series, voltage-self.test.voltage_tolerance, voltage+self.test.voltage_tolerance)
+            total_count, out_of_spec_count = (vsense_stats['count'], vsense_stats['count_out']) \
+                                             if vsense_stats else (0, 0)
+            percent_out = format_percent_out(out_of_spec_count, total_count)
             xml_name = etree.SubElement(xml_vsense, "name")
             xml_name.text = str(vsense)
             xml_min = etree.SubElement(xml_vsense, "min")
@@ -212,8 +379,9 @@ class Mode(object):
             xml_check = etree.SubElement(xml_vsense, "check")
             xml_check.text = 'Out of Spec' if out_of_spec_bool else 'G'
 
-    def run_current_analysis(self, temp, voltage, system, xml_systems, limits, run_limit_analysis):
-        """ Run current analysis for each temp/voltage/system condition in this mode. Builds
+    def run_current_analysis(self, temp, voltage, system, xml_systems, limits, run_limit_analysis,
+                             system_stats=None):
+        """ Writes current analysis for a temp/voltage/system condition in this mode. Builds
             an xml table displaying basic results and statistics.
         Args:
             temp (int): temperature at which to analyze
@@ -222,14 +390,14 @@ class Mode(object):
             xml_systems (xml object): part of tables file to write system stats to
             limits (Limits object): input limits for test samples (currents and perhaps outage)
             run_limit_analysis (boolean): T/F user entry on whether to run limit analysis
+            system_stats (dict): stats table row of system at condition (None if no data)
         Returns:
             None
         """
         xml_system = etree.SubElement(xml_systems, "system")
         out_of_spec_bool = 'NA'
         out_of_spec_count = 'NA'
-        sys_min, sys_max, sys_mean, sys_std = get_system_stats_at_mode_temp_voltage(
-            system, self, temp, voltage)
+        sys_min, sys_max, sys_mean, sys_std = rounded_stats(system_stats)
         xml_name = etree.SubElement(xml_system, "name")
         xml_name.text = str(system)
         xml_min = etree.SubElement(xml_system, "min")
@@ -242,31 +410,25 @@ class Mode(object):
         xml_std.text = str(sys_std)
         xml_count = etree.SubElement(xml_system, "count")
         xml_count.text = "0"
-        if (temp in self.hist_dict) and (voltage in self.hist_dict[temp]):
-            xml_count.text = str(self.hist_dict[temp][voltage][system].count())
+        if system_stats is not None:
+            xml_count.text = str(system_stats['count'])
             if limits and run_limit_analysis:
-                out_of_spec_bool= self.run_current_limit_analysis(temp, voltage, system, xml_system, 
-                                                                  limits, sys_min, sys_max)
+                out_of_spec_bool= self.run_current_limit_analysis(xml_system, system_stats,
+                                                                  sys_min, sys_max)
             if self.multimode:
                 self.run_multimode_ratio_analysis(temp, voltage, system, xml_system)
         xml_check = etree.SubElement(xml_system, "check")
         xml_check.text = 'NA' if (not run_limit_analysis or not limits) \
                          else 'Out of Spec' if out_of_spec_bool else 'G'
 
-    def run_current_limit_analysis(self, temp, voltage, system, xml_system, limits, sys_min, sys_max):
-        """ Conducts limit analysis of current with input limits file. 
-            Limit row denoting 'G' or 'Out of Spec' added to xml tables output. """
-        if self.has_led_binning:
-            mode_limit_dict = get_limits_for_system_with_binning(
-                                  limits, self, temp, voltage, system)
-        else:
-            mode_limit_dict = get_limits_at_mode_temp_voltage(
-                                  limits, self, temp, voltage)
-        lower_limit, upper_limit = mode_limit_dict['LL'], mode_limit_dict['UL']
+    def run_current_limit_analysis(self, xml_system, system_stats, sys_min, sys_max):
+        """ Writes limit analysis of current (stats table row with the input limits file
+            limits). Limit row denoting 'G' or 'Out of Spec' added to xml tables output. """
+        lower_limit, upper_limit = system_stats['lower_limit'], system_stats['upper_limit']
         out_of_spec_bool = check_if_out_of_spec(lower_limit, upper_limit, 
                                                 sys_min, sys_max)
-        total_count, out_of_spec_count, percent_out = count_num_out_of_spec(
-                    self.hist_dict[temp][voltage][system], lower_limit, upper_limit)
+        out_of_spec_count = system_stats['count_out']
+        percent_out = format_percent_out(out_of_spec_count, system_stats['count'])
         xml_count_out = etree.SubElement(xml_system, "count-out")
         xml_count_out.text = str(out_of_spec_count)
         xml_percent_out = etree.SubElement(xml_system, "percent-out")
@@ -276,11 +438,9 @@ class Mode(object):
     def run_multimode_ratio_analysis(self, temp, voltage, system, xml_system):
         """ Conducts multimode ratio analysis. For example the amount of current 
             drawn by DRL and TURN in DRL+TURN mode. Rows added to xml tables output. """
-        dframe = filter_temp_and_voltage(self.df, self.test.ambient, temp, voltage, 
-                                         self.test.temperature_tolerance)
         for i, board_id in enumerate(self.current_board_ids):
             field = system.replace(self.board_mode, board_id)
-            series = dframe[field]
+            series = self.condition_series(field, temp, voltage)
             try: # retrieve board name from limits
                 board_name = self.test.limits.board_module_pairs[board_id]
             except:
@@ -290,36 +450,70 @@ class Mode(object):
             xml_board_min.text = str(series.min())
             xml_board_max.text = str(series.max())
 
-    def get_out_of_spec_data(self):
-        """ Retrieves out_of_spec raw data from test in this mode. """
-        out_of_spec_file = RotatingFile(directory='!output//', 
-                                        filename=self.test.name+' - out of spec')
-        for temp in self.temps:
-            for voltage in self.voltages:
-                df, out_of_spec_df = pd.DataFrame(), pd.DataFrame()
-                df = filter_temp_and_voltage(self.df, self.test.ambient, temp, voltage, 
-                                             self.test.temperature_tolerance)
-                mode_limit_dict = get_limits_at_mode_temp_voltage(self.test.limits, 
-                                                                  self, temp, voltage)
-                if self.has_led_binning:
-                    # TODO: Make this work for LED binning
-                    raise NotImplementedError
-                else:
-                    # select all rows where any Vsense has out of spec voltages
-                    lower_limit, upper_limit = voltage - self.test.voltage_tolerance , voltage + self.test.voltage_tolerance
-                    out_of_spec_df = df.loc[ (df[self.voltage_senses].values<lower_limit).any(1) | (df[self.voltage_senses].values>upper_limit).any(1) ]
-                    # add them to the out of spec file
-                    if not out_of_spec_df.empty:
-                        analysis_type = 'Out of spec data rows - Vin'
-                        out_of_spec_df = out_of_spec_df[~out_of_spec_df.index.duplicated(keep='first')]  # remove duplicates
-                        write_out_of_spec_to_file(out_of_spec_file, out_of_spec_df, self, temp, voltage, analysis_type)
+    def __values_block(self, columns, rows, frame=None):
+        """ Returns: array (rows x columns) of the values of df columns at the mode's
+            rows at positions rows (frame: __frame() if already read) """
+        if self.multimode_currents is not None and columns == self.systems:
+            return self.multimode_currents[rows]
+        if not columns:
+            return np.empty((len(rows), 0))
+        return np.column_stack([self.__values(column, rows, frame) for column in columns])
+
+    def __out_of_spec_masks(self, columns, rows, counts, lower_limits, upper_limits, frame):
+        """ Returns: list of masks of the rows of each condition where any of the columns
+            is outside the condition's limits
+        Args:
+            columns (list): Column labels checked (e.g. - self.systems)
+            rows (numpy array): Positions of the mode's rows of every condition, concatenated
+            counts (list): Number of rows of each condition
+            lower_limits, upper_limits (numpy array): Limits (conditions x columns) of each
+                                                      column at each condition, e.g. - of
+                                                      the LED bin of each system
+            frame (tuple): __frame() of the mode
+        Returns:
+            masks (list): Boolean mask of the rows of each condition
+        """
+        values = self.__values_block(columns, rows, frame)
+        if values.dtype.kind == 'f':  # compare at the columns' precision
+            lower_limits, upper_limits = lower_limits.astype(values.dtype), upper_limits.astype(values.dtype)
+        masks = []
+        for block, lower, upper in zip(np.split(values, np.cumsum(counts)[:-1]),
+                                       lower_limits, upper_limits):
+            masks.append(((block < lower) | (block > upper)).any(axis=1))  # limits broadcast over rows
+        return masks
+
+    def get_out_of_spec_data(self, output_folder=OUTPUT_FOLDER, compress=False):
+        """ Retrieves out_of_spec raw data from test in this mode. The Vin (voltage
+            sense) and Iin (current, per LED bin if binned) limits of every
+            temp/voltage condition are checked in one vectorized pass over the
+            mode's rows; the out of spec rows are then written condition by
+            condition to a buffered rotating file (gzip compressed if compress). """
+        out_of_spec_file = RotatingFile(directory=output_folder,
+                                        filename=self.test.name+' - out of spec',
+                                        compress=compress)
+        conditions = [(temp, voltage, self.conditions.rows(temp, voltage))
+                      for temp in self.temps for voltage in self.voltages]
+        conditions = [condition for condition in conditions if len(condition[2])]  # with data
 
-                    # select all rows where any system has out of spec currents
-                    lower_limit, upper_limit = mode_limit_dict['LL'] , mode_limit_dict['UL']
-                    out_of_spec_df = df.loc[ (df[self.systems].values<lower_limit).any(1) | (df[self.systems].values>upper_limit).any(1) ]
-                    # add them to the out of spec file
-                    if not out_of_spec_df.empty:
-                        analysis_type = 'Out of spec data rows - Iin'
+        if conditions:
+            counts = [len(rows) for _, _, rows in conditions]
+            rows = np.concatenate([rows for _, _, rows in conditions])
+            frame = self.__frame()
+            temps, voltages = (np.array(values) for values in
+                               zip(*[(temp, voltage) for temp, voltage, _ in conditions]))
+            vsense_shape = (len(conditions), len(self.voltage_senses))
+            vin_limits = (np.broadcast_to((voltages - self.test.voltage_tolerance)[:, np.newaxis], vsense_shape),
+                          np.broadcast_to((voltages + self.test.voltage_tolerance)[:, np.newaxis], vsense_shape))
+            iin_limits = get_system_limits(self.test.limits, self, temps, voltages)  # conditions x systems
+            masks = [self.__out_of_spec_masks(columns, rows, counts, lower_limits, upper_limits, frame)
+                     for columns, (lower_limits, upper_limits) in ((self.voltage_senses, vin_limits),
+                                                                   (self.systems, iin_limits))]
+            # add the rows of each condition to the out of spec file
+            for (temp, voltage, condition_rows), vin_mask, iin_mask in zip(conditions, *masks):
+                for mask, analysis_type in ((vin_mask, 'Out of spec data rows - Vin'),
+                                            (iin_mask, 'Out of spec data rows - Iin')):
+                    if mask.any():
+                        out_of_spec_df = self.__rows_df(condition_rows[mask], frame)
                         out_of_spec_df = out_of_spec_df[~out_of_spec_df.index.duplicated(keep='first')]  # remove duplicates
                         write_out_of_spec_to_file(out_of_spec_file, out_of_spec_df, self, temp, voltage, analysis_type)
 
@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+
+"""
+This module contains the PartitionStore class which spills the rows of a test
+to columnar Feather part files in a temporary folder, one partition per mode
+(plus one for the outage board). An out-of-core TestStation routes each chunk
+of raw data it reads to the partitions, so only the chunk being routed and the
+partition being analyzed are held in memory.
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+
+import pandas as pd
+
+from core.data_import.datafile import DATE_TIME, share_categories
+
+
+class PartitionStore(object):
+    """
+    Rows of a test spilled to disk, by partition key (e.g. - a mode id).
+
+    Attributes:
+        directory (string): Temporary folder holding the part files (removed
+                            when the store is closed or garbage collected)
+        parts (dict): Partition key -> list of part file paths, in append order
+    Essential methods:
+        append: Spills a chunk of rows to a partition
+        read: Returns every row of a partition (the last partition read is kept
+              in memory until another partition is read)
+        version: Number of parts of a partition (changes when rows are appended)
+        clear: Deletes every partition
+    """
+    def __init__(self, directory=None):
+        self.directory = tempfile.mkdtemp(prefix='test-analysis-partitions-', dir=directory)
+        self.parts = {}
+        self.__num_files = 0
+        self.__last_read = (None, 0, None)  # key, version and dataframe of last read
+        self.__finalizer = weakref.finalize(self, shutil.rmtree, self.directory, True)
+
+    def __repr__(self):
+        return '{}: {} ({} partitions)'.format(self.__class__.__name__,
+                                               self.directory, len(self.parts))
+
+    def __contains__(self, key):
+        return key in self.parts
+
+    def keys(self):
+        return list(self.parts)
+
+    def version(self, key):
+        """ Returns: number of parts of partition key (0 if it has no rows) """
+        return len(self.parts.get(key, []))
+
+    def append(self, key, dframe):
+        """ Spills the rows of dframe (indexed by 'Date Time') to partition key """
+        if dframe.empty:
+            return
+        filepath = os.path.join(self.directory, 'part' + str(self.__num_files) + '.feather')
+        dframe.reset_index().to_feather(filepath)
+        self.__num_files += 1
+        self.parts.setdefault(key, []).append(filepath)
+
+    def read(self, key):
+        """ Returns: dataframe of every row of partition key (None if it has no rows) """
+        last_key, last_version, last_dframe = self.__last_read
+        if key == last_key and self.version(key) == last_version:
+            return last_dframe
+        self.__last_read = (None, 0, None)  # release the last partition first
+        if key not in self.parts:
+            return None
+        dframes = [pd.read_feather(filepath) for filepath in self.parts[key]]
+        dframe = pd.concat(share_categories(dframes), ignore_index=True) if len(dframes) > 1 \
+                 else dframes[0]
+        dframe = dframe.set_index(DATE_TIME)
+        self.__last_read = (key, self.version(key), dframe)
+        return dframe
+
+    def clear(self):
+        """ Deletes every partition """
+        for filepaths in self.parts.values():
+            for filepath in filepaths:
+                os.remove(filepath)
+        self.parts = {}
+        self.__last_read = (None, 0, None)
+
+    def close(self):
+        """ Deletes the partitions and their temporary folder """
+        self.parts = {}
+        self.__last_read = (None, 0, None)
+        self.__finalizer()
@@ -4,40 +4,70 @@
 This module contains the RotatingFile class which is used to log
 out of spec raw data files. It handles the creation of a new file
 when one become too large for instances where a test exhibits a
-lot of out of spec data.
+lot of out of spec data. Writes are buffered and the size in bytes
+of the current file is tracked in memory (the file is not flushed
+or stat'ed after every block), and files may be gzip compressed.
 """
 
+import io
 import os
-import sys
+import gzip
+
+BUFFER_SIZE = 1024 * 1024  # bytes buffered before a write to disk
+COMPRESS_LEVEL = 6  # gzip level of compressed files (speed/size trade off)
+
 
 class RotatingFile(object):
+    """
+    Text file written in blocks (a condition header and a dataframe) that rotates
+    to a new numbered file (e.g. - 'out_of_spec_02.txt') once max_file_size
+    bytes were written to the current one.
+
+    Attributes:
+        size => bytes of text in the current file (existing content plus writes,
+                as encoded and with the newlines of the platform)
+        compress => files are gzip compressed (e.g. - 'out_of_spec_01.txt.gz'),
+                    max_file_size then applies to the uncompressed text
+        finished => max_files were filled, later writes are dropped
+    """
+
     def __init__(self, directory='', filename='out_of_spec', max_files=99,
-                 max_file_size=20000000):
+                 max_file_size=20000000, compress=False, buffer_size=BUFFER_SIZE):
         self.ii = 1
         self.directory, self.filename      = directory, filename
         self.max_file_size, self.max_files = max_file_size, max_files
+        self.compress, self.buffer_size    = compress, buffer_size
         self.finished, self.fh             = False, None
+        self.size = 0
         self.open()
 
     def rotate(self):
         """Rotate the file, if necessary"""
-        if (os.stat(self.filename_template).st_size > self.max_file_size):
+        if self.size > self.max_file_size:
             self.close()
             self.ii += 1
             if (self.ii <= self.max_files):
                 self.open()
             else:
-                self.close()
                 self.finished = True
 
     def open(self):
-        self.fh = open(self.filename_template, 'a')
+        filename = self.filename_template
+        self.size = 0
+        if os.path.exists(filename):  # appended to
+            self.size = uncompressed_size(filename) if self.compress else os.path.getsize(filename)
+        if self.compress:
+            self.fh = gzip.open(filename, 'at', compresslevel=COMPRESS_LEVEL)
+        else:
+            self.fh = open(filename, 'a', buffering=self.buffer_size)
 
     def write(self, header, df):
-        self.fh.write(header)
-        df.to_csv(self.fh, header=df.columns, index=True, 
-                  sep='\t', mode='a')
-        self.fh.flush()
+        if self.finished:
+            return
+        text = header + df.to_csv(header=df.columns, index=True, sep='\t')
+        self.fh.write(text)
+        self.size += len(text.encode(self.fh.encoding)) + \
+                     text.count('\n') * (len(os.linesep) - 1)  # written as os.linesep
         self.rotate()
 
     def close(self):
@@ -45,4 +75,11 @@ class RotatingFile(object):
 
     @property
     def filename_template(self):
-        return self.directory + self.filename + "_%0.2d.txt" % self.ii
\ No newline at end of file
+        return self.directory + self.filename + "_%0.2d.txt" % self.ii + \
+               ('.gz' if self.compress else '')
+
+
+def uncompressed_size(filename):
+    """ Returns: bytes of text in a gzip compressed file """
+    with gzip.open(filename, 'rb') as compressed:
+        return compressed.seek(0, io.SEEK_END)
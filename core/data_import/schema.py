@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+
+"""
+This module contains the HeaderSchema class which classifies the columns of a
+raw datafile header (boards, systems, voltage senses, ON/OFF and thermocouple
+columns) once, with precompiled patterns. Schemas are cached by header, so the
+loader, the boards and the modes of a test (and every datafile of a folder with
+identical headers) share a single classification instead of scanning the
+column labels with regular expressions again.
+"""
+
+import re
+
+from core.re_and_global import REGEX_BOARDS, \
+                               REGEX_SYSTEMS, \
+                               REGEX_EMPTY_TEST_POSITION, \
+                               REGEX_VOLTAGE_SENSES, \
+                               REGEX_ON_OFF, \
+                               REGEX_TEMPS
+
+
+PATTERN_BOARDS = re.compile(REGEX_BOARDS)
+PATTERN_SYSTEMS = re.compile(REGEX_SYSTEMS)
+PATTERN_EMPTY_TEST_POSITION = re.compile(REGEX_EMPTY_TEST_POSITION)
+PATTERN_VOLTAGE_SENSES = re.compile(REGEX_VOLTAGE_SENSES)
+PATTERN_ON_OFF = re.compile(REGEX_ON_OFF)
+PATTERN_TEMPS = re.compile(REGEX_TEMPS)
+MAX_CACHED_SCHEMAS = 128  # distinct headers kept by HeaderSchema.of
+
+
+class HeaderSchema(object):
+    """
+    Classification of the column labels of a raw datafile header.
+
+    Attributes:
+        columns (tuple): Column labels, in header order
+        board_columns (list): Columns of a board (e.g. - 'B3 VSense1')
+        board_of (dict): Board column -> board id (e.g. - 'B3')
+        boards (list): Sorted ids of the boards in the header
+        systems (dict): Board id -> system columns of the board (e.g. -
+                        'B3 TP4: System 46'), in header order
+        system_names (list): Test position and system of every system column
+                             (e.g. - 'TP4: System 46'), without duplicates
+        voltage_senses (list): Voltage sense columns of every board
+        board_voltage_senses (dict): Board id -> voltage sense columns of the board
+        on_off (dict): Board id -> ON/OFF column of the board
+        thermocouples (list): Thermocouple ('Temp ...') columns
+        empty_test_positions (list): Test position columns without a system
+    Essential methods:
+        of: Returns the (cached) schema of a header
+    """
+    __cache = {}  # tuple of column labels -> HeaderSchema
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.board_columns = []
+        self.board_of = {}
+        self.systems = {}
+        self.system_names = []
+        self.voltage_senses = []
+        self.board_voltage_senses = {}
+        self.on_off = {}
+        self.thermocouples = []
+        self.empty_test_positions = []
+
+        self.__classify()
+        self.boards = sorted(set(self.board_of.values()))
+
+    def __repr__(self):
+        return '{}: {} columns, boards {}'.format(self.__class__.__name__,
+                                                   len(self.columns), self.boards)
+
+    @classmethod
+    def of(cls, columns):
+        """ Returns: schema of a header (list of column labels), classified only
+            the first time the header is seen """
+        key = tuple(columns)
+        schema = cls.__cache.get(key)
+        if schema is None:
+            if len(cls.__cache) >= MAX_CACHED_SCHEMAS:
+                cls.__cache.clear()
+            schema = cls.__cache[key] = cls(key)
+        return schema
+
+    def __classify(self):
+        """ Classifies every column label once """
+        system_names = set()
+        for col in self.columns:
+            if PATTERN_TEMPS.search(col):
+                self.thermocouples.append(col)
+                continue
+            board_match = PATTERN_BOARDS.search(col)
+            if not board_match:
+                continue
+            board_id = board_match.group()
+            self.board_columns.append(col)
+            self.board_of[col] = board_id
+            if PATTERN_ON_OFF.search(col):
+                self.on_off[board_id] = col
+            elif PATTERN_VOLTAGE_SENSES.search(col):
+                self.voltage_senses.append(col)
+                self.board_voltage_senses.setdefault(board_id, []).append(col)
+            elif PATTERN_EMPTY_TEST_POSITION.search(col):
+                self.empty_test_positions.append(col)
+            else:
+                system_match = PATTERN_SYSTEMS.search(col)
+                if system_match:
+                    self.systems.setdefault(board_id, []).append(col)
+                    if system_match.group(1) not in system_names:
+                        system_names.add(system_match.group(1))
+                        self.system_names.append(system_match.group(1))
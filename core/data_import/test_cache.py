@@ -0,0 +1,86 @@
+"""
+This module tests the DatafileCache class in cache.py
+"""
+
+import os
+import shutil
+import pytest
+import pandas as pd
+from core.data_import.datafile import read_raw_datafile, read_raw_datafiles
+from core.data_import.cache import *
+from core.sidecar import CACHE_FOLDER
+
+
+RUN11_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', '..', 'test files', 'Run11')
+
+
+@pytest.fixture
+def datafiles(tmpdir):
+    """ Returns paths to copies of the first three Run11 raw datafiles """
+    filenames = sorted(filename for filename in os.listdir(RUN11_FOLDER) if '_B_' in filename)[:3]
+    filepaths = []
+    for filename in filenames:
+        filepath = str(tmpdir.join(filename))
+        shutil.copy(os.path.join(RUN11_FOLDER, filename), filepath)
+        filepaths.append(filepath)
+    return filepaths
+
+
+def test_cache_round_trip(tmpdir, datafiles):
+    cache = DatafileCache(str(tmpdir.join(CACHE_FOLDER)))
+    key = cache.identify(datafiles[0])
+    assert cache.get(key) is None
+    dframe = read_raw_datafile(datafiles[0])
+    cache.put(key, dframe)
+    cache.save()
+    reopened = DatafileCache(str(tmpdir.join(CACHE_FOLDER)))
+    pd.testing.assert_frame_equal(reopened.get(key), dframe)
+
+
+def test_cache_invalidates_changed_datafile(tmpdir, datafiles):
+    cache = DatafileCache(str(tmpdir.join(CACHE_FOLDER)))
+    key = cache.identify(datafiles[0])
+    cache.put(key, read_raw_datafile(datafiles[0]))
+    with open(datafiles[0], 'a') as datafile:  # labview appended a scan
+        datafile.write('2018/02/26\t10:46:30.517' + '\t0' * 31 + '\n')
+    new_key = cache.identify(datafiles[0])
+    assert new_key['hash'] != key['hash']
+    assert cache.get(new_key) is None
+    assert not cache.entries  # stale entry and its feather file were removed
+    assert os.listdir(cache.directory) == []
+
+
+def test_cache_hashes_only_recently_modified_datafiles(tmpdir, datafiles, monkeypatch):
+    cache = DatafileCache(str(tmpdir.join(CACHE_FOLDER)))
+    settled_time = os.path.getmtime(datafiles[0]) - 60
+    os.utime(datafiles[0], (settled_time, settled_time))
+    for filepath in datafiles[:2]:
+        cache.put(cache.identify(filepath), read_raw_datafile(filepath))
+    hashed = []
+    monkeypatch.setattr('core.data_import.cache.hash_file_contents',
+                        lambda filepath: hashed.append(filepath) or hash_file_contents(filepath))
+    settled_key, recent_key = cache.identify(datafiles[0]), cache.identify(datafiles[1])
+    assert hashed == [datafiles[1]]  # just copied, may still change within its mtime
+    assert cache.get(settled_key) is not None and cache.get(recent_key) is not None
+
+
+def test_cache_evicts_least_recently_used(tmpdir, datafiles):
+    cache = DatafileCache(str(tmpdir.join(CACHE_FOLDER)))
+    keys = [cache.identify(filepath) for filepath in datafiles]
+    for key, filepath in zip(keys, datafiles):
+        cache.put(key, read_raw_datafile(filepath))
+    entry_size = max(entry['bytes'] for entry in cache.entries.values())
+    cache.get(keys[0])  # most recently used
+    cache.max_size = 2 * entry_size
+    cache.evict()
+    assert set(cache.entries) == {keys[0]['path'], keys[2]['path']}
+
+
+def test_read_raw_datafiles_through_cache(tmpdir, datafiles):
+    cache = DatafileCache(str(tmpdir.join(CACHE_FOLDER)))
+    parsed = read_raw_datafiles(datafiles, cache=cache)
+    assert len(cache.entries) == len(datafiles)
+    cached = read_raw_datafiles(datafiles, cache=DatafileCache(cache.directory))
+    for parsed_df, cached_df in zip(parsed, cached):
+        pd.testing.assert_frame_equal(parsed_df, cached_df)
@@ -0,0 +1,42 @@
+"""
+This module tests the ConditionIndex class in conditions.py
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from core.data_import.conditions import ConditionIndex
+from core.data_import.helpers import filter_temp_and_voltage
+
+
+TEMPS = (73, 78, 82)
+VOLTAGES = (9.0, 14.1, 16.0)
+
+
+@pytest.fixture
+def temp_dataframe():
+    """ Returns dataframe with temperature, voltage, and one sys current """
+    dframe = pd.DataFrame({'Amb': [72.1, 73.4, 74.2, 75.5, 77.7, 79.8, 80.1, 81.6, 82.3, 83.5],
+                           'Vsetpoint': [9.0, 9.0, 14.1, 14.1, 14.1, 14.1, 14.1, 14.1, 16.0, 16.0],
+                           'Sys 1': [1.56, 1.54, 1.55, 1.57, 1.53, 1.55, 1.54, 1.52, 1.57, 1.50]})
+    return dframe
+
+
+def test_take_matches_filter_temp_and_voltage(temp_dataframe):
+    conditions = ConditionIndex.from_dataframe(temp_dataframe, 'Amb', 3, TEMPS, VOLTAGES)
+    for temp in TEMPS:
+        for voltage in VOLTAGES + (12.0,):  # 12V is not indexed up front
+            expected = filter_temp_and_voltage(temp_dataframe, 'Amb', temp, voltage, 3)
+            pd.testing.assert_frame_equal(conditions.take(temp_dataframe, temp, voltage), expected)
+
+
+def test_subset_and_append(temp_dataframe):
+    conditions = ConditionIndex.from_dataframe(temp_dataframe.iloc[:6], 'Amb', 3, TEMPS, VOLTAGES)
+    conditions.append(ConditionIndex.from_dataframe(temp_dataframe.iloc[6:], 'Amb', 3))
+    positions = np.array([1, 3, 4, 8, 9])
+    subset = conditions.subset(positions)
+    subset_df = temp_dataframe.iloc[positions]
+    for temp in TEMPS:
+        for voltage in VOLTAGES:
+            expected = filter_temp_and_voltage(subset_df, 'Amb', temp, voltage, 3)
+            pd.testing.assert_frame_equal(subset.take(subset_df, temp, voltage), expected)
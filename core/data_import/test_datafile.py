@@ -0,0 +1,128 @@
+"""
+This module tests the functions in datafile.py
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from core.data_import.datafile import *
+from core.data_import.helpers import reading_values
+
+
+RUN11_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', '..', 'test files', 'Run11')
+
+
+@pytest.fixture
+def run11_datafile():
+    """ Returns path to a Run11 raw datafile with OFF readings and flashing boards """
+    return os.path.join(RUN11_FOLDER, '20180226_104538_Validation V47 Run 11_B_3.txt')
+
+
+def test_read_raw_datafile_declares_compact_dtypes(run11_datafile):
+    dframe = read_raw_datafile(run11_datafile)
+    assert isinstance(dframe.index, pd.DatetimeIndex)
+    assert dframe.index.name == 'Date Time'
+    assert 'Date' not in dframe.columns and 'Time' not in dframe.columns
+    assert dframe['B1 ON/OFF'].dtype == np.int8
+    assert dframe['B1 VSense1'].dtype == dframe['B1 TP1: P552 PT'].dtype == np.float32
+    assert dframe['Temp TC1: Amb'].dtype == np.float32
+    assert dframe['Vsetpoint'].dtype == 'category'
+    assert dframe['Vsetpoint'].cat.codes.dtype == np.int8
+
+
+def test_read_raw_datafile_maps_off_to_zero(run11_datafile):
+    dframe = read_raw_datafile(run11_datafile)
+    assert dframe['B2 VSense1'].iloc[0] == 0.0
+    assert dframe['B4 TP1: NO_UUT'].notnull().all()
+    assert dframe.index[0] == pd.Timestamp('2018-02-26 10:46:24.517')
+
+
+def test_read_raw_datafile_engines_match(run11_datafile):
+    c_df = read_raw_datafile(run11_datafile, engine='c')
+    python_df = read_raw_datafile(run11_datafile, engine='python')
+    pd.testing.assert_frame_equal(c_df, python_df)
+
+
+def test_read_raw_datafile_no_reading_is_nan(tmpdir):
+    datafile = tmpdir.join('20180226_104538_Run_B.txt')
+    datafile.write('Date\tTime\tTemp TC1: Amb\tTemp TC2: Open\tVsetpoint\tB1 ON/OFF\tB1 TP1: S1\n'
+                   '2018/02/26\t10:45:55.517\t22.9\tNo Reading\t9\t0\tOFF\n'
+                   '2018/02/26\t10:45:56.517\t23.1\tNo Reading\t9\t1\t0.31\n')
+    dframe = read_raw_datafile(str(datafile))
+    assert dframe['Temp TC2: Open'].isnull().all()
+    assert list(reading_values(dframe['B1 TP1: S1'])) == [0.0, 0.31]
+
+
+def test_read_raw_datafile_rows_continues_from_offset(tmpdir):
+    datafile = tmpdir.join('20180226_104538_Run_B.txt')
+    header = 'Date\tTime\tTemp TC1: Amb\tVsetpoint\tB1 ON/OFF\tB1 TP1: S1\n'
+    first_row = '2018/02/26\t10:45:55.517\t22.9\t9\t0\tOFF\n'
+    second_row = '2018/02/26\t10:45:56.517\t23.1\t9\t1\t0.31\n'
+    datafile.write(header + first_row + second_row[:20])  # second row still being written
+    columns = read_raw_header(str(datafile))
+    dframe, offset = read_raw_datafile_rows(str(datafile), columns)
+    assert len(dframe) == 1 and offset == len(header + first_row)
+    assert read_raw_datafile_rows(str(datafile), columns, offset) == (None, offset)
+    datafile.write(header + first_row + second_row)
+    dframe, offset = read_raw_datafile_rows(str(datafile), columns, offset)
+    assert list(reading_values(dframe['B1 TP1: S1'])) == [0.31]
+    assert offset == len(header + first_row + second_row)
+
+
+@pytest.mark.parametrize("chunk_bytes", [100, 1000])
+def test_iter_raw_datafile_chunks_matches_read(run11_datafile, chunk_bytes):
+    columns = read_raw_header(run11_datafile)
+    chunks = list(iter_raw_datafile_chunks(run11_datafile, columns, chunk_bytes))
+    assert len(chunks) > 1
+    pd.testing.assert_frame_equal(pd.concat(chunks), read_raw_datafile(run11_datafile))
+
+
+def test_read_raw_datafile_unknown_engine(run11_datafile):
+    with pytest.raises(ValueError):
+        read_raw_datafile(run11_datafile, engine='pyarrow')
+
+
+@pytest.fixture
+def rotated_dataframes():
+    """ Returns two rotated file dataframes where the second is missing a board """
+    first = pd.DataFrame([{'Vsetpoint': 9.0, 'B1 ON/OFF': 1.0, 'B2 ON/OFF': 0.0},
+                          {'Vsetpoint': 9.0, 'B1 ON/OFF': 0.0, 'B2 ON/OFF': 1.0}],
+                         columns=['Vsetpoint', 'B1 ON/OFF', 'B2 ON/OFF'], index=[0, 1])
+    second = pd.DataFrame([{'Vsetpoint': 14.0, 'B1 ON/OFF': 1.0}],
+                          columns=['Vsetpoint', 'B1 ON/OFF'], index=[2])
+    return [first, second]
+
+
+def test_raw_column_schema(rotated_dataframes):
+    assert raw_column_schema(rotated_dataframes[::-1]) == ['Vsetpoint', 'B1 ON/OFF', 'B2 ON/OFF']
+
+
+def test_concat_raw_dataframes(rotated_dataframes):
+    dframe = concat_raw_dataframes(rotated_dataframes)
+    assert list(dframe.columns) == ['Vsetpoint', 'B1 ON/OFF', 'B2 ON/OFF']
+    assert list(dframe.index) == [0, 1, 2]
+    assert all(dtype == np.float64 for dtype in dframe.dtypes)
+    assert np.isnan(dframe['B2 ON/OFF'].iloc[2])
+
+
+def test_concat_raw_dataframes_shares_setpoint_categories(rotated_dataframes):
+    dframes = [dframe.astype({'Vsetpoint': 'category'}) for dframe in rotated_dataframes]
+    dframe = concat_raw_dataframes(dframes)
+    assert list(dframe['Vsetpoint'].cat.categories) == [9.0, 14.0]
+    assert dframe['Vsetpoint'].tolist() == [9.0, 9.0, 14.0]
+
+
+def test_concat_raw_dataframes_empty():
+    assert concat_raw_dataframes([]).empty
+
+
+def test_read_raw_datafiles_parallel_keeps_file_order():
+    filepaths = [os.path.join(RUN11_FOLDER, filename) for filename in sorted(os.listdir(RUN11_FOLDER))
+                 if '_B' in filename]
+    sequential = read_raw_datafiles(filepaths, workers=1)
+    parallel = read_raw_datafiles(filepaths, workers=2)
+    assert len(parallel) == len(filepaths)
+    for sequential_df, parallel_df in zip(sequential, parallel):
+        pd.testing.assert_frame_equal(sequential_df, parallel_df)
@@ -0,0 +1,58 @@
+"""
+This module tests the incremental update of the TestStation class in dv_station.py
+"""
+
+import io
+import os
+import contextlib
+import pytest
+from core.data_import.dv_station import TestStation
+from core.data_import.helpers import rounded_stats
+from core.analysis.stats import mode_stats_table, station_stats_table, index_stats
+
+
+RUN11_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', '..', 'test files', 'Run11')
+RUN11_BOARDS = ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+HEADER = ['Date', 'Time', 'Temp TC1: Amb', 'Vsetpoint', 'B2 ON/OFF', 'B2 VSense1', 'B2 TP1: Tesla ECE']
+DATAFILE = '20180226_104538_Validation V47 Run 11_B.txt'
+
+
+def scan(second):
+    """ Returns: datafile line of a scan of B2 at 9V, second seconds into the test """
+    return '\t'.join(['2018/02/26', '10:46:{:02d}.517'.format(second), '23.1', '9',
+                      '1', '9.04784', '0.273414']) + '\n'
+
+
+@pytest.fixture
+def datafile(tmpdir):
+    """ Returns the datafile of a test of 10 scans, one per second """
+    datafile = tmpdir.join(DATAFILE)
+    datafile.write('\t'.join(HEADER) + '\n' + ''.join(scan(second) for second in range(10)))
+    return datafile
+
+
+def test_update_ingests_rows_appended_to_datafile(datafile):
+    with contextlib.redirect_stdout(io.StringIO()):
+        test = TestStation('Run 11', datafile.dirname, [], None, False, False, 3, 0.5, 23)
+        datafile.write(scan(9) + scan(10), mode='a')  # same timestamp as the last scan, then a new one
+        assert test.update() == 2
+        assert test.update() == 0
+    assert test.num_rows == 12
+    assert test.modes[0].hist_dict == {23: {9.0: 12}}
+
+
+@pytest.mark.parametrize("memory_budget", [None, 0.05])  # one chunk per datafile, many chunks
+def test_streaming_stats_match_mode_stats_table(memory_budget):
+    with contextlib.redirect_stdout(io.StringIO()):
+        test = TestStation('Run 11', RUN11_FOLDER, RUN11_BOARDS, None, False, False, 5, 0.5,
+                           23, 25)
+        streamed = TestStation('Run 11', RUN11_FOLDER, RUN11_BOARDS, None, False, False, 5, 0.5,
+                               23, 25, streaming_stats=True, memory_budget=memory_budget)
+    assert streamed.df.empty and streamed.partitions is not None  # rows were never kept in df
+    expected = index_stats(mode_stats_table(test))
+    stats = index_stats(station_stats_table(streamed))
+    assert stats and sorted(stats) == sorted(expected)
+    for key, row in stats.items():
+        assert rounded_stats(row) == rounded_stats(expected[key])
+        assert (row['count'], row['count_out']) == (expected[key]['count'], expected[key]['count_out'])
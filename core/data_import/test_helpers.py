@@ -2,7 +2,9 @@
 This module tests the functions in helpers.py 
 """
 
+import types
 import pytest
+import numpy as np
 import pandas as pd
 from core.data_import.helpers import *
 
@@ -151,6 +153,14 @@ def test_filter_board_on_or_off(board_id, board_on_off_code, expected_filtered_d
     pd.testing.assert_frame_equal(filtered_df, expected_filtered_df)
 
 
+def test_board_state_positions(on_off_dataframe):
+    mode_positions = board_state_positions(on_off_dataframe, ['B4', 'B5'])
+    assert sorted(mode_positions) == ['B4', 'B4B5', 'B5']  # flashing and all OFF rows left out
+    assert list(mode_positions['B5']) == [1, 2, 3]
+    assert list(mode_positions['B4']) == [5, 6]
+    assert list(mode_positions['B4B5']) == [7, 8]
+
+
 @pytest.mark.parametrize("lower_limit, upper_limit, sys_min, sys_max," \
                          "expected_output", [
     (1.0, 2.0, 0.5, 2.5, True),
@@ -193,3 +203,23 @@ def test_count_num_out_of_spec(lower_limit, upper_limit, expected_total_count,
     assert total_count == expected_total_count
     assert count_out_of_spec == expected_count_out_of_spec
     assert percent_out == expected_percent_out
+
+def test_reading_range_is_as_written():
+    readings = pd.Series([0.356967, float('nan'), 0.31], dtype='float32').values
+    assert reading_range(readings) == (0.31, 0.356967)
+    assert np.isnan(reading_range(readings[1:2])).all()
+
+def test_reading_values_are_as_written():
+    written = np.array([[0.356967, 16.55718], [-0.00123, 0.0], [1.2e5, float('nan')]])
+    readings = reading_values(written.astype(np.float32))
+    assert readings.dtype == np.float64
+    np.testing.assert_array_equal(readings, written)
+    assert reading_values(written) is written  # float64 readings are kept
+
+def test_out_of_spec_on_off_codes_written_as_floats():
+    written = []
+    out_of_spec_file = types.SimpleNamespace(write=lambda header, df: written.append(df))
+    dframe = pd.DataFrame({'B1 ON/OFF': np.array([1, 0], dtype=np.int8), 'B1 TP1: S1': [0.31, 0.0]})
+    write_out_of_spec_to_file(out_of_spec_file, dframe, types.SimpleNamespace(name='DRL'),
+                              23, 13.5, 'Out of spec data rows - Iin')
+    assert written[0].to_csv(sep='\t').splitlines()[1:] == ['0\t1.0\t0.31', '1\t0.0\t0.0']
@@ -0,0 +1,70 @@
+"""
+This module tests the MemmapStore class in memmap_store.py
+"""
+
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from core.data_import.datafile import DATE_TIME
+from core.data_import.memmap_store import *
+
+
+@pytest.fixture
+def scans():
+    """ Returns dataframe of 10 scans, one per second, with compact column dtypes """
+    index = pd.date_range('2018-02-26 10:45:55', periods=10, freq='S', name=DATE_TIME)
+    return pd.DataFrame({'Vsetpoint': pd.Categorical(np.repeat([9.0, 13.5], 5)),
+                         'B1 ON/OFF': np.arange(10, dtype=np.int8) % 2,
+                         'B1 TP1: P552 PT': np.linspace(0.3, 0.4, 10, dtype=np.float32)},
+                        index=index)
+
+
+def test_store_round_trip(tmpdir, scans):
+    store = MemmapStore(str(tmpdir))
+    store.append(scans.iloc[:4])
+    store.append(scans.iloc[4:])
+    store.save({'run_B.txt': 1234})
+    reopened = MemmapStore(str(tmpdir))
+    assert reopened.matches(scans.columns, {'run_B.txt': 1234})
+    assert not reopened.matches(scans.columns, {'run_B.txt': 2000})  # datafile grew
+    pd.testing.assert_frame_equal(reopened.read(), scans, check_freq=False)
+
+
+def test_store_adds_categories_of_appended_rows(tmpdir, scans):
+    store = MemmapStore(str(tmpdir))
+    store.append(scans.iloc[:5].astype({'Vsetpoint': 'float'}).astype({'Vsetpoint': 'category'}))
+    store.append(scans.iloc[5:].astype({'Vsetpoint': 'float'}).astype({'Vsetpoint': 'category'}))
+    store.save({'run_B.txt': 1234})
+    reopened = MemmapStore(str(tmpdir))
+    assert reopened.dtypes['Vsetpoint'] == CATEGORY_CODE_DTYPE
+    assert reopened.categories == {'Vsetpoint': [9.0, 13.5]}
+    pd.testing.assert_frame_equal(reopened.read(), scans, check_freq=False)
+
+
+def test_store_reads_time_range(tmpdir, scans):
+    store = MemmapStore(str(tmpdir))
+    store.append(scans)
+    assert store.positions('2018-02-26 10:45:57', '2018-02-26 10:45:59') == slice(2, 5)
+    pd.testing.assert_frame_equal(store.read(['B1 TP1: P552 PT'], scans.index[2], scans.index[4]),
+                                  scans[['B1 TP1: P552 PT']].iloc[2:5], check_freq=False)
+
+
+def test_store_reads_time_range_of_unsorted_rows(tmpdir, scans):
+    store = MemmapStore(str(tmpdir))
+    store.append(scans.iloc[5:])
+    store.append(scans.iloc[:5])  # older datafile appended last
+    assert not store.is_sorted
+    assert list(store.positions(scans.index[3], scans.index[6])) == [0, 1, 8, 9]
+    pd.testing.assert_frame_equal(store.read(start=scans.index[3], end=scans.index[6]),
+                                  pd.concat([scans.iloc[5:7], scans.iloc[3:5]]), check_freq=False)
+
+
+def test_store_discards_unsaved_rows(tmpdir, scans):
+    store = MemmapStore(str(tmpdir))
+    store.append(scans.iloc[:4])
+    store.save({'run_B.txt': 100})
+    store.append(scans.iloc[4:])  # not saved, e.g. - interrupted session
+    reopened = MemmapStore(str(tmpdir))
+    assert len(reopened) == 0 and not reopened.matches(scans.columns, {'run_B.txt': 100})
+    assert [filename for filename in os.listdir(str(tmpdir)) if filename.endswith('.bin')] == []
@@ -0,0 +1,107 @@
+"""
+This module tests the row position views and out of spec data of the Mode class
+in mode.py
+"""
+
+import io
+import os
+import contextlib
+import pytest
+import numpy as np
+import pandas as pd
+from core.data_import.dv_station import TestStation
+from core.limits_import.limits import Limits
+
+
+HEADER = ['Date', 'Time', 'Temp TC1: Amb', 'Vsetpoint',
+          'B2 ON/OFF', 'B2 VSense1', 'B2 TP1: Tesla ECE',
+          'B3 ON/OFF', 'B3 VSense1', 'B3 TP1: Tesla ECE']
+BOARD_STATES = [(1, 0), (0, 1), (1, 1)]  # B2, B3 and multimode B2B3
+TESLA_LIMITS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                                 'test files', 'limits files', 'tesla_dv.htm')
+
+
+@pytest.fixture(scope='module')
+def multimode_station(tmpdir_factory):
+    """ Returns multimode test station of a datafile with B2 and B3 (same system
+        labels) ON alone and together at two voltages """
+    folder = tmpdir_factory.mktemp('multimode')
+    rng = np.random.RandomState(0)
+    lines = ['\t'.join(HEADER)]
+    for i in range(60):
+        voltage = 9 if i < 30 else 13.5
+        fields = ['2018/02/26', '10:{:02d}:{:02d}.517'.format(i // 60, i % 60),
+                  str(round(23 + rng.rand(), 3)), str(voltage)]
+        for state in BOARD_STATES[i % 3]:
+            fields += [str(state), str(round(voltage + rng.rand() / 10, 5)),
+                       str(round(0.3 + rng.rand() / 100, 6))] if state else ['0', 'OFF', 'OFF']
+        lines.append('\t'.join(fields))
+    folder.join('20180226_104538_Validation V47 Run 11_B.txt').write('\n'.join(lines) + '\n')
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TestStation('multimode', str(folder), [], None, False, True, 5, 0.5, 23)
+
+
+def test_modes_are_views_of_test_df(multimode_station):
+    columns = list(multimode_station.df.columns)
+    for mode in multimode_station.modes:
+        rows = multimode_station.df.iloc[mode.positions]
+        pd.testing.assert_frame_equal(mode.df[columns], rows)
+        assert sum(sum(voltages.values()) for voltages in mode.hist_dict.values()) <= len(rows)
+    assert list(multimode_station.df.columns) == columns  # no multimode columns added
+
+
+def test_condition_values_match_condition_df(multimode_station):
+    multimodes = [mode for mode in multimode_station.modes if mode.multimode]
+    assert multimodes
+    for mode in multimodes:
+        for temp in mode.hist_dict:
+            for voltage, count in mode.hist_dict[temp].items():
+                dframe = mode.condition_df(temp, voltage)
+                assert len(dframe) == count
+                for i, system in enumerate(mode.systems):
+                    values = mode.condition_values(system, temp, voltage)
+                    np.testing.assert_array_equal(values, dframe[system].values)
+                    currents = sum(dframe[board.systems[i]].values.astype(np.float64)
+                                   for board in mode.boards)
+                    np.testing.assert_allclose(values, currents)
+
+
+def test_conditions_block_stacks_condition_values(multimode_station):
+    for mode in multimode_station.modes:
+        conditions = [(temp, voltage) for temp in mode.hist_dict for voltage in mode.hist_dict[temp]]
+        for columns in (mode.systems, mode.voltage_senses):
+            block, counts = mode.conditions_block(columns, conditions)
+            assert counts == [mode.hist_dict[temp][voltage] for temp, voltage in conditions]
+            for j, column in enumerate(columns):
+                expected = np.concatenate([mode.condition_values(column, temp, voltage)
+                                           for temp, voltage in conditions])
+                np.testing.assert_array_equal(block[:, j], expected)
+
+
+@pytest.fixture(scope='module')
+def binned_station(tmpdir_factory):
+    """ Returns test station of a datafile with B2 systems of LED bins 5K
+        (0.165A to 0.203A) and 8J (0.191A to 0.235A), one current out of its
+        bin's limits at each voltage """
+    folder = tmpdir_factory.mktemp('binned')
+    lines = ['\t'.join(['Date', 'Time', 'Temp TC1: Amb', 'Vsetpoint', 'B2 ON/OFF',
+                        'B2 VSense1', 'B2 TP1: 5K System 1', 'B2 TP2: 8J System 2'])]
+    for i in range(60):
+        voltage = 9 if i < 30 else 13.5
+        currents = {3: ('0.21', '0.21'), 40: ('0.18', '0.18')}.get(i, ('0.18', '0.21'))
+        lines.append('\t'.join(['2018/02/26', '10:00:{:02d}.517'.format(i), '23.2',
+                                str(voltage), '1', str(voltage)] + list(currents)))
+    folder.join('20180226_104538_Validation V47 Run 11_B.txt').write('\n'.join(lines) + '\n')
+    limits = Limits(TESLA_LIMITS_FILE)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TestStation('binned', str(folder), ['B2'], limits, False, False, 5, 0.5, 23)
+
+
+def test_out_of_spec_data_with_led_binning(binned_station, tmpdir):
+    mode, = binned_station.modes
+    mode.get_out_of_spec_data(str(tmpdir) + os.sep)
+    with open(os.path.join(str(tmpdir), 'binned - out of spec_01.txt')) as out_of_spec_file:
+        text = out_of_spec_file.read()
+    assert text.count('Out of spec data rows - Iin') == 2 and 'Vin' not in text
+    assert [line[:19] for line in text.splitlines() if line.startswith('2018')] == \
+           ['2018-02-26 10:00:03', '2018-02-26 10:00:40']  # 5K and 8J limits
@@ -0,0 +1,40 @@
+"""
+This module tests the PartitionStore class in partitions.py
+"""
+
+import os
+import pytest
+import pandas as pd
+from core.data_import.datafile import read_raw_datafile
+from core.data_import.partitions import PartitionStore
+
+
+RUN11_DATAFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..',
+                              'test files', 'Run11', '20180226_104538_Validation V47 Run 11_B_3.txt')
+
+
+@pytest.fixture
+def store(tmpdir):
+    """ Returns PartitionStore in a temporary folder """
+    store = PartitionStore(str(tmpdir))
+    yield store
+    store.close()
+
+
+def test_partition_round_trip(store):
+    dframe = read_raw_datafile(RUN11_DATAFILE)
+    store.append('B1', dframe.iloc[:5])
+    store.append('B1', dframe.iloc[5:])
+    store.append('B2', dframe.iloc[:0])  # empty chunks are not spilled
+    assert store.version('B1') == 2 and 'B2' not in store and store.read('B2') is None
+    pd.testing.assert_frame_equal(store.read('B1'), dframe)
+    assert store.read('B1') is store.read('B1')  # last partition read is kept
+
+
+def test_partition_clear_and_close(store):
+    dframe = read_raw_datafile(RUN11_DATAFILE)
+    store.append('B1', dframe)
+    store.clear()
+    assert store.keys() == [] and os.listdir(store.directory) == []
+    store.close()
+    assert not os.path.exists(store.directory)
@@ -0,0 +1,67 @@
+"""
+This module tests the RotatingFile class in rotating_file.py
+"""
+
+import os
+import gzip
+import pytest
+import pandas as pd
+from core.data_import.rotating_file import *
+
+
+@pytest.fixture
+def block():
+    """ Returns out of spec dataframe of 20 rows """
+    index = pd.date_range('2018-02-26 10:45:55', periods=20, freq='S', name='DATE_TIME')
+    return pd.DataFrame({'Vsetpoint': [13.5] * 20, 'B1 VSense1': [13.61] * 20}, index=index)
+
+
+def test_file_rotates_on_bytes_written(tmpdir, block):
+    directory = str(tmpdir) + os.sep
+    text = block.to_csv(sep='\t')
+    out_of_spec_file = RotatingFile(directory=directory, max_file_size=2 * len(text))
+    for _ in range(5):
+        out_of_spec_file.write('', block)
+    out_of_spec_file.close()
+    assert sorted(os.listdir(directory)) == ['out_of_spec_01.txt', 'out_of_spec_02.txt']
+    with open(directory + 'out_of_spec_01.txt') as rotated:
+        assert rotated.read() == text * 3  # rotated once over max_file_size
+    assert os.path.getsize(directory + 'out_of_spec_02.txt') == 2 * len(text)
+
+
+def test_file_stops_after_max_files(tmpdir, block):
+    directory = str(tmpdir) + os.sep
+    out_of_spec_file = RotatingFile(directory=directory, max_files=2, max_file_size=1)
+    for _ in range(4):
+        out_of_spec_file.write('', block)
+    assert out_of_spec_file.finished
+    assert sorted(os.listdir(directory)) == ['out_of_spec_01.txt', 'out_of_spec_02.txt']
+
+
+def test_compressed_file(tmpdir, block):
+    directory = str(tmpdir) + os.sep
+    out_of_spec_file = RotatingFile(directory=directory, compress=True)
+    out_of_spec_file.write('\n\n23\N{DEGREE SIGN}C\n', block)
+    out_of_spec_file.close()
+    with gzip.open(directory + 'out_of_spec_01.txt.gz', 'rt') as compressed:
+        assert compressed.read() == '\n\n23\N{DEGREE SIGN}C\n' + block.to_csv(sep='\t')
+
+
+def test_size_counts_encoded_bytes(tmpdir, block):
+    directory = str(tmpdir) + os.sep
+    out_of_spec_file = RotatingFile(directory=directory)
+    out_of_spec_file.write('\n\n23\N{DEGREE SIGN}C\n', block)
+    out_of_spec_file.close()
+    assert out_of_spec_file.size == os.path.getsize(directory + 'out_of_spec_01.txt')
+
+
+def test_compressed_file_appended_to_keeps_size(tmpdir, block):
+    directory = str(tmpdir) + os.sep
+    out_of_spec_file = RotatingFile(directory=directory, compress=True)
+    out_of_spec_file.write('', block)
+    out_of_spec_file.close()
+    appended = RotatingFile(directory=directory, compress=True)
+    appended.write('', block)
+    appended.close()
+    with gzip.open(directory + 'out_of_spec_01.txt.gz', 'rb') as compressed:
+        assert appended.size == len(compressed.read()) == 2 * out_of_spec_file.size
@@ -0,0 +1,46 @@
+"""
+This module tests the HeaderSchema class in schema.py
+"""
+
+import os
+import pytest
+from core.data_import.datafile import read_raw_header
+from core.data_import.schema import *
+
+
+RUN11_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', '..', 'test files', 'Run11')
+
+
+@pytest.fixture
+def run11_header():
+    """ Returns column labels of a Run11 raw datafile header """
+    return read_raw_header(os.path.join(RUN11_FOLDER,
+                                        '20180226_104538_Validation V47 Run 11_B_3.txt'))
+
+
+def test_schema_classifies_columns(run11_header):
+    schema = HeaderSchema(run11_header)
+    assert schema.boards == ['B1', 'B2', 'B3', 'B4', 'B5', 'B6', 'B7']
+    assert schema.thermocouples == ['Temp TC1: Amb', 'Temp TC2: P552 P/T',
+                                    'Temp TC3: Fog LED', 'Temp TC4: L2-5']
+    assert schema.on_off['B4'] == 'B4 ON/OFF'
+    assert schema.systems['B4'] == ['B4 TP2: Tesla SAE']  # NO_UUT is not a system
+    assert schema.systems['B7'][:2] == ['B7 TP1: L2-1', 'B7 TP2: L2-2']
+    assert schema.voltage_senses == ['B' + str(i) + ' VSense1' for i in range(1, 7)]
+    assert 'B7' not in schema.board_voltage_senses
+    assert schema.system_names[:2] == ['TP1: P552 PT', 'TP1: Tesla ECE']  # no duplicates
+    assert 'Vsetpoint' not in schema.board_of and 'Date' not in schema.board_of
+
+
+def test_schema_matches_board_ids_exactly():
+    schema = HeaderSchema(['Vsetpoint', 'B1 ON/OFF', 'B1 TP1: System 1',
+                           'B11 ON/OFF', 'B11 TP1: System 1', 'B11 TP2: '])
+    assert schema.systems == {'B1': ['B1 TP1: System 1'], 'B11': ['B11 TP1: System 1']}
+    assert schema.empty_test_positions == ['B11 TP2: ']
+
+
+def test_schema_is_classified_once_per_header(run11_header):
+    schema = HeaderSchema.of(run11_header)
+    assert HeaderSchema.of(list(run11_header)) is schema
+    assert HeaderSchema.of(run11_header[:-1]) is not schema
@@ -0,0 +1,69 @@
+"""
+This module tests the folder watchers in watcher.py
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+import pytest
+from core.data_import.watcher import *
+
+
+DATAFILE = '20180226_104538_Validation V47 Run 11_B_1.txt'
+BACKENDS_HERE = ['polling'] + (['inotify'] if sys.platform.startswith('linux') else [])
+
+
+def write_slowly(path, parts, delay):
+    """ Appends parts to file with a delay between writes (like Labview does) """
+    for part in parts:
+        with open(path, 'a') as datafile:
+            datafile.write(part)
+        time.sleep(delay)
+
+
+@pytest.mark.parametrize('backend', BACKENDS_HERE)
+def test_watcher_reports_added_datafile(tmpdir, backend):
+    tmpdir.join('already there.txt').write('old')
+    with create_watcher(str(tmpdir), backend, poll_interval=0.1, settle_time=0.1) as watcher:
+        assert watcher.wait(timeout=0.3) == []
+        tmpdir.join(DATAFILE).write('Date\tTime\n')
+        assert watcher.wait(timeout=2) == [DATAFILE]
+        assert watcher.wait(timeout=0.3) == []
+
+
+@pytest.mark.parametrize('backend', BACKENDS_HERE)
+def test_watcher_waits_for_size_to_settle(tmpdir, backend):
+    path = str(tmpdir.join(DATAFILE))
+    parts = ['Date\tTime\n'] + ['2018/02/26\t10:45:55.517\n'] * 5
+    with create_watcher(str(tmpdir), backend, poll_interval=0.05, settle_time=0.2) as watcher:
+        writer = threading.Thread(target=write_slowly, args=(path, parts, 0.05))
+        writer.start()
+        assert watcher.wait(timeout=5) == [DATAFILE]
+        writer.join()
+        assert watcher.sizes[DATAFILE] == len(''.join(parts))
+
+
+def test_watcher_pattern_and_growth(tmpdir):
+    tmpdir.join(DATAFILE).write('Date\tTime\n')
+    with create_watcher(str(tmpdir), 'polling', pattern=r'_B.*\.txt$', include_growth=True,
+                        poll_interval=0.05, settle_time=0.05) as watcher:
+        tmpdir.join('20180226_104538_Validation V47 Run 11_G.txt').write('ignored')
+        assert watcher.wait(timeout=0.3) == []
+        tmpdir.join(DATAFILE).write('2018/02/26\t10:45:55.517\n', mode='a')
+        assert watcher.wait(timeout=2) == [DATAFILE]
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux only')
+def test_inotify_watcher_closed_when_scan_fails(tmpdir):
+    tmpdir.join(DATAFILE).write('Date\tTime\n')
+    open_fds = len(os.listdir('/proc/self/fd'))
+    with pytest.raises(re.error):
+        create_watcher(str(tmpdir), 'inotify', pattern='(')  # pattern does not compile
+    assert len(os.listdir('/proc/self/fd')) == open_fds
+
+
+def test_create_watcher_unknown_backend(tmpdir):
+    with pytest.raises(ValueError):
+        create_watcher(str(tmpdir), 'kqueue')
@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+
+"""
+This module contains the folder watchers used by the real time mode. A watcher
+blocks until datafiles are added to (or grow in) a folder and reports them once
+their sizes have stopped changing, i.e. once Labview has finished writing them.
+
+Backends:
+    InotifyWatcher => Linux kernel inotify notifications (through ctypes)
+    Win32Watcher => Windows change notifications (requires pywin32)
+    PollingWatcher => stat polling, works everywhere
+"""
+
+import os
+import re
+import sys
+import time
+import select
+import ctypes
+import ctypes.util
+
+
+DEFAULT_POLL_INTERVAL = 0.5  # seconds between folder scans without notifications
+DEFAULT_SETTLE_TIME = 0.5  # seconds a changed file's size must be stable to be reported
+BACKENDS = ('inotify', 'win32', 'polling')
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_READ_SIZE = 64 * 1024
+
+
+def create_watcher(folder, backend=None, **kwargs):
+    """ Create the best available watcher for the platform
+    Args:
+        folder (string): Folder to watch
+        backend (string): 'inotify', 'win32' or 'polling'. By default inotify is
+                          used on Linux and win32 on Windows. Polling is used if
+                          the preferred backend is not available
+        kwargs: Passed on to the watcher (pattern, include_growth, ...)
+    Returns:
+        watcher (FolderWatcher): Watcher for input folder
+    """
+    if backend is None:
+        backend = 'inotify' if sys.platform.startswith('linux') else \
+                  'win32' if sys.platform == 'win32' else 'polling'
+    if backend not in BACKENDS:
+        raise ValueError('Unknown watcher backend "' + str(backend) + '". ' + \
+                         'Expected one of: ' + ', '.join(BACKENDS))
+    watchers = {'inotify': InotifyWatcher, 'win32': Win32Watcher, 'polling': PollingWatcher}
+    try:
+        return watchers[backend](folder, **kwargs)
+    except (OSError, ImportError) as e:
+        if backend == 'polling':
+            raise
+        print('\t' + backend, 'watcher is not available, polling folder instead -', e)
+        return PollingWatcher(folder, **kwargs)
+
+
+class FolderWatcher(object):
+    """
+    Base class of the folder watchers. Subclasses implement _wait_for_event,
+    which blocks until the folder may have changed (or a timeout passes).
+
+    Attributes:
+        folder (string): Folder being watched
+        pattern (string): Regex filenames must match to be watched (None for all)
+        include_growth (bool): Also report files that grew, not only new files
+        poll_interval (float): Seconds between folder scans without notifications
+        settle_time (float): Seconds a changed file's size must be stable
+        sizes (dict): filename -> size of each file when last reported
+    Essential methods:
+        wait: Blocks until new (or grown) files have settled and returns them
+        close: Releases the notification resources
+    """
+    def __init__(self, folder, pattern=None, include_growth=False,
+                 poll_interval=DEFAULT_POLL_INTERVAL, settle_time=DEFAULT_SETTLE_TIME):
+        self.folder = os.path.abspath(folder)
+        self.pattern = pattern
+        self.include_growth = include_growth
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.sizes = self.__snapshot()
+
+    def __repr__(self):
+        return '{}: {}'.format(self.__class__.__name__, self.folder)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __snapshot(self):
+        """ Returns: dict of filename -> size for watched files in folder """
+        sizes = {}
+        for entry in os.scandir(self.folder):
+            if self.pattern and not re.search(self.pattern, entry.name):
+                continue
+            try:
+                if entry.is_file():
+                    sizes[entry.name] = entry.stat().st_size
+            except OSError:  # deleted while scanning
+                pass
+        return sizes
+
+    def __changed_files(self, sizes):
+        """ Returns: set of files added (or grown) since they were last reported """
+        if self.include_growth:
+            return {fn for fn, size in sizes.items() if self.sizes.get(fn) != size}
+        return {fn for fn in sizes if fn not in self.sizes}
+
+    def wait(self, timeout=None):
+        """ Blocks until files are added to folder (or grow, if include_growth)
+            and their sizes stop changing for settle_time
+        Args:
+            timeout (float): Seconds to wait at most (None waits forever)
+        Returns:
+            filenames (list): Sorted names of the settled files ([] on timeout)
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        pending = {}  # changed filename -> size at previous check
+        while True:
+            sizes = self.__snapshot()
+            changed = self.__changed_files(sizes)
+            if changed and all(pending.get(fn) == sizes[fn] for fn in changed):
+                self.sizes = sizes  # writes completed
+                return sorted(changed)
+            if not changed:
+                self.sizes = sizes  # forget deleted files
+            pending = {fn: sizes[fn] for fn in changed}
+            wait_time = self.settle_time if changed else self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return []
+                wait_time = min(wait_time, remaining)
+            if changed:
+                time.sleep(wait_time)
+            else:
+                self._wait_for_event(wait_time)
+
+    def _wait_for_event(self, timeout):
+        """ Blocks until folder may have changed or timeout (seconds) passes """
+        raise NotImplementedError
+
+    def close(self):
+        """ Releases notification resources """
+        pass
+
+
+class PollingWatcher(FolderWatcher):
+    """ Scans the folder every poll_interval seconds """
+    def _wait_for_event(self, timeout):
+        time.sleep(timeout)
+
+
+class InotifyWatcher(FolderWatcher):
+    """ Wakes up on Linux inotify events of the folder """
+    def __init__(self, folder, **kwargs):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError('C library not found')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not supported on this platform')
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        watch = libc.inotify_add_watch(self.fd, os.fsencode(os.path.abspath(folder)),
+                                       INOTIFY_MASK)
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, 'inotify_add_watch failed for ' + folder)
+        try:
+            FolderWatcher.__init__(self, folder, **kwargs)
+        except:
+            self.close()  # scan of the folder failed
+            raise
+
+    def _wait_for_event(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self.fd, INOTIFY_READ_SIZE):  # drain queued events
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class Win32Watcher(FolderWatcher):
+    """ Wakes up on Windows change notifications of the folder """
+    def __init__(self, folder, **kwargs):
+        import win32file, win32event, win32con
+        self.win32file, self.win32event = win32file, win32event
+        self.wait_object = win32con.WAIT_OBJECT_0
+        self.handle = win32file.FindFirstChangeNotification(
+            os.path.abspath(folder), 0,
+            win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_SIZE)
+        try:
+            FolderWatcher.__init__(self, folder, **kwargs)
+        except:
+            self.close()  # scan of the folder failed
+            raise
+
+    def _wait_for_event(self, timeout):
+        result = self.win32event.WaitForSingleObject(self.handle, int(timeout * 1000))
+        if result == self.wait_object:
+            self.win32file.FindNextChangeNotification(self.handle)
+
+    def close(self):
+        if self.handle is not None:
+            self.win32file.FindCloseChangeNotification(self.handle)
+            self.handle = None
@@ -33,6 +33,9 @@ class LimitNotFoundError(Error):
     
     Attributes:
         message (str): error message displayed to user
+        conditions (list): conditions without limits (e.g. - [('DRL', 25, 13.9)])
     """
-    def __init__(self, message):
+    def __init__(self, message, conditions=()):
+        super(LimitNotFoundError, self).__init__(message)
         self.message = message
+        self.conditions = list(conditions)
@@ -1,10 +1,248 @@
 """
 This module contains a Limits class that stores current limits from
-a specified project limits filepath.
+a specified project limits filepath. The limits html page is parsed with
+lxml and compiled XPath queries, and the parsed limits are cached as a
+compact JSON artifact (keyed by the hash of the limits file) in a sidecar
+folder of the limits file, so loading the same limits again (e.g. - every
+real time cycle) skips html parsing.
 """
 
+import os
+import json
+import string
+import numbers
 import pprint as pp
-from bs4 import BeautifulSoup
+import numpy as np
+from lxml import etree
+
+from core.sidecar import CACHE_FOLDER, hash_file_contents
+from core.exceptions.custom_exceptions import LimitNotFoundError
+
+
+LIMITS_ARTIFACT_VERSION = 1  # bump when the compiled limits layout changes
+HAS_CLASS = etree.XPath("descendant::*[contains(concat(' ', normalize-space(@class), ' '), "
+                        "concat(' ', $name, ' '))]")  # descendants of html class $name
+VOLTAGE_ROWS = etree.XPath("descendant::*[@id='voltage']")
+SETPOINT_SLACK = 1e-9  # float rounding allowed on top of setpoint tolerances
+
+
+def limits_artifact_path(filepath, file_hash):
+    """ Returns: path of the compiled limits artifact of a limits file (with
+        contents hash file_hash), in a sidecar folder of the limits file
+        (e.g. - '.test-analysis-cache/limits-P552_L2.htm-<sha1>.json') """
+    return os.path.join(os.path.dirname(os.path.abspath(filepath)), CACHE_FOLDER,
+                        limits_artifact_prefix(filepath) + file_hash + '.json')
+
+def limits_artifact_prefix(filepath):
+    """ Returns: start of the name of every compiled limits artifact of a limits file """
+    return 'limits-' + os.path.basename(filepath) + '-'
+
+def stale_limits_artifacts(filepath, artifact_path):
+    """ Returns: paths of the compiled limits artifacts of earlier contents of a
+        limits file (every artifact of the file other than artifact_path) """
+    directory, artifact_name = os.path.split(artifact_path)
+    prefix = limits_artifact_prefix(filepath)
+    stale = []
+    for name in os.listdir(directory):
+        file_hash = name[len(prefix):-len('.json')]
+        if name.startswith(prefix) and name.endswith('.json') and name != artifact_name and \
+           len(name) == len(artifact_name) and all(c in string.hexdigits for c in file_hash):
+            stale.append(os.path.join(directory, name))
+    return stale
+
+def element_string(element):
+    """ Returns: text of an html element if it holds a single string (directly
+        or in its only child element, like BeautifulSoup's Tag.string) else None """
+    contents = [element.text] if element.text else []
+    for child in element:
+        contents.append(child)
+        if child.tail:
+            contents.append(child.tail)
+    if len(contents) != 1:
+        return None
+    return contents[0] if isinstance(contents[0], str) else element_string(contents[0])
+
+def element_classes(element):
+    """ Returns: list of html classes of an element """
+    return element.get('class', '').split()
+
+def module_header(mode_name, led_bin=''):
+    """ Returns: limits header of a mode's LED bin (e.g. - '8J Reverse') or of
+        the mode if led_bin is '' """
+    return led_bin + ' ' + mode_name if led_bin else mode_name
+
+def nearest_setpoint(setpoints, value, tolerance=0):
+    """ Returns: setpoint of a sorted array nearest to value (binary search), or
+        None if it is farther than tolerance from value """
+    position = nearest_setpoint_positions(setpoints, [value], tolerance)[0]
+    return setpoints[position].item() if position >= 0 else None
+
+def nearest_setpoint_positions(setpoints, values, tolerance=0):
+    """ Returns: array of the position in a sorted array of the setpoint nearest
+        to each of values (binary search, the lower setpoint of a tie), -1 where
+        it is farther than tolerance from the value """
+    values = np.asarray(values, dtype=float)
+    if not len(setpoints):
+        return np.full(values.shape, -1, dtype=np.int64)
+    above = np.minimum(np.searchsorted(setpoints, values), len(setpoints) - 1)
+    below = np.maximum(above - 1, 0)
+    nearest = np.where(np.abs(setpoints[below] - values) <= np.abs(setpoints[above] - values),
+                       below, above)
+    within = np.abs(setpoints[nearest] - values) <= tolerance + SETPOINT_SLACK
+    return np.where(within, nearest, -1)
+
+def format_condition(header, temp, voltage):
+    """ Returns: readable condition (e.g. - 'DRL at 23C, 13.9V') """
+    temp = '' if temp is None else ' at {:g}C'.format(temp)
+    return '{}{}, {:g}V'.format(header, temp, voltage)
+
+def limit_not_found_error(conditions):
+    """ Returns: LimitNotFoundError listing (module header, temp, voltage)
+        conditions without limits (temp None for outage states) """
+    return LimitNotFoundError('LimitNotFoundError: no limits within the temperature and ' \
+                              'voltage tolerances for ' + \
+                              '; '.join(format_condition(*condition) for condition in conditions),
+                              conditions)
+
+def setpoint_tolerances(mode):
+    """ Returns: (temperature tolerance, voltage tolerance) of the test of a mode
+        (exact matches if the mode has no test) """
+    test = getattr(mode, 'test', None)
+    return getattr(test, 'temperature_tolerance', 0), getattr(test, 'voltage_tolerance', 0)
+
+
+class LimitsTable(object):
+    """
+    Dense array of the current limits of every module header (mode or LED bin
+    of a mode, e.g. - 'DRL' or '8J Reverse'), temperature and voltage, for
+    looking up many limits at once. Conditions without limits are NaN.
+    Temperatures and voltages are matched to the nearest limits setpoint of the
+    module header within a tolerance (binary search of the sorted setpoints),
+    e.g. - a Vsetpoint of 13.95V to the 14.0V limits.
+
+    Attributes:
+        headers (dict): Module header -> position on the first axis
+        temps (numpy array): Sorted temperatures (second axis)
+        voltages (numpy array): Sorted voltages (third axis)
+        lower, upper (numpy array): Lower/upper limits (headers x temps x voltages)
+        setpoints (dict): Module header -> sorted temperatures of its limits, and
+                          (module header, temp) -> sorted voltages of its limits
+    Essential methods:
+        limits_at: Lower and upper limits of a mode at temps, voltages and LED bins
+        unmatched_conditions: Conditions of a mode without limits
+    """
+    def __init__(self, lim):
+        current_lim = {header: temps for header, temps in lim.items()
+                       if all(isinstance(temp, numbers.Number) for temp in temps)}  # not outage states
+        self.headers = {header: i for i, header in enumerate(current_lim)}
+        self.temps = np.array(sorted(set(temp for temps in current_lim.values() for temp in temps)))
+        self.voltages = np.array(sorted(set(voltage for temps in current_lim.values()
+                                            for voltages in temps.values() for voltage in voltages)))
+        shape = (len(self.headers), len(self.temps), len(self.voltages))
+        self.lower, self.upper = np.full(shape, np.nan), np.full(shape, np.nan)
+        self.setpoints = {}
+        for header, temps in current_lim.items():
+            self.setpoints[header] = np.array(sorted(temps))
+            for temp, voltages in temps.items():
+                self.setpoints[(header, temp)] = np.array(sorted(voltages))
+                for voltage, (minimum, maximum) in voltages.items():
+                    index = (self.headers[header], np.searchsorted(self.temps, temp),
+                             np.searchsorted(self.voltages, voltage))
+                    self.lower[index], self.upper[index] = minimum, maximum
+
+    def __repr__(self):
+        return '{}: {} headers x {} temps x {} voltages'.format(
+               self.__class__.__name__, *self.lower.shape)
+
+    def __resolve(self, header, temps, voltages, temperature_tolerance, voltage_tolerance):
+        """ Returns: array (conditions x 3) of the (header, temp, voltage) position in
+            lower/upper of the nearest limits setpoint of each temps/voltages
+            condition of a module header (-1 rows for conditions without limits).
+            The setpoints of every condition are matched at once, per limits
+            temperature for the voltages. """
+        index = np.full((len(temps), 3), -1, dtype=np.int64)
+        if header not in self.headers:
+            return index
+        setpoint_temps = self.setpoints[header]
+        temp_positions = nearest_setpoint_positions(setpoint_temps, temps, temperature_tolerance)
+        for temp_position in np.unique(temp_positions[temp_positions >= 0]):
+            temp = setpoint_temps[temp_position].item()
+            at_temp = np.flatnonzero(temp_positions == temp_position)
+            setpoint_voltages = self.setpoints[(header, temp)]
+            voltage_positions = nearest_setpoint_positions(setpoint_voltages, voltages[at_temp],
+                                                           voltage_tolerance)
+            matched = voltage_positions >= 0
+            index[at_temp[matched]] = np.column_stack([
+                np.full(matched.sum(), self.headers[header]),
+                np.full(matched.sum(), np.searchsorted(self.temps, temp)),
+                np.searchsorted(self.voltages, setpoint_voltages[voltage_positions[matched]])])
+        return index
+
+    def __lookup(self, mode_name, temps, voltages, led_bins, temperature_tolerance,
+                 voltage_tolerance):
+        """ Returns: (lower, upper, unmatched conditions) of limits_at. The distinct
+            conditions are resolved at once for each module header, then broadcast
+            back to the input shape. """
+        led_bins = np.asarray(led_bins, dtype=object)
+        header_codes = np.arange(led_bins.size).reshape(led_bins.shape)
+        header_codes, temps, voltages = np.broadcast_arrays(header_codes, np.asarray(temps, dtype=float),
+                                                            np.asarray(voltages, dtype=float))
+        lower, upper = np.full(header_codes.shape, np.nan), np.full(header_codes.shape, np.nan)
+        if not header_codes.size:
+            return lower, upper, []
+        conditions, inverse = np.unique(np.stack([header_codes.ravel(), temps.ravel(),
+                                                  voltages.ravel()], axis=1),
+                                        axis=0, return_inverse=True)
+        index = np.full((len(conditions), 3), -1, dtype=np.int64)
+        for header_code in np.unique(conditions[:, 0]):
+            of_header = np.flatnonzero(conditions[:, 0] == header_code)
+            index[of_header] = self.__resolve(module_header(mode_name, led_bins.flat[int(header_code)]),
+                                              conditions[of_header, 1], conditions[of_header, 2],
+                                              temperature_tolerance, voltage_tolerance)
+        matched = index[:, 0] >= 0
+        condition_lower, condition_upper = np.full(len(conditions), np.nan), np.full(len(conditions), np.nan)
+        condition_lower[matched] = self.lower[tuple(index[matched].T)]
+        condition_upper[matched] = self.upper[tuple(index[matched].T)]
+        unmatched = []
+        for header_code, temp, voltage in conditions[~matched]:
+            condition = (module_header(mode_name, led_bins.flat[int(header_code)]),
+                         int(temp) if temp.is_integer() else temp, voltage)
+            if condition not in unmatched:
+                unmatched.append(condition)
+        inverse = inverse.reshape(-1)
+        lower.flat[:], upper.flat[:] = condition_lower[inverse], condition_upper[inverse]
+        return lower, upper, unmatched
+
+    def limits_at(self, mode_name, temps, voltages, led_bins='', temperature_tolerance=0,
+                  voltage_tolerance=0):
+        """ Returns the limits of a mode, broadcast over temps, voltages and LED bins
+        Args:
+            mode_name (str): Name of the mode (e.g. - 'DRL')
+            temps, voltages (number or array): Temperatures and voltages (e.g. - of
+                                               each condition or row, as a column)
+            led_bins (str or list): LED bin ('' for the mode's limits), e.g. - the
+                                    LED bin of each system of the mode
+            temperature_tolerance, voltage_tolerance (float): Largest distance to the
+                                    nearest limits setpoint (default: exact match)
+        Returns:
+            lower, upper (numpy array): Limits in the broadcast shape of the inputs,
+                                        e.g. - conditions x systems
+        Raises:
+            LimitNotFoundError: listing every condition without limits
+        """
+        lower, upper, unmatched = self.__lookup(mode_name, temps, voltages, led_bins,
+                                                temperature_tolerance, voltage_tolerance)
+        if unmatched:
+            raise limit_not_found_error(unmatched)
+        return lower, upper
+
+    def unmatched_conditions(self, mode_name, temps, voltages, led_bins='',
+                             temperature_tolerance=0, voltage_tolerance=0):
+        """ Returns: list of (module header, temp, voltage) conditions of limits_at
+            without limits within the tolerances """
+        return self.__lookup(mode_name, temps, voltages, led_bins,
+                             temperature_tolerance, voltage_tolerance)[2]
+
 
 class Limits(object):
     """
@@ -18,15 +256,18 @@ class Limits(object):
         board_module_pairs (dict): keys: boards, values: modules
         temps (list of integers): Temperatures to load limits for
                                   e.g. - 85 or -40 or 23 etc.
+        tree (lxml element): Parsed limits page (None if the limits were
+                             loaded from the compiled artifact)
+        table (LimitsTable): Current limits of lim as dense arrays
     Essential methods:
         get_board_info: Retrieves board/module info from file
         get_limits: Retrieves current limits for all modes from file
         print_info: Prints board module pairs and the current limits
     """
-    def __init__(self, filepath):
+    def __init__(self, filepath, cache=True):
         self.filepath = filepath
         self.lim = {}
-        self.soup = ''
+        self.tree = None
         self.modules = []
         self.board_module_pairs = {}
         self.outage_board = ''
@@ -34,24 +275,29 @@ class Limits(object):
         self.binning = False
         self.led_binning_dict = {}
 
-        self.set_soup()
-        self.get_board_info()
-        self.get_limits()
+        artifact_path = limits_artifact_path(filepath, hash_file_contents(filepath)) if cache else None
+        if not (artifact_path and self.load_artifact(artifact_path)):
+            self.set_tree()
+            self.get_board_info()
+            self.get_limits()
+            if artifact_path:
+                self.save_artifact(artifact_path)
+        self.table = LimitsTable(self.lim)
 
-    def set_soup(self):
-        """ Set BeautifulSoup instance to parse limits file """
+    def set_tree(self):
+        """ Parse limits file (html) with lxml """
         with open(self.filepath) as filepath:
-            self.soup = BeautifulSoup(filepath, 'lxml')
+            self.tree = etree.fromstring(filepath.read(), etree.HTMLParser())
 
     def get_board_info(self):
         """ Retrieve board information from limits file """
-        board_rows = self.soup.find_all(class_='board')
+        board_rows = HAS_CLASS(self.tree, name='board')
         for board_row in board_rows:
-            data = board_row.find_all('td')
-            board = data[0].string
-            module = data[1].string
-            led_bins = data[2].string
-            is_outage = data[3].string
+            data = board_row.findall('.//td')
+            board = element_string(data[0])
+            module = element_string(data[1])
+            led_bins = element_string(data[2])
+            is_outage = element_string(data[3])
             self.board_module_pairs[board] = module
             self.modules.append(module)
             if led_bins:
@@ -63,7 +309,7 @@ class Limits(object):
 
     def get_limits(self):
         """ Set limits for each mode present and outage (if present) """
-        modes = self.soup.find_all(class_='mode')
+        modes = HAS_CLASS(self.tree, name='mode')
         for mode in modes:
             self._get_mode_limits(mode)
         if 'OUTAGE' in self.modules:
@@ -72,35 +318,81 @@ class Limits(object):
     def _get_mode_limits(self, mode):
         """ Set limits for input mode 
         Args:
-            mode (str): mode for which to set limits
+            mode (lxml element): mode for which to set limits
         """
         mode_id = mode.get('id')
         self.lim[mode_id] = {}
-        temp_tables = mode.find_all(class_='temp-table')
+        temp_tables = HAS_CLASS(mode, name='temp-table')
         for temp_table in temp_tables:
-            temp = temp_table.get('class')[-1].replace('temp', '')
+            temp = element_classes(temp_table)[-1].replace('temp', '')
             temp = int(temp.replace('C', ''))
-            self.lim[mode_id][temp] = {}
-            voltage_rows = temp_table.find_all(lambda tag: tag.get('id') == 'voltage')
-            for voltage_row in voltage_rows:
-                voltage = round(float(voltage_row.get('class')[0]), 1)
-                minimum = round(float(voltage_row.find(class_='min').string), 3)
-                maximum = round(float(voltage_row.find(class_='max').string), 3)
-                self.lim[mode_id][temp][voltage] = (minimum, maximum)
+            self.lim[mode_id][temp] = self._get_voltage_limits(temp_table)
 
     def _get_outage_limits(self):
         """ Set limits for outage """
-        outage_tables = self.soup.find_all(class_='outage-table')
+        outage_tables = HAS_CLASS(self.tree, name='outage-table')
         self.lim['OUTAGE'] = {}
         for outage_table in outage_tables:
             outage_state = outage_table.get('state')
-            self.lim['OUTAGE'][outage_state] = {}
-            voltage_rows = outage_table.find_all(lambda tag: tag.get('id') == 'voltage')
-            for voltage_row in voltage_rows:
-                voltage = round(float(voltage_row.get('class')[0]), 1)
-                minimum = round(float(voltage_row.find(class_='min').string), 3)
-                maximum = round(float(voltage_row.find(class_='max').string), 3)
-                self.lim['OUTAGE'][outage_state][voltage] = (minimum, maximum)
+            self.lim['OUTAGE'][outage_state] = self._get_voltage_limits(outage_table)
+
+    def _get_voltage_limits(self, table):
+        """ Returns: dict of voltage -> (min current, max current) of the voltage
+            rows of a temperature (or outage state) table """
+        voltage_limits = {}
+        for voltage_row in VOLTAGE_ROWS(table):
+            voltage = round(float(element_classes(voltage_row)[0]), 1)
+            minimum = round(float(element_string(HAS_CLASS(voltage_row, name='min')[0])), 3)
+            maximum = round(float(element_string(HAS_CLASS(voltage_row, name='max')[0])), 3)
+            voltage_limits[voltage] = (minimum, maximum)
+        return voltage_limits
+
+    def load_artifact(self, artifact_path):
+        """ Load limits from the compiled limits artifact
+        Returns: True if the artifact was loaded (False if missing or outdated) """
+        try:
+            with open(artifact_path) as artifact_file:
+                artifact = json.load(artifact_file)
+            if artifact['version'] != LIMITS_ARTIFACT_VERSION:
+                return False
+            self.lim = {mode_id: {temp: {voltage: (minimum, maximum)
+                                         for voltage, minimum, maximum in voltage_limits}
+                                  for temp, voltage_limits in temps}
+                        for mode_id, temps in artifact['lim']}
+            self.modules = artifact['modules']
+            self.board_module_pairs = dict(artifact['board_module_pairs'])
+            self.outage_board = artifact['outage_board']
+            self.outage_present = artifact['outage_present']
+            self.binning = artifact['binning']
+            self.led_binning_dict = dict(artifact['led_binning_dict'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def save_artifact(self, artifact_path):
+        """ Write the parsed limits to the compiled limits artifact (temperature
+            and voltage keys are kept as [key, value] pairs, not JSON strings) """
+        artifact = {'version': LIMITS_ARTIFACT_VERSION,
+                    'lim': [[mode_id, [[temp, [[voltage] + list(limits)
+                                               for voltage, limits in voltage_limits.items()]]
+                                       for temp, voltage_limits in temps.items()]]
+                            for mode_id, temps in self.lim.items()],
+                    'modules': self.modules,
+                    'board_module_pairs': list(self.board_module_pairs.items()),
+                    'outage_board': self.outage_board,
+                    'outage_present': self.outage_present,
+                    'binning': self.binning,
+                    'led_binning_dict': list(self.led_binning_dict.items())}
+        try:
+            os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+            temp_path = artifact_path + '.' + str(os.getpid()) + '.tmp'
+            with open(temp_path, 'w') as artifact_file:
+                json.dump(artifact, artifact_file)
+            os.replace(temp_path, artifact_path)  # never read half written
+            for stale_path in stale_limits_artifacts(self.filepath, artifact_path):
+                os.remove(stale_path)  # limits file was edited since
+        except OSError as e:
+            print('\tLimits cache disabled, could not write', artifact_path, '-', e)
 
     def print_info(self):
         """ Print information on limits that were retrieved from file """
@@ -113,6 +405,18 @@ class Limits(object):
 
 
 # Limits helper functions
+def limits_table(limits):
+    """ Returns: LimitsTable of a limits object. A limits object without one (e.g. -
+        a stand-in holding only lim) gets its table built once and kept on it. """
+    table = getattr(limits, 'table', None)
+    if table is None:
+        table = LimitsTable(limits.lim)
+        try:
+            limits.table = table
+        except AttributeError:  # object does not take attributes, built every call
+            pass
+    return table
+
 def get_limits_at_mode_temp_voltage(limits, mode, temp, voltage):
     """ Attempt to pull mode/temp/voltage condition current limits from Limits object
     Args:
@@ -135,12 +439,9 @@ def get_limits_at_mode_temp_voltage(limits, mode, temp, voltage):
 def get_limits_without_binning(limits, mode, temp, voltage):
     """ Returns: dict of current LL and UL for input mode/temp/voltage
         condition (no LED binning) """
-    try:
-        lower_limit = limits.lim[mode.name][temp][voltage][0]
-        upper_limit = limits.lim[mode.name][temp][voltage][1]
-        return {'LL': lower_limit, 'UL': upper_limit}
-    except:
-        raise
+    lower_limit, upper_limit = limits_table(limits).limits_at(mode.name, temp, voltage, '',
+                                                                   *setpoint_tolerances(mode))
+    return {'LL': float(lower_limit), 'UL': float(upper_limit)}
 
 def get_all_mode_limits_with_binning(limits, mode, temp, voltage):
     """ Gets mode limits with binning 
@@ -153,14 +454,13 @@ def get_all_mode_limits_with_binning(limits, mode, temp, voltage):
         mode_bin_limits_dict (dict): e.g. - {'KY LL': 1.346, 'KY UL': 1.934
                                              '8J LL': 0.655, '8J UL': 0.815}
     """
+    lower_limits, upper_limits = limits_table(limits).limits_at(mode.name, temp, voltage,
+                                                                list(mode.led_bins),
+                                                                *setpoint_tolerances(mode))
     mode_bin_limits_dict = {}
-    for led_bin in mode.led_bins:
-        module_header = led_bin + ' ' + mode.name
-        try:
-            mode_bin_limits_dict[led_bin+' LL'] = limits.lim[module_header][temp][voltage][0]
-            mode_bin_limits_dict[led_bin+' UL'] = limits.lim[module_header][temp][voltage][1]
-        except:
-            raise
+    for led_bin, lower_limit, upper_limit in zip(mode.led_bins, lower_limits, upper_limits):
+        mode_bin_limits_dict[led_bin+' LL'] = float(lower_limit)
+        mode_bin_limits_dict[led_bin+' UL'] = float(upper_limit)
     return mode_bin_limits_dict
 
 def get_limit_for_single_led_bin(led_bin, limits, mode, temp, voltage):
@@ -174,14 +474,9 @@ def get_limit_for_single_led_bin(led_bin, limits, mode, temp, voltage):
     Returns:
         mode_bin_limits_dict (dict): e.g. - {'KY LL': 1.346, 'KY UL': 1.934}
     """
-    mode_bin_limits_dict = {}
-    module_header = led_bin + ' ' + mode.name
-    try:
-        mode_bin_limits_dict[led_bin+' LL'] = limits.lim[module_header][temp][voltage][0]
-        mode_bin_limits_dict[led_bin+' UL'] = limits.lim[module_header][temp][voltage][1]
-    except:
-        raise
-    return mode_bin_limits_dict
+    lower_limit, upper_limit = limits_table(limits).limits_at(mode.name, temp, voltage, led_bin,
+                                                              *setpoint_tolerances(mode))
+    return {led_bin+' LL': float(lower_limit), led_bin+' UL': float(upper_limit)}
 
 def get_limits_for_system_with_binning(limits, mode, temp, voltage, system):
     """ Get mode limits for single system with binning
@@ -194,14 +489,57 @@ def get_limits_for_system_with_binning(limits, mode, temp, voltage, system):
     Returns:
         LL UL dict: e.g. - {'LL': 1.346, 'UL': 1.934}
     """
-    led_bin = get_system_bin(mode, system)
-    module_header = led_bin + ' ' + mode.name
-    try:
-        lower_limit = limits.lim[module_header][temp][voltage][0]
-        upper_limit = limits.lim[module_header][temp][voltage][1]
-        return {'LL': lower_limit, 'UL': upper_limit}
-    except:
-        raise
+    lower_limit, upper_limit = limits_table(limits).limits_at(mode.name, temp, voltage,
+                                                              get_system_bin(mode, system),
+                                                              *setpoint_tolerances(mode))
+    return {'LL': float(lower_limit), 'UL': float(upper_limit)}
+
+def get_system_limits(limits, mode, temps, voltages):
+    """ Get current limits of every system of a mode at once
+    Args:
+        limits (Limit instance): limits to use for retrieval
+        mode (Mode instance): limit mode
+        temps, voltages (number or array): limit temperatures and voltages, e.g. - of
+                                           each condition or row (as a column array)
+    Returns:
+        lower_limits, upper_limits (numpy array): limits (... x systems) of each
+                                                  system, of its LED bin if binned
+    """
+    return limits_table(limits).limits_at(mode.name, np.asarray(temps)[..., np.newaxis],
+                                          np.asarray(voltages)[..., np.newaxis],
+                                          system_led_bins(mode), *setpoint_tolerances(mode))
+
+def system_led_bins(mode):
+    """ Returns: list of the LED bin of each system of a mode ('' if not binned) """
+    return mode.system_bins if mode.has_led_binning else [''] * len(mode.systems)
+
+def check_limits(limits, modes, outage=None):
+    """ Resolves the limits of every temp/voltage condition of the modes (and outage
+        board) with data up front, so missing limits are reported before any analysis
+    Args:
+        limits (Limit instance): limits to use for retrieval
+        modes (list): Mode instances of the test
+        outage (Outage instance): outage board of the test (None if no outage)
+    Raises:
+        LimitNotFoundError: listing every condition without limits within the
+                            temperature and voltage tolerances of the test
+    """
+    unmatched = []
+    for mode in modes:
+        conditions = [(temp, voltage) for temp in mode.hist_dict for voltage in mode.hist_dict[temp]]
+        if not conditions:
+            continue
+        temps, voltages = (np.array(values) for values in zip(*conditions))
+        unmatched.extend(limits_table(limits).unmatched_conditions(
+            mode.name, temps[:, np.newaxis], voltages[:, np.newaxis], system_led_bins(mode),
+            *setpoint_tolerances(mode)))
+    if outage:
+        for outage_state in ('ON', 'OFF'):
+            for voltage in outage.test.voltages:
+                if outage_setpoint(limits, outage, outage_state, voltage) is None:
+                    unmatched.append((outage.name + ' ' + outage_state, None, voltage))
+    if unmatched:
+        raise limit_not_found_error(unmatched)
 
 def get_system_bin(mode, system):
     """ Splits system name searching for led_bin info
@@ -217,20 +555,24 @@ def get_system_bin(mode, system):
             return led_bin
     return None
 
+def outage_setpoint(limits, board, outage_state, voltage):
+    """ Returns: voltage of the outage limits nearest to voltage within the voltage
+        tolerance of the test, or None """
+    voltage_limits = limits.lim.get(board.name, {}).get(outage_state, {})
+    return nearest_setpoint(np.array(sorted(voltage_limits)), voltage,
+                            getattr(board.test, 'voltage_tolerance', 0))
+
+def get_limits_for_outage(limits, board, outage_state, voltage):
+    """ Returns: tuple of LL and UL for Outage in outage_state ('ON' or 'OFF') """
+    setpoint = outage_setpoint(limits, board, outage_state, voltage)
+    if setpoint is None:
+        raise limit_not_found_error([(board.name + ' ' + outage_state, None, voltage)])
+    return limits.lim[board.name][outage_state][setpoint]
+
 def get_limits_for_outage_off(limits, board, voltage):
     """ Returns: tuple of LL and UL for Outage when OFF """
-    try:
-        lower_limit = limits.lim[board.name]['OFF'][voltage][0]
-        upper_limit = limits.lim[board.name]['OFF'][voltage][1]
-        return lower_limit, upper_limit
-    except:
-        raise
+    return get_limits_for_outage(limits, board, 'OFF', voltage)
 
 def get_limits_for_outage_on(limits, board, voltage):
     """ Returns: tuple of LL and UL for Outage when ON """
-    try:
-        lower_limit = limits.lim[board.name]['ON'][voltage][0]
-        upper_limit = limits.lim[board.name]['ON'][voltage][1]
-        return lower_limit, upper_limit
-    except:
-        raise
+    return get_limits_for_outage(limits, board, 'ON', voltage)
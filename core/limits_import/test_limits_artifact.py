@@ -0,0 +1,109 @@
+"""
+This test module contains tests on the lxml parser of the Limits class,
+its compiled limits artifact and its dense LimitsTable.
+"""
+
+import os
+import shutil
+import pytest
+import numpy as np
+from types import SimpleNamespace
+from core.limits_import.limits import *
+
+
+LIMITS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             '..', '..', 'test files', 'limits files')
+
+
+@pytest.fixture
+def tesla_limits_file(tmpdir):
+    """ Returns path of a copy of the Tesla DV limits file (LED binning, outage) """
+    return shutil.copy(os.path.join(LIMITS_FOLDER, 'tesla_dv.htm'), str(tmpdir))
+
+
+def test_parse_limits(tesla_limits_file):
+    limits = Limits(tesla_limits_file, cache=False)
+    assert limits.board_module_pairs['B2'] == 'Reverse'
+    assert limits.led_binning_dict == {'B2': ['5K', '8J'], 'B5': ['HY']}
+    assert limits.lim['5K Reverse'][-40] == {9.0: (0.165, 0.202), 13.5: (0.166, 0.203),
+                                            16.0: (0.167, 0.204)}
+    assert not os.path.exists(os.path.join(os.path.dirname(tesla_limits_file), CACHE_FOLDER))
+
+
+def test_limits_loaded_from_artifact(tesla_limits_file):
+    parsed = Limits(tesla_limits_file)
+    cached = Limits(tesla_limits_file)
+    assert parsed.tree is not None and cached.tree is None  # html not parsed again
+    for attribute in ('lim', 'modules', 'board_module_pairs', 'outage_board',
+                      'outage_present', 'binning', 'led_binning_dict'):
+        assert getattr(cached, attribute) == getattr(parsed, attribute)
+
+
+def test_artifact_is_keyed_by_file_contents(tesla_limits_file):
+    Limits(tesla_limits_file)
+    with open(tesla_limits_file) as limits_file:
+        html = limits_file.read()
+    with open(tesla_limits_file, 'w') as limits_file:
+        limits_file.write(html.replace('0.165', '0.175', 1))  # limits edited
+    edited = Limits(tesla_limits_file)
+    assert edited.tree is not None
+    assert edited.lim['5K Reverse'][-40][9.0] == (0.175, 0.202)
+
+
+def test_stale_artifacts_are_removed(tesla_limits_file):
+    other_limits_file = shutil.copy(tesla_limits_file, tesla_limits_file + '.old.htm')
+    Limits(other_limits_file)
+    for edit in ('0.175', '0.185'):
+        with open(tesla_limits_file) as limits_file:
+            html = limits_file.read()
+        with open(tesla_limits_file, 'w') as limits_file:
+            limits_file.write(html.replace('0.165', edit, 1))  # limits edited
+        Limits(tesla_limits_file)
+    cache_folder = os.path.join(os.path.dirname(tesla_limits_file), CACHE_FOLDER)
+    artifacts = [limits_artifact_path(filepath, hash_file_contents(filepath))
+                 for filepath in (tesla_limits_file, other_limits_file)]
+    assert sorted(os.listdir(cache_folder)) == sorted(os.path.basename(path) for path in artifacts)
+
+
+def test_limits_table_broadcasts_led_bins(tesla_limits_file):
+    limits = Limits(tesla_limits_file, cache=False)
+    temps, voltages = np.array([[23], [85]]), np.array([[9.0], [16.0]])  # 2 conditions
+    lower, upper = limits.table.limits_at('Reverse', temps, voltages, ['5K', '8J', '5K'])
+    assert lower.shape == upper.shape == (2, 3)
+    for (i, j), lower_limit in np.ndenumerate(lower):
+        header = ['5K', '8J', '5K'][j] + ' Reverse'
+        assert (lower_limit, upper[i, j]) == limits.lim[header][temps[i, 0]][voltages[i, 0]]
+
+
+def test_limits_table_matches_nearest_setpoint_within_tolerance(tesla_limits_file):
+    table = Limits(tesla_limits_file, cache=False).table
+    lower, upper = table.limits_at('Reverse', [[25], [84]], [[13.45], [9.0]], '5K', 3, 0.1)
+    exact_lower, exact_upper = table.limits_at('Reverse', [[23], [85]], [[13.5], [9.0]], '5K')
+    assert np.array_equal(lower, exact_lower) and np.array_equal(upper, exact_upper)
+
+
+def test_limits_table_lists_every_missing_condition(tesla_limits_file):
+    table = Limits(tesla_limits_file, cache=False).table
+    with pytest.raises(LimitNotFoundError) as error:
+        table.limits_at('Reverse', [[23], [25], [23]], [[14.0], [9.0], [9.0]], ['5K', 'XX'], 1, 0.1)
+    assert error.value.conditions == [('5K Reverse', 23, 14.0), ('5K Reverse', 25, 9.0),
+                                      ('XX Reverse', 23, 9.0), ('XX Reverse', 23, 14.0),
+                                      ('XX Reverse', 25, 9.0)]
+    assert '5K Reverse at 23C, 14V' in error.value.message
+
+
+def test_nearest_setpoint_positions_match_nearest_setpoint():
+    setpoints = np.array([9.0, 13.5, 16.0])
+    values = [8.0, 9.0, 11.25, 11.3, 13.45, 16.05, 17.0, np.nan]
+    positions = nearest_setpoint_positions(setpoints, values, 0.1)
+    assert positions.tolist() == [-1, 0, -1, -1, 1, 2, -1, -1]
+    for value, position in zip(values, positions):
+        expected = nearest_setpoint(setpoints, value, 0.1)
+        assert (setpoints[position] if position >= 0 else None) == expected
+    assert nearest_setpoint_positions(setpoints, [11.25], 5).tolist() == [0]  # tie: lower setpoint
+
+
+def test_limits_table_is_built_once_per_limits(tesla_limits_file):
+    limits = SimpleNamespace(lim=Limits(tesla_limits_file, cache=False).lim)
+    table = limits_table(limits)
+    assert limits.table is table and limits_table(limits) is table
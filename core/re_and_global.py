@@ -39,6 +39,10 @@ TABLE_COLOR_DICT = {'LB':'#FF5C5C', 'HB':'#FCFBE3', 'LBHB':'#7647A2',
                     'DIAGNOSTIC': '#ffff99'}
 
 
+# Output folder (tables, figures, out of spec files), relative to working folder
+OUTPUT_FOLDER = '!output/'
+
+
 # Dataframe column constants
 VSETPOINT = 'Vsetpoint'
 ON_OFF = 'ON/OFF'
@@ -51,6 +55,7 @@ REGEX_BOARDS = '(^B[0-9]*)'
 REGEX_SYSTEMS = '^B[0-9]*\s(TP[0-9]*:\s(?!NO_UUT).*)'
 REGEX_EMPTY_TEST_POSITION = '^B[0-9]*\sTP[0-9]*:\s$'
 REGEX_VOLTAGE_SENSES = '^B[0-9]*\s(VSense.*)'
+REGEX_ON_OFF = '^B[0-9]*\sON/OFF$'
 
 def REGEX_SPECIFIC_BOARD_SYSTEMS(board_id):
     return '^' + re.escape(board_id) + '*\sTP[0-9]*:\s(?!NO_UUT).*'
@@ -0,0 +1,27 @@
+#!/usr/bin/python3
+
+"""
+This module contains the helpers shared by the sidecar caches (parsed raw
+datafiles, compiled limits) kept in a hidden folder next to the files they
+are derived from, and keyed by the contents of those files.
+"""
+
+import os
+import hashlib
+
+
+CACHE_FOLDER = '.test-analysis-cache'
+HASH_BLOCK_SIZE = 1024**2
+
+
+def sidecar_cache_directory(folder):
+    """ Returns: path of the cache folder kept inside a folder """
+    return os.path.join(folder, CACHE_FOLDER)
+
+def hash_file_contents(filepath):
+    """ Returns: sha1 hex digest of the contents of input file """
+    sha1 = hashlib.sha1()
+    with open(filepath, 'rb') as datafile:
+        for block in iter(lambda: datafile.read(HASH_BLOCK_SIZE), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
@@ -0,0 +1,84 @@
+"""
+This module tests the headless command line interface in cli.py
+"""
+
+import os
+import json
+import pytest
+import cli
+
+
+HEADER = ['Date', 'Time', 'Temp TC1: Amb', 'Vsetpoint', 'B2 ON/OFF', 'B2 VSense1', 'B2 TP1: Tesla ECE']
+DATAFILE = '20180226_104538_Validation V47 Run 11_B.txt'
+
+
+def write_test_folder(folder):
+    """ Writes the datafile of a test of B2 at 9V, 10 scans one per second """
+    lines = ['\t'.join(HEADER)] + \
+            ['\t'.join(['2018/02/26', '10:46:{:02d}.517'.format(second), '23.1', '9',
+                        '1', '9.04784', '0.273414']) for second in range(10)]
+    folder.join(DATAFILE).write('\n'.join(lines) + '\n', ensure=True)
+    return str(folder)
+
+
+@pytest.fixture
+def manifest(tmpdir):
+    """ Returns path of a manifest of two tests (Run A and Run B) written to tmpdir/output """
+    tests = [{'folder': write_test_folder(tmpdir.join(name)), 'name': name, 'temps': '23',
+              'boards': '2'} for name in ('Run A', 'Run B')]
+    manifest = tmpdir.join('tests.json')
+    manifest.write(json.dumps(tests))
+    return str(manifest)
+
+
+def output_files(tmpdir):
+    return sorted(os.listdir(str(tmpdir.join('output'))))
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_manifest_tests_analyzed(tmpdir, manifest, jobs):
+    assert cli.main(['--manifest', manifest, '--jobs', jobs, '--no-cache',
+                     '--output', str(tmpdir.join('output'))]) == 0
+    assert output_files(tmpdir) == ['Run A.xml', 'Run B.xml']
+
+
+def test_failed_test_sets_exit_code(tmpdir, manifest, capsys):
+    with open(manifest) as manifest_file:
+        tests = json.load(manifest_file)
+    tests[0]['folder'] = str(tmpdir.join('missing'))
+    with open(manifest, 'w') as manifest_file:
+        json.dump(tests, manifest_file)
+    assert cli.main(['--manifest', manifest, '--jobs', '1', '--no-cache',
+                     '--output', str(tmpdir.join('output'))]) == 1
+    assert output_files(tmpdir) == ['Run B.xml']
+    assert 'Failed: Run A - FileNotFoundError' in capsys.readouterr().out
+
+
+def test_single_folder(tmpdir):
+    folder = write_test_folder(tmpdir.join('Run C'))
+    assert cli.main([folder, '--temps', '23', '--no-cache', '--output', str(tmpdir.join('output'))]) == 0
+    assert output_files(tmpdir) == ['Run C.xml']
+
+
+def test_manifest_with_unknown_key(tmpdir):
+    manifest = tmpdir.join('tests.json')
+    manifest.write(json.dumps([{'folder': str(tmpdir), 'temp': '23'}]))
+    with pytest.raises(ValueError):
+        cli.main(['--manifest', str(manifest)])
+
+
+def test_workers_of_parallel_tests(tmpdir, manifest, monkeypatch, capsys):
+    with open(manifest) as manifest_file:
+        tests = json.load(manifest_file)
+    tests[0]['workers'] = 2  # set in the manifest, kept
+    with open(manifest, 'w') as manifest_file:
+        json.dump(tests, manifest_file)
+    run_jobs = []
+    monkeypatch.setattr(cli, 'run_jobs', lambda jobs, max_workers: run_jobs.extend(jobs) or [])
+    cli.main(['--manifest', manifest, '--jobs', '2', '--workers', '4'])
+    assert [job['workers'] for job in run_jobs] == [2, 1]
+    assert 'Warning: --workers 4 is replaced by 1' in capsys.readouterr().out
+    del run_jobs[:]
+    cli.main(['--manifest', manifest, '--jobs', '1', '--workers', '4'])
+    assert [job['workers'] for job in run_jobs] == [2, 4]
+    assert 'Warning' not in capsys.readouterr().out